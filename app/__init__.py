@@ -19,40 +19,20 @@ def create_app():
     # 初始化数据库
     db.init_app(app)
     
-    # 创建数据库表
-    with app.app_context():
-        # 导入所有模型
-        from app.cisa.models import CisaData
-        from app.nvd.models import NvdData
-        
-        try:
-            # 检查表是否存在，不存在则创建
-            from sqlalchemy import inspect
-            inspector = inspect(db.engine)
-            
-            # 创建CISA表
-            if not inspector.has_table('cisa'):
-                db.create_all()
-                print("CISA表创建成功")
-            
-            # 创建NVD表
-            if not inspector.has_table('nvd'):
-                db.create_all()
-                print("NVD表创建成功")
-                
-        except Exception as e:
-            print(f"创建数据库表时出错: {str(e)}")
+    # 表结构的检查和创建由迁移步骤执行（python migrate.py），启动时不访问数据库
     
     # 注册蓝图
     from app.cisa.routes import cisa_bp
     from app.cve.routes import cve_bp
     from app.nessus.routes import nessus_bp
     from app.nvd.routes import nvd_bp
+    from app.jobs.routes import jobs_bp
     
     app.register_blueprint(cisa_bp)
     app.register_blueprint(cve_bp)
     app.register_blueprint(nessus_bp)
     app.register_blueprint(nvd_bp)
+    app.register_blueprint(jobs_bp)
     
     # 主页路由
     @app.route('/')
@@ -67,18 +47,6 @@ def create_app():
     except Exception as e:
         print(f"初始化NVD日志服务时出错: {str(e)}")
     
-    # 启动CISA数据同步调度器
-    try:
-        from app.cisa.service import start_scheduler as start_cisa_scheduler
-        start_cisa_scheduler(app)
-    except Exception as e:
-        print(f"启动CISA数据同步调度器时出错: {str(e)}")
-    
-    # 启动NVD数据同步调度器
-    try:
-        from app.nvd.service import start_scheduler as start_nvd_scheduler
-        start_nvd_scheduler(app)
-    except Exception as e:
-        print(f"启动NVD数据同步调度器时出错: {str(e)}")
+    # 定时同步和同步任务由独立的后台进程（worker.py）执行，Web进程和导入脚本不启动后台线程
     
     return app
\ No newline at end of file
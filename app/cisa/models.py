@@ -14,6 +14,7 @@ class CisaData(db.Model):
     required_action = db.Column(db.Text)
     due_date = db.Column(db.Date)
     cve_id = db.Column(db.String(50))
+    content_hash = db.Column(db.String(40))  # 记录内容哈希，内容未变化时跳过更新
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, jsonify
 from .service import CisaService
+from app.jobs.service import JobService
 
 cisa_bp = Blueprint('cisa', __name__, url_prefix='/cisa')
 
@@ -41,13 +42,19 @@ def cisa_index():
 
 @cisa_bp.route('/sync')
 def sync_data():
-    """手动触发数据同步"""
-    from flask import redirect, url_for
-    success = CisaService.compare_and_update_db(sync_type='manual')
-    if success:
-        return redirect(url_for('cisa.cisa_index'))
-    else:
-        return redirect(url_for('cisa.cisa_index'))
+    """手动触发数据同步：提交后台任务后立即返回"""
+    from flask import redirect, url_for, flash
+    job = JobService.enqueue('cisa_sync', {'sync_type': 'manual'})
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('jobs.job_status', job_id=job.id)
+        }), 202
+    
+    flash(f'CISA同步任务已提交（任务ID: {job.id}），可在同步日志中查看结果', 'success')
+    return redirect(url_for('cisa.cisa_index'))
 
 @cisa_bp.route('/init-db')
 def init_db():
@@ -1,15 +1,13 @@
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime, timedelta
-import schedule
 import time
 from threading import Thread
 from flask import current_app
 from .models import CisaData, CisaLog
 from app import db
+from app.hashing import content_hash
+from app.leader import get_leader_lock, leader_only
 
 # 存储应用实例的引用
 _app = None
@@ -22,13 +20,19 @@ def set_app(app):
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DOWNLOAD_DIR = BASE_DIR
 
+# 参与内容哈希的cisa表字段
+CISA_HASH_FIELDS = ('vuln_id', 'vendor_project', 'product', 'vulnerability_name', 'date_added',
+                    'short_description', 'required_action', 'due_date', 'cve_id')
+
 class CisaService:
     @staticmethod
     def get_csv_url():
         """从CISA网站获取CSV下载链接"""
+        from bs4 import BeautifulSoup
+        from app.http_client import get_session
         url = 'https://www.cisa.gov/known-exploited-vulnerabilities-catalog'
         try:
-            response = requests.get(url, timeout=30)
+            response = get_session('cisa').get(url, timeout=30)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -65,6 +69,7 @@ class CisaService:
     @staticmethod
     def download_csv():        
         """下载CSV文件并按日期命名"""
+        from app.http_client import get_session
         try:
             csv_url = CisaService.get_csv_url()
             if not csv_url:
@@ -76,7 +81,7 @@ class CisaService:
             file_name = f'cisa-{current_date}.csv'
             file_path = os.path.join(DOWNLOAD_DIR, file_name)
             
-            response = requests.get(csv_url, timeout=60)
+            response = get_session('cisa').get(csv_url, timeout=60)
             response.raise_for_status()
             
             with open(file_path, 'wb') as f:
@@ -105,6 +110,7 @@ class CisaService:
     @staticmethod
     def compare_and_update_db(sync_type='auto'):
         """比较当天和前一天的CSV文件，将新增内容更新到数据库，并记录同步日志"""
+        import pandas as pd
         affected_count = 0
         message = ""
         status = "success"
@@ -153,137 +159,16 @@ class CisaService:
             # 使用当前应用上下文或_app上下文
             try:
                 # 尝试直接使用当前上下文（如果存在）
-                if not new_entries.empty:
-                    for _, row in new_entries.iterrows():
-                        # 获取vuln_id
-                        vuln_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                        
-                        # 检查记录是否已存在
-                        existing_record = CisaData.query.filter_by(vuln_id=vuln_id).first()
-                        
-                        if existing_record:
-                            # 如果记录存在，则更新
-                            existing_record.vendor_project = CisaService._get_value(row, ['vendorProject', 'Vendor/Project', 'vendor'], str)
-                            existing_record.product = CisaService._get_value(row, ['product', 'Product'], str)
-                            existing_record.vulnerability_name = CisaService._get_value(row, ['vulnerabilityName', 'Vulnerability Name'], str)
-                            existing_record.date_added = CisaService._parse_date(CisaService._get_value(row, ['dateAdded', 'Date Added'], str))
-                            
-                            # 对描述字段应用额外的安全处理
-                            raw_description = CisaService._get_value(row, ['shortDescription', 'Short Description'], str)
-                            existing_record.short_description = CisaService._ensure_safe_description(raw_description)
-                            
-                            existing_record.required_action = CisaService._get_value(row, ['requiredAction', 'Required Action'], str)
-                            existing_record.due_date = CisaService._parse_date(CisaService._get_value(row, ['dueDate', 'Due Date'], str))
-                            existing_record.cve_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                            existing_record.updated_at = datetime.utcnow()
-                        else:
-                            # 如果记录不存在，则创建新记录
-                            # 获取基础值并应用特殊处理
-                            vendor_project = CisaService._get_value(row, ['vendorProject', 'Vendor/Project', 'vendor'], str)
-                            product = CisaService._get_value(row, ['product', 'Product'], str)
-                            vulnerability_name = CisaService._get_value(row, ['vulnerabilityName', 'Vulnerability Name'], str)
-                            date_added = CisaService._parse_date(CisaService._get_value(row, ['dateAdded', 'Date Added'], str))
-                            
-                            # 对描述字段应用额外的安全处理
-                            raw_description = CisaService._get_value(row, ['shortDescription', 'Short Description'], str)
-                            short_description = CisaService._ensure_safe_description(raw_description)
-                            
-                            required_action = CisaService._get_value(row, ['requiredAction', 'Required Action'], str)
-                            due_date = CisaService._parse_date(CisaService._get_value(row, ['dueDate', 'Due Date'], str))
-                            cve_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                            
-                            # 创建CisaData对象
-                            cisa_data = CisaData(
-                                vuln_id=vuln_id,
-                                vendor_project=vendor_project,
-                                product=product,
-                                vulnerability_name=vulnerability_name,
-                                date_added=date_added,
-                                short_description=short_description,
-                                required_action=required_action,
-                                due_date=due_date,
-                                cve_id=cve_id
-                            )
-                            db.session.add(cisa_data)
-                    
-                    db.session.commit()
-                    affected_count = len(new_entries)
-                    message = f"成功导入 {affected_count} 条新记录到数据库"
-                    print(message)
-                else:
-                    message = "没有发现新增记录"
-                    print(message)
-                
-                # 记录成功日志
-                CisaService._log_sync_result(status, message, affected_count, sync_type)
-                return True
+                affected_count, message = CisaService._apply_entries(new_entries)
             except RuntimeError:
                 # 如果没有应用上下文，则使用_app上下文（定时任务情况）
                 with _app.app_context():
-                    if not new_entries.empty:
-                        for _, row in new_entries.iterrows():
-                            # 获取vuln_id
-                            vuln_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                            
-                            # 检查记录是否已存在
-                            existing_record = CisaData.query.filter_by(vuln_id=vuln_id).first()
-                            
-                            if existing_record:
-                                # 如果记录存在，则更新
-                                existing_record.vendor_project = CisaService._get_value(row, ['vendorProject', 'Vendor/Project', 'vendor'], str)
-                                existing_record.product = CisaService._get_value(row, ['product', 'Product'], str)
-                                existing_record.vulnerability_name = CisaService._get_value(row, ['vulnerabilityName', 'Vulnerability Name'], str)
-                                existing_record.date_added = CisaService._parse_date(CisaService._get_value(row, ['dateAdded', 'Date Added'], str))
-                                
-                                # 对描述字段应用额外的安全处理
-                                raw_description = CisaService._get_value(row, ['shortDescription', 'Short Description'], str)
-                                existing_record.short_description = CisaService._ensure_safe_description(raw_description)
-                                
-                                existing_record.required_action = CisaService._get_value(row, ['requiredAction', 'Required Action'], str)
-                                existing_record.due_date = CisaService._parse_date(CisaService._get_value(row, ['dueDate', 'Due Date'], str))
-                                existing_record.cve_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                                existing_record.updated_at = datetime.utcnow()
-                            else:
-                                # 如果记录不存在，则创建新记录
-                                # 获取基础值并应用特殊处理
-                                vendor_project = CisaService._get_value(row, ['vendorProject', 'Vendor/Project', 'vendor'], str)
-                                product = CisaService._get_value(row, ['product', 'Product'], str)
-                                vulnerability_name = CisaService._get_value(row, ['vulnerabilityName', 'Vulnerability Name'], str)
-                                date_added = CisaService._parse_date(CisaService._get_value(row, ['dateAdded', 'Date Added'], str))
-                                
-                                # 对描述字段应用额外的安全处理
-                                raw_description = CisaService._get_value(row, ['shortDescription', 'Short Description'], str)
-                                short_description = CisaService._ensure_safe_description(raw_description)
-                                
-                                required_action = CisaService._get_value(row, ['requiredAction', 'Required Action'], str)
-                                due_date = CisaService._parse_date(CisaService._get_value(row, ['dueDate', 'Due Date'], str))
-                                cve_id = CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
-                                
-                                # 创建CisaData对象
-                                cisa_data = CisaData(
-                                    vuln_id=vuln_id,
-                                    vendor_project=vendor_project,
-                                    product=product,
-                                    vulnerability_name=vulnerability_name,
-                                    date_added=date_added,
-                                    short_description=short_description,
-                                    required_action=required_action,
-                                    due_date=due_date,
-                                    cve_id=cve_id
-                                )
-                                db.session.add(cisa_data)
-                        
-                        db.session.commit()
-                        affected_count = len(new_entries)
-                        message = f"成功导入 {affected_count} 条新记录到数据库"
-                        print(message)
-                    else:
-                        message = "没有发现新增记录"
-                        print(message)
-                    
-                    # 记录成功日志
-                    CisaService._log_sync_result(status, message, affected_count, sync_type)
-                    return True
+                    affected_count, message = CisaService._apply_entries(new_entries)
+            print(message)
+            
+            # 记录成功日志
+            CisaService._log_sync_result(status, message, affected_count, sync_type)
+            return True
         except Exception as e:
             error_msg = f"比较和更新数据库失败: {str(e)}"
             print(error_msg)
@@ -300,6 +185,69 @@ class CisaService:
                     CisaService._log_sync_result(status, message, affected_count, sync_type)
             return False
     
+    @staticmethod
+    def _row_values(row):
+        """从CSV行中取出cisa表各字段的值"""
+        return {
+            'vuln_id': CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str),
+            'vendor_project': CisaService._get_value(row, ['vendorProject', 'Vendor/Project', 'vendor'], str),
+            'product': CisaService._get_value(row, ['product', 'Product'], str),
+            'vulnerability_name': CisaService._get_value(row, ['vulnerabilityName', 'Vulnerability Name'], str),
+            'date_added': CisaService._parse_date(CisaService._get_value(row, ['dateAdded', 'Date Added'], str)),
+            # 对描述字段应用额外的安全处理
+            'short_description': CisaService._ensure_safe_description(
+                CisaService._get_value(row, ['shortDescription', 'Short Description'], str)),
+            'required_action': CisaService._get_value(row, ['requiredAction', 'Required Action'], str),
+            'due_date': CisaService._parse_date(CisaService._get_value(row, ['dueDate', 'Due Date'], str)),
+            'cve_id': CisaService._get_value(row, ['cveID', 'CVE ID', 'CVE'], str)
+        }
+    
+    @staticmethod
+    def _apply_entries(new_entries):
+        """把新增的CSV行写入cisa表，需要在应用上下文中调用
+        
+        已存在的记录按content_hash比较，内容未变化时跳过，不改写字段也不更新updated_at。
+        
+        返回:
+            (新增和更新的记录数, 结果消息)
+        """
+        if new_entries.empty:
+            return 0, "没有发现新增记录"
+        
+        entries = [CisaService._row_values(row) for _, row in new_entries.iterrows()]
+        for values in entries:
+            values['content_hash'] = content_hash(values[field] for field in CISA_HASH_FIELDS)
+        
+        # 一次查询本批已存在的记录
+        vuln_ids = [values['vuln_id'] for values in entries]
+        existing_records = {
+            record.vuln_id: record
+            for record in CisaData.query.filter(CisaData.vuln_id.in_(vuln_ids))
+        }
+        
+        inserted_count = 0
+        updated_count = 0
+        unchanged_count = 0
+        for values in entries:
+            existing_record = existing_records.get(values['vuln_id'])
+            if existing_record is None:
+                # 如果记录不存在，则创建新记录
+                existing_records[values['vuln_id']] = CisaData(**values)
+                db.session.add(existing_records[values['vuln_id']])
+                inserted_count += 1
+            elif existing_record.content_hash == values['content_hash']:
+                unchanged_count += 1
+            else:
+                # 如果记录存在且内容变化，则更新
+                for field, value in values.items():
+                    setattr(existing_record, field, value)
+                existing_record.updated_at = datetime.utcnow()
+                updated_count += 1
+        
+        db.session.commit()
+        message = f"成功导入 {inserted_count} 条新记录，更新 {updated_count} 条记录，{unchanged_count} 条记录内容未变化"
+        return inserted_count + updated_count, message
+    
     @staticmethod
     def _log_sync_result(status, message, affected_count, sync_type='manual'):
         """记录同步操作的结果到数据库日志表"""
@@ -351,6 +299,7 @@ class CisaService:
     @staticmethod
     def _get_value(row, possible_columns, value_type=str):
         """尝试从DataFrame行中获取值，支持多种可能的列名，并处理字符串编码"""
+        import pandas as pd
         for col in possible_columns:
             if col in row.index:
                 val = row[col]
@@ -394,6 +343,7 @@ class CisaService:
     @staticmethod
     def _parse_date(date_str):
         """解析日期字符串为datetime对象"""
+        import pandas as pd
         if not date_str or pd.isna(date_str):
             return None
         
@@ -463,29 +413,44 @@ class CisaService:
             CisaData.cve_id.like(search)
         ).count()
 
+def run_sync_job(params, progress):
+    """后台任务：下载CISA已知被利用漏洞列表并更新数据库（由任务执行器调用）"""
+    if not _app:
+        set_app(current_app._get_current_object())
+    progress(message='正在下载并比较CISA数据')
+    if not CisaService.compare_and_update_db(sync_type=params.get('sync_type', 'manual')):
+        raise RuntimeError('CISA数据同步失败，详见同步日志')
+    return {'success': True}
+
 # 定时任务相关功能
-def run_scheduled_tasks():
-    """运行定时任务"""
+def run_scheduled_tasks(leader):
+    """运行定时任务，只有主节点进程实际执行同步"""
+    import schedule
+    # 使用独立的调度器，与NVD的调度线程互不影响
+    scheduler = schedule.Scheduler()
+    
     # 每6小时执行CISA数据更新
-    schedule.every(6).hours.do(CisaService.compare_and_update_db, sync_type='auto')
+    scheduler.every(6).hours.do(leader_only(leader, CisaService.compare_and_update_db), sync_type='auto')
     
     # 持续运行调度器
     while True:
-        schedule.run_pending()
+        scheduler.run_pending()
         time.sleep(60)
 
 def start_scheduler(app):
-    """在后台线程中启动调度器"""
+    """在后台线程中启动调度器（由worker.py调用），运行多个后台进程时通过MySQL命名锁只让一个进程执行同步"""
     # 设置应用实例引用
     set_app(app)
+    leader = get_leader_lock(app, 'cisa-scheduler')
     
     # 启动定时任务线程
-    scheduler_thread = Thread(target=run_scheduled_tasks, daemon=True)
+    scheduler_thread = Thread(target=run_scheduled_tasks, args=(leader,), daemon=True)
     scheduler_thread.start()
     print("CISA数据同步调度器已启动")
     print("CISA模块已配置定时任务，每6小时自动同步数据")
     
     # 初始运行一次，避免启动后长时间不更新
-    Thread(target=lambda: time.sleep(60) or CisaService.compare_and_update_db(sync_type='auto')).start()
+    startup_sync = leader_only(leader, CisaService.compare_and_update_db)
+    Thread(target=lambda: time.sleep(60) or startup_sync(sync_type='auto'), daemon=True).start()
     print("服务启动后将在1分钟后开始同步CISA数据...")
     print("启动时延迟同步线程已启动，将在1分钟后执行同步操作")
\ No newline at end of file
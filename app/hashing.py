@@ -0,0 +1,25 @@
+"""行内容哈希
+
+导入时比较新旧记录的内容哈希，内容未变化的记录直接跳过，不再写入数据库。
+"""
+import hashlib
+from datetime import date
+
+# 字段分隔符和空值标记，避免('a', 'bc')与('ab', 'c')、None与''得到相同的哈希
+_FIELD_SEPARATOR = '\x1f'
+_NULL = '\x00'
+
+def content_hash(values):
+    """计算一组字段值的内容哈希，返回40位十六进制SHA-1字符串
+    
+    日期时间按isoformat参与计算，其他值按str()，同一记录无论来自API还是TSV文件都得到相同的哈希。
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append(_NULL)
+        elif isinstance(value, date):
+            parts.append(value.isoformat())
+        else:
+            parts.append(str(value))
+    return hashlib.sha1(_FIELD_SEPARATOR.join(parts).encode('utf-8')).hexdigest()
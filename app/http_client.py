@@ -0,0 +1,85 @@
+"""共享的HTTP客户端
+
+NVD、CISA和cvedetails下载脚本统一通过这里创建requests会话：
+连接池（keep-alive复用TLS连接）、每个主机的并发连接上限、gzip、传输层重试和默认超时只在这里配置一次。
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 默认超时（秒）：(连接超时, 读取超时)
+DEFAULT_TIMEOUT = (10, 60)
+
+# 每个会话缓存的主机连接池数量，以及每个主机的最大连接数
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+
+# 传输层重试：连接失败和网关类错误按指数退避重试
+DEFAULT_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 1
+RETRY_STATUS_CODES = (500, 502, 504)
+
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive'
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+class PooledSession(requests.Session):
+    """带默认超时的requests会话，调用方未指定timeout时使用DEFAULT_TIMEOUT"""
+    
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+def create_session(retries=DEFAULT_RETRIES, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                   timeout=DEFAULT_TIMEOUT, headers=None):
+    """创建使用连接池的会话
+    
+    参数:
+        retries: 传输层重试次数，0表示不重试（由调用方自行处理重试和限速）
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 每个主机的最大连接数，连接用尽时其他线程等待空闲连接
+        timeout: 默认超时
+        headers: 额外的默认请求头
+    """
+    session = PooledSession(timeout=timeout)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    ) if retries else Retry(total=0, read=False, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def get_session(name='default', **kwargs):
+    """返回进程内按名称共享的会话，首次调用时用kwargs创建
+    
+    同一名称的调用方共享连接池，例如NVD回填的所有窗口线程复用同一组到NVD的连接。
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = create_session(**kwargs)
+                _sessions[name] = session
+    return session
@@ -0,0 +1,93 @@
+"""导入时的文本清理
+
+各导入脚本原先各自复制了一份清理函数，差别只在清理程度。这里按程度由低到高提供四级清理，
+每一级都包含前一级的处理，导入时按名称选择（TEXT_CLEANERS）：
+    
+    control      移除控制字符和不可打印字符
+    punctuation  再把全角标点、弯引号等替换为ASCII字符
+    unicode      再把阿拉伯文/中文/日文/韩文替换为描述文本，其他U+0800以上的字符替换为占位符
+    latin1       再把latin1无法表示的字符替换为'?'（nvd表使用latin1字符集）
+
+正则和字符映射表在导入模块时编译一次，逐行调用时不再重复构建。
+"""
+import re
+
+# 控制字符和C1不可打印字符（包括制表符和换行符，字段内不应出现）
+_CONTROL_CHARS = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+# 全角字符和常见符号到ASCII的替换
+_PUNCTUATION = str.maketrans({
+    '，': ',', '。': '.', '！': '!', '？': '?',
+    '：': ':', '；': ';', '“': '"', '”': '"',
+    '‘': "'", '’': "'", '（': '(', '）': ')',
+    '【': '[', '】': ']', '《': '<', '》': '>',
+    '「': '[', '」': ']', '『': '[', '』': ']',
+    '、': ',', '～': '~', '…': '...',
+    '　': ' ',  # 全角空格
+    '–': '-',  # 短破折号
+    '—': '-',  # 长破折号
+    '′': "'",  # 撇号
+    '″': '"',  # 引号
+    '°': ' degrees ',  # 度符号
+    '℃': 'C',  # 摄氏度
+    '℉': 'F',  # 华氏度
+    '€': 'EUR',  # 欧元
+    '£': 'GBP',  # 英镑
+    '¥': 'Y',  # 日元
+})
+
+# 按文字替换为描述文本
+_SCRIPTS = [
+    (re.compile(r'[\u0600-\u06FF\u0750-\u077F]+'), '[Arabic text]'),
+    (re.compile(r'[\u4E00-\u9FFF]+'), '[Chinese text]'),
+    (re.compile(r'[\u3040-\u309F\u30A0-\u30FF]+'), '[Japanese text]'),
+    (re.compile(r'[\uAC00-\uD7AF\u1100-\u11FF]+'), '[Korean text]'),
+]
+
+# 其他可能无法存储的Unicode字符
+_WIDE_CHARS = re.compile(r'[\u0800-\uFFFF]')
+
+def strip_control_chars(text):
+    """移除控制字符和不可打印字符"""
+    if not text:
+        return text
+    return _CONTROL_CHARS.sub('', text)
+
+def normalize_punctuation(text):
+    """移除控制字符，并把全角标点等替换为ASCII字符"""
+    if not text:
+        return text
+    return strip_control_chars(text).translate(_PUNCTUATION)
+
+def replace_wide_chars(text):
+    """在normalize_punctuation的基础上，把非拉丁文字替换为描述文本或占位符"""
+    if not text:
+        return text
+    text = normalize_punctuation(text)
+    if text.isascii():
+        return text
+    for pattern, replacement in _SCRIPTS:
+        text = pattern.sub(replacement, text)
+    return _WIDE_CHARS.sub('[Unicode character]', text)
+
+def latin1_safe_text(text):
+    """在replace_wide_chars的基础上，确保文本可以被latin1字符集正确处理"""
+    if not text:
+        return text
+    text = replace_wide_chars(text)
+    return text.encode('latin1', 'replace').decode('latin1')
+
+def keep_text(text):
+    """不做任何清理"""
+    return text
+
+TEXT_CLEANERS = {
+    'none': keep_text,
+    'control': strip_control_chars,
+    'punctuation': normalize_punctuation,
+    'unicode': replace_wide_chars,
+    'latin1': latin1_safe_text,
+}
+
+# nvd表使用latin1字符集，NVD数据默认使用最严格的清理
+DEFAULT_CLEANER = 'latin1'
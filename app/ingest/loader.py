@@ -0,0 +1,736 @@
+"""批量导入文件到MySQL
+
+NVD月度TSV、cvedetails TSV和CISA CSV共用的导入流程：读取文件 → 解析器分批转换 → 批量写入。
+数据源之间的差别（目标表、列、字段转换、文本清理）由app.ingest.parsers中的解析器描述，
+读取、进度、统计、按内容哈希跳过未变化记录和批量写入失败后的处理都只在这里实现一次。
+
+用法:
+    logger, _ = setup_logging('import_202502')
+    success, stats, error_records = import_file('202502.tsv', NvdTsvParser(), logger)
+    batch_import(['202502.tsv', '202503.tsv'], NvdTsvParser())
+
+staged=True时改为先把解析后的数据写成本地临时文件，用LOAD DATA LOCAL INFILE一次载入临时的暂存表，
+再用一条INSERT ... SELECT ... ON DUPLICATE KEY UPDATE合并到目标表，不再逐批往返executemany。
+"""
+import logging
+import os
+import re
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+import pymysql
+from app.ingest.pipeline import IngestPipeline, iter_chunks
+
+# 数据库配置
+DB_CONFIG = {
+    'host': '192.168.233.121',
+    'user': 'root',
+    'password': 'Xl123,56',
+    'port': 3306,
+    'db': 'security',
+    'charset': 'utf8mb4'
+}
+
+# 数据目录（相对路径按此目录解析）和日志目录
+DATA_DIR = '/data_nfs/121/app/security'
+LOG_DIR = os.path.join(DATA_DIR, 'logs')
+
+# 每批写入的记录数，以及保留的错误记录示例数
+BATCH_SIZE = 1000
+MAX_ERROR_RECORDS = 100
+
+# 并行导入时同时运行的进程数上限，每个进程占用一个数据库连接
+MAX_IMPORT_WORKERS = int(os.environ.get('IMPORT_MAX_WORKERS', 4))
+
+# 可以归因到具体记录的写入错误（超长、类型不符、违反约束），批次失败时拆分定位
+ROW_ERRORS = (pymysql.err.DataError, pymysql.err.IntegrityError)
+
+# 与数据无关的暂时性错误（锁等待超时、死锁），并行导入时可能出现，整批重试
+TRANSIENT_ERRORS = (1205, 1213)
+WRITE_RETRIES = 3
+
+# 服务器或客户端禁用了LOAD DATA LOCAL时的错误码，遇到时退回逐批写入
+LOCAL_INFILE_ERRORS = (1148, 2068, 3948)
+
+# LOAD DATA LOCAL把数据错误降级为警告并截断或置空字段值，出现这些警告时不合并，退回逐批写入
+# （1048列不能为空、1261/1262列数不符、1264超出范围、1265截断、1292日期无效、1366类型不符、1406超长）
+DATA_WARNINGS = (1048, 1261, 1262, 1264, 1265, 1292, 1366, 1406)
+
+class StagedDataError(Exception):
+    """暂存表载入时出现数据警告，合并会写入被截断或置空的值"""
+
+# 配置日志记录
+def setup_logging(log_prefix):
+    """创建同时输出到控制台和LOG_DIR下日志文件的记录器，返回(logger, 日志文件路径)"""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_file = f'{LOG_DIR}/{log_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
+    
+    logger = logging.getLogger(f'import_logger_{log_prefix}')
+    logger.setLevel(logging.INFO)
+    
+    # 清除可能存在的处理器
+    if logger.handlers:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers.clear()
+    
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    for handler in (logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()):
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    
+    return logger, log_file
+
+def close_logging(logger):
+    """释放记录器的日志文件"""
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers.clear()
+
+def new_stats():
+    """单个文件的导入统计"""
+    return {
+        'total_records': 0,
+        'imported_records': 0,
+        'inserted_records': 0,
+        'updated_records': 0,
+        'unchanged_records': 0,
+        'skipped_non_cve_records': 0,
+        'skipped_error_records': 0,
+        'batch_success_count': 0,
+        'batch_failure_count': 0,
+        'split_batch_count': 0,
+        'rejected_records': 0,
+        'error_types': defaultdict(int)
+    }
+
+# 源文件中需要移除的控制字符（保留制表符、换行符和回车符）
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# 最多记录的问题行号数
+MAX_PROBLEM_LINE_WARNINGS = 10
+
+class CleanLineReader:
+    """单遍读取源文件：逐行解码并移除控制字符，同时记录已读取的字节数用于显示进度
+    
+    提供readline和逐行迭代，可以直接交给解析器的read（包括csv.DictReader）。
+    行尾保持原样（与newline=''打开的文本文件相同），不生成临时文件。
+    """
+    
+    def __init__(self, file_path, logger):
+        self.logger = logger
+        self.file = open(file_path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.bytes_read = 0
+        self.line_number = 0
+        self.problematic_lines = 0
+    
+    def readline(self):
+        raw = self.file.readline()
+        if not raw:
+            return ''
+        self.bytes_read += len(raw)
+        self.line_number += 1
+        line = raw.decode('utf-8', errors='replace')
+        
+        # 无法解码的字节已替换为Unicode替换字符
+        if '\ufffd' in line:
+            self.problematic_lines += 1
+            if self.problematic_lines <= MAX_PROBLEM_LINE_WARNINGS:
+                self.logger.warning(f"读取时发现问题行: {self.line_number}")
+        
+        return _CONTROL_CHARS.sub('', line)
+    
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+    
+    @property
+    def progress(self):
+        """已读取字节数占文件大小的百分比"""
+        return (self.bytes_read / self.size) * 100 if self.size else 100.0
+    
+    def close(self):
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+# 合并解析阶段的统计
+def merge_parse_stats(stats, batch_stats):
+    """把解析器parse_batch返回的统计增量合并到文件统计中"""
+    for key in ('total_records', 'skipped_non_cve_records', 'skipped_error_records'):
+        stats[key] += batch_stats[key]
+    for error_type, count in batch_stats['error_types'].items():
+        stats['error_types'][error_type] += count
+
+# 被拒绝记录的去向
+class RejectSink:
+    """收集写入失败的记录：前MAX_ERROR_RECORDS条进入错误记录列表，
+    指定path时全部记录写入该文件（首次拒绝时才创建），每行为 行号、错误类型、错误信息 和原始字段
+    """
+    
+    def __init__(self, error_records, key_index, path=None):
+        self.error_records = error_records
+        self.key_index = key_index
+        self.path = path
+        self.file = None
+        self.count = 0
+    
+    def add(self, line_number, row, error):
+        self.count += 1
+        if len(self.error_records) < MAX_ERROR_RECORDS:
+            self.error_records.append({'line': line_number, 'cve_id': row[self.key_index], **error})
+        if self.path:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.file = open(self.path, 'w', encoding='utf-8', newline='')
+            self.file.write(to_staging_line((line_number, error['error_type'], error['details']) + tuple(row)))
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# 写入一批数据
+def write_batch(conn, parser, rows, stats, error_records, logger, rejects=None):
+    """批量写入目标表（存在则更新），批量失败时二分定位有问题的记录
+    
+    写入前查询批次中已存在的主键，按此统计新增和更新的记录数；解析器定义了哈希列时同时按内容哈希
+    比较已有记录，内容未变化的记录直接跳过，不产生写入。
+    批量写入因记录本身的问题（ROW_ERRORS）失败时把批次对半拆分后分别重试，正常的子批次仍整批写入和提交，
+    只有单独写入仍失败的记录被拒绝（交给rejects，未指定时只进入error_records）。
+    锁等待超时和死锁整批重试，其他数据库错误直接抛出，由import_file把文件标记为导入失败。
+    
+    参数:
+        rows: 解析器parse_batch返回的[(行号, 字段元组)]
+    """
+    if rejects is None:
+        rejects = RejectSink(error_records, parser.key_index)
+    
+    # 查询已存在的记录，跳过内容未变化的记录
+    key_index = parser.key_index
+    keys = [row[key_index] for _, row in rows]
+    placeholders = ', '.join(['%s'] * len(keys))
+    hash_select = f", {parser.hash_column}" if parser.hash_column else ''
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {parser.key}{hash_select} FROM {parser.table} "
+                       f"WHERE {parser.key} IN ({placeholders})", keys)
+        existing = cursor.fetchall()
+    existing_keys = {record[0] for record in existing}
+    if parser.hash_column:
+        existing_hashes = dict(existing)
+        changed_rows = [(line_number, row) for line_number, row in rows
+                        if existing_hashes.get(row[key_index]) != row[parser.hash_index]]
+        stats['unchanged_records'] += len(rows) - len(changed_rows)
+        rows = changed_rows
+        if not rows:
+            return
+    
+    error = _try_write(conn, parser.upsert_sql, rows, stats, logger)
+    if error is None:
+        _count_written(rows, existing_keys, key_index, stats)
+        stats['batch_success_count'] += 1
+        return
+    
+    stats['batch_failure_count'] += 1
+    logger.warning(f"批量插入遇到数据错误: {error}")
+    stats['error_types'][_error_type(error)] += 1
+    if len(rows) == 1:
+        # 只有一条记录时不用再拆分重写
+        _reject(parser, *rows[0], error, stats, rejects, logger)
+        return
+    logger.info("拆分批次定位有问题的记录...")
+    
+    half = len(rows) // 2
+    for part in (rows[:half], rows[half:]):
+        _write_bisect(conn, parser, part, existing_keys, stats, rejects, logger)
+
+def _count_written(rows, existing_keys, key_index, stats):
+    """统计已写入的记录，写入前不存在的主键计为新增，其余计为更新"""
+    inserted = sum(1 for _, row in rows if row[key_index] not in existing_keys)
+    stats['inserted_records'] += inserted
+    stats['updated_records'] += len(rows) - inserted
+    stats['imported_records'] += len(rows)
+
+def _error_type(error):
+    return 'data_error' if isinstance(error, pymysql.err.DataError) else 'integrity_error'
+
+def _try_write(conn, sql, rows, stats, logger):
+    """整批写入并提交
+    
+    可以归因到记录的错误（ROW_ERRORS）回滚后返回异常，由调用方拆分；锁等待超时和死锁回滚后
+    整批重试，超过WRITE_RETRIES次或遇到其他错误时抛出，不当作有问题的记录处理。
+    """
+    for attempt in range(1, WRITE_RETRIES + 1):
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(sql, [row for _, row in rows])
+            conn.commit()
+            return None
+        except ROW_ERRORS as e:
+            conn.rollback()
+            return e
+        except pymysql.err.OperationalError as e:
+            conn.rollback()
+            if e.args[0] not in TRANSIENT_ERRORS or attempt == WRITE_RETRIES:
+                raise
+            logger.warning(f"写入遇到暂时性错误，第 {attempt} 次重试: {e}")
+            stats['error_types']['transient_retry'] += 1
+            time.sleep(attempt)
+        except Exception:
+            conn.rollback()
+            raise
+
+def _write_bisect(conn, parser, rows, existing_keys, stats, rejects, logger):
+    """写入拆分后的子批次，失败时继续对半拆分，直到单条记录仍失败时拒绝该记录
+    
+    参数:
+        existing_keys: 整批写入前已存在的主键，用于统计新增和更新的记录数
+    """
+    if not rows:
+        return
+    error = _try_write(conn, parser.upsert_sql, rows, stats, logger)
+    if error is None:
+        _count_written(rows, existing_keys, parser.key_index, stats)
+        stats['split_batch_count'] += 1
+        return
+    
+    if len(rows) > 1:
+        half = len(rows) // 2
+        _write_bisect(conn, parser, rows[:half], existing_keys, stats, rejects, logger)
+        _write_bisect(conn, parser, rows[half:], existing_keys, stats, rejects, logger)
+        return
+    
+    _reject(parser, *rows[0], error, stats, rejects, logger)
+
+def _reject(parser, line_number, row, error, stats, rejects, logger):
+    """拒绝单独写入仍失败的记录"""
+    error_type = _error_type(error)
+    logger.warning(f"跳过有问题的记录: {row[parser.key_index]} - 错误: {error}")
+    stats['error_types'][f'individual_{error_type}'] += 1
+    stats['skipped_error_records'] += 1
+    stats['rejected_records'] += 1
+    rejects.add(line_number, row, {'error_type': error_type, 'details': str(error)})
+
+# 记录单个文件的导入结果
+def log_summary(stats, error_records, logger):
+    logger.info("\n导入结果摘要:")
+    logger.info(f"总记录数: {stats['total_records']}")
+    logger.info(f"成功导入: {stats['imported_records']}（新增 {stats['inserted_records']}，"
+                f"更新 {stats['updated_records']}）")
+    logger.info(f"内容未变化跳过: {stats['unchanged_records']}")
+    logger.info(f"跳过的非CVE记录: {stats['skipped_non_cve_records']}")
+    logger.info(f"跳过的错误记录: {stats['skipped_error_records']}")
+    
+    logger.info("\n批次处理统计:")
+    logger.info(f"成功的批次: {stats['batch_success_count']}")
+    logger.info(f"失败的批次: {stats['batch_failure_count']}")
+    logger.info(f"拆分后成功的子批次: {stats['split_batch_count']}")
+    logger.info(f"拒绝的记录: {stats['rejected_records']}")
+    
+    if stats['error_types']:
+        logger.info("\n错误类型统计:")
+        for error_type, count in stats['error_types'].items():
+            logger.info(f"{error_type}: {count}次")
+    
+    if error_records:
+        logger.info(f"\n前{min(10, len(error_records))}条错误记录示例:")
+        for i, error in enumerate(error_records[:10]):
+            logger.info(f"{i+1}. 行号: {error.get('line', 'N/A')}, CVE ID: {error.get('cve_id', 'N/A')}")
+            logger.info(f"   错误类型: {error['error_type']}")
+            logger.info(f"   详细信息: {error['details']}")
+        if len(error_records) > 10:
+            logger.info(f"... 还有{len(error_records) - 10}条错误记录未显示")
+
+# 解析文件
+def parse_file(file_path, parser, logger, stats, error_records, write_rows, parse_workers=0):
+    """读取并解析文件，每批解析出的[(行号, 字段元组)]交给write_rows，解析统计合并到stats"""
+    reader = CleanLineReader(file_path, logger)
+    
+    def write_parsed_batch(batch):
+        rows, batch_stats, batch_errors = batch
+        merge_parse_stats(stats, batch_stats)
+        for error in batch_errors:
+            if len(error_records) < MAX_ERROR_RECORDS:
+                error_records.append(error)
+        
+        if rows:
+            write_rows(rows)
+        
+        # 显示进度（按已读取的字节数，读取阶段可能领先写入几个批次）
+        logger.info(f"处理进度: 第 {batch_stats['last_line']} 行，"
+                    f"已读取 {reader.bytes_read}/{reader.size} 字节 ({reader.progress:.1f}%)")
+    
+    with reader:
+        pipeline = IngestPipeline(parse=parser.parse_batch, write=write_parsed_batch,
+                                  parse_workers=parse_workers, use_processes=True)
+        pipeline.run(iter_chunks(parser.read(reader), BATCH_SIZE))
+    
+    logger.info(f"文件读取完成，共 {reader.line_number} 行，{reader.problematic_lines} 行包含无法解码的字节")
+
+# 暂存文件的字段转义，与LOAD DATA默认的FIELDS ESCAPED BY '\\'一致
+_STAGING_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+_STAGING_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r', '0': '\0'}
+_STAGING_ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+def to_staging_line(row):
+    """把一行字段转换为LOAD DATA可以读取的制表符分隔行，None写为\\N"""
+    fields = []
+    for value in row:
+        if value is None:
+            fields.append('\\N')
+            continue
+        if value is True or value is False:
+            value = int(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat(' ')
+        elif isinstance(value, date):
+            value = value.isoformat()
+        fields.append(str(value).translate(_STAGING_ESCAPES))
+    return '\t'.join(fields) + '\n'
+
+def from_staging_line(line):
+    """to_staging_line的逆转换，返回字段字符串元组，\\N还原为None"""
+    return tuple(None if field == '\\N' else
+                 _STAGING_ESCAPE_PATTERN.sub(lambda match: _STAGING_UNESCAPES.get(match.group(1), match.group(1)), field)
+                 for field in line.rstrip('\n').split('\t'))
+
+# 逐批写入暂存文件中的记录
+def write_staged_rows(conn, parser, staging_path, stats, error_records, logger, rejects=None):
+    """暂存表不能使用时，把暂存文件中的记录（首列为行号）按BATCH_SIZE逐批交给write_batch写入"""
+    with open(staging_path, encoding='utf-8', newline='') as staging_file:
+        for lines in iter_chunks(staging_file, BATCH_SIZE):
+            rows = []
+            for line in lines:
+                fields = from_staging_line(line)
+                rows.append((int(fields[0]), fields[1:]))
+            write_batch(conn, parser, rows, stats, error_records, logger, rejects)
+
+# 通过暂存表合并
+def merge_staged(conn, parser, staging_path, stats, logger):
+    """把暂存文件载入临时表，再一次性合并到目标表，统计新增、更新和未变化的记录数
+    
+    暂存文件每行的首列是源文件行号，载入时丢弃。
+    暂存表按目标表结构创建（包括唯一键），文件中重复的记录以最后一条为准，与逐批写入一致。
+    解析器定义了哈希列时，先从暂存表删除内容未变化的记录，只合并新增和变化的记录。
+    """
+    table, key, staging = parser.table, parser.key, f"{parser.table}_staging"
+    columns = ', '.join(parser.columns)
+    
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {staging} LIKE {table}")
+        
+        start = datetime.now()
+        cursor.execute(f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {staging} CHARACTER SET utf8mb4 "
+                       f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' (@line_number, {columns})", (staging_path,))
+        # LOCAL模式下超长、类型不符的值按警告处理（截断或置空），不会中断载入；
+        # 内容哈希按原始值计算，被损坏的记录合并后不会再被改写，因此不合并
+        warnings = conn.show_warnings()
+        if warnings:
+            stats['error_types']['load_warning'] += len(warnings)
+            for level, code, message in warnings[:10]:
+                logger.warning(f"载入暂存表警告: {level} {code} {message}")
+            data_warnings = [warning for warning in warnings if warning[1] in DATA_WARNINGS]
+            if data_warnings:
+                cursor.execute(f"DROP TEMPORARY TABLE {staging}")
+                raise StagedDataError(f"载入暂存表时出现 {len(data_warnings)} 条数据警告: {data_warnings[0][2]}")
+        cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+        staged_count = cursor.fetchone()[0]
+        logger.info(f"已载入暂存表 {staged_count} 条记录，耗时: {datetime.now() - start}")
+        
+        start = datetime.now()
+        if parser.hash_column:
+            cursor.execute(
+                f"DELETE s FROM {staging} s JOIN {table} t "
+                f"ON t.{key} = s.{key} AND t.{parser.hash_column} = s.{parser.hash_column}")
+        
+        cursor.execute(f"SELECT COUNT(*) FROM {staging} s LEFT JOIN {table} t ON t.{key} = s.{key} "
+                       f"WHERE t.{key} IS NULL")
+        inserted = cursor.fetchone()[0]
+        
+        # 受影响行数：新增的记录计1，更新的记录计2，值没有变化的记录计0
+        affected = cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+                                  f"ON DUPLICATE KEY UPDATE {parser.update_assignments}")
+        updated = (affected - inserted) // 2
+        cursor.execute(f"DROP TEMPORARY TABLE {staging}")
+    conn.commit()
+    
+    stats['inserted_records'] += inserted
+    stats['updated_records'] += updated
+    stats['imported_records'] += inserted + updated
+    stats['unchanged_records'] += staged_count - inserted - updated
+    stats['batch_success_count'] += 1
+    logger.info(f"合并到{table}表：新增 {inserted} 条，更新 {updated} 条，"
+                f"内容未变化 {staged_count - inserted - updated} 条，耗时: {datetime.now() - start}")
+
+# 导入单个文件
+def import_file(file_path, parser, logger, parse_workers=0, replace=False, staged=False):
+    """用parser解析并导入一个文件
+    
+    参数:
+        file_path: 文件路径
+        parser: app.ingest.parsers中的解析器实例
+        logger: 日志记录器
+        parse_workers: 大于0时使用进程池并行解析
+        replace: 导入前清空目标表
+        staged: 通过LOAD DATA LOCAL INFILE暂存表合并，数据库不允许或载入时出现数据警告时自动退回逐批写入
+    
+    返回:
+        (是否成功, 统计信息, 错误记录列表)
+    """
+    start_time = datetime.now()
+    logger.info(f"开始导入文件: {file_path}")
+    logger.info(f"开始时间: {start_time}")
+    
+    stats = new_stats()
+    error_records = []
+    conn = None
+    staging_path = None
+    # 写入失败的记录全部保存到日志目录，便于修正后重新导入
+    file_base = os.path.splitext(os.path.basename(file_path))[0]
+    rejects = RejectSink(error_records, parser.key_index,
+                         f'{LOG_DIR}/rejected_{file_base}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.tsv')
+    
+    try:
+        # 检查文件是否存在
+        if not os.path.exists(file_path):
+            logger.error(f"错误: 文件 {file_path} 不存在")
+            return False, stats, error_records
+        
+        conn = pymysql.connect(**DB_CONFIG, local_infile=staged)
+        logger.info(f"成功连接到数据库: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['db']}")
+        parser.ensure_table(conn, logger)
+        
+        if replace:
+            logger.info(f"正在清空{parser.table}表的现有数据...")
+            with conn.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {parser.table}")
+            conn.commit()
+        
+        if staged:
+            # 解析结果（连同行号）写入本地临时文件（不写数据目录），解析完成后一次载入并合并
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.tsv',
+                                             prefix=f'{parser.table}_staging_', delete=False) as staging_file:
+                staging_path = staging_file.name
+                parse_file(file_path, parser, logger, stats, error_records,
+                           lambda rows: staging_file.writelines(to_staging_line((line_number,) + tuple(row))
+                                                                for line_number, row in rows),
+                           parse_workers)
+            try:
+                merge_staged(conn, parser, staging_path, stats, logger)
+            except (pymysql.err.OperationalError, pymysql.err.InternalError, StagedDataError) as e:
+                if isinstance(e, StagedDataError):
+                    # 逐批写入时有问题的记录会被定位并拒绝，不会写入截断的值
+                    logger.warning(f"{e}，改为逐批写入")
+                elif e.args[0] in LOCAL_INFILE_ERRORS:
+                    logger.warning(f"数据库不允许LOAD DATA LOCAL INFILE（{e}），改为逐批写入")
+                else:
+                    raise
+                # 不重新读取和解析源文件，直接逐批写入已解析的暂存记录，统计累计在同一个stats中
+                conn.rollback()
+                write_staged_rows(conn, parser, staging_path, stats, error_records, logger, rejects)
+        else:
+            # 读取文件、解析字段和写入数据库分阶段并行：写入当前批次时后续批次已在读取和解析
+            parse_file(file_path, parser, logger, stats, error_records,
+                       lambda rows: write_batch(conn, parser, rows, stats, error_records, logger, rejects),
+                       parse_workers)
+        
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {parser.table}")
+            total_in_db = cursor.fetchone()[0]
+        
+        end_time = datetime.now()
+        log_summary(stats, error_records, logger)
+        if rejects.count:
+            logger.info(f"被拒绝的记录已保存到: {rejects.path}")
+        logger.info(f"数据库中{parser.table}表总记录数: {total_in_db}")
+        logger.info(f"结束时间: {end_time}")
+        logger.info(f"耗时: {end_time - start_time}")
+        return True, stats, error_records
+    
+    except Exception as e:
+        logger.error(f"导入过程中出错: {e}")
+        logger.debug(traceback.format_exc())
+        return False, stats, error_records
+    finally:
+        rejects.close()
+        if staging_path and os.path.exists(staging_path):
+            os.remove(staging_path)
+        if conn is not None and conn.open:
+            conn.close()
+            logger.info("数据库连接已关闭")
+
+# 导入后验证
+def verify_file(file_path, parser, logger):
+    """用解析器的verify检查导入结果"""
+    try:
+        conn = pymysql.connect(**DB_CONFIG)
+        try:
+            return parser.verify(conn, file_path, logger)
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.error(f"验证导入结果时出错: {e}")
+        return False
+
+# 清空目标表
+def clear_table(parser, logger):
+    """导入前清空解析器的目标表"""
+    conn = pymysql.connect(**DB_CONFIG)
+    try:
+        parser.ensure_table(conn, logger)
+        logger.info(f"正在清空{parser.table}表的现有数据...")
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {parser.table}")
+        conn.commit()
+    finally:
+        conn.close()
+
+# 导入并验证单个文件
+def import_and_verify(file_path, parser, parse_workers=0, staged=False):
+    """使用独立的日志和数据库连接导入一个文件并验证，可以在进程池中运行
+
+    返回:
+        {'file_path', 'log_path', 'success', 'verified', 'stats'}
+    """
+    file_base = os.path.splitext(os.path.basename(file_path))[0]
+    file_logger, file_log_path = setup_logging(f'import_{file_base}')
+    try:
+        success, stats, _ = import_file(file_path, parser, file_logger, parse_workers, staged=staged)
+        verified = success and verify_file(file_path, parser, file_logger)
+    finally:
+        close_logging(file_logger)
+    return {'file_path': file_path, 'log_path': file_log_path, 'success': success,
+            'verified': verified, 'stats': stats}
+
+# 批量导入
+def batch_import(file_paths, parser, parse_workers=0, log_prefix='batch_import', replace=False, staged=False,
+                 workers=1):
+    """导入多个文件，每个文件生成独立的日志并在导入后验证，返回批量统计
+
+    workers大于1时用进程池并行导入：每个进程一次处理一个文件，使用自己的数据库连接，
+    较大的文件先开始。同时导入的文件数不超过workers和MAX_IMPORT_WORKERS，避免压垮MySQL；
+    每个文件已在独立进程中解析，此时忽略parse_workers。
+    """
+    batch_stats = {
+        'total_files': len(file_paths),
+        'success_files': 0,
+        'failed_files': 0,
+        'total_records': 0,
+        'total_imported': 0,
+        'total_unchanged': 0,
+        'total_skipped': 0
+    }
+    
+    main_logger, main_log_file = setup_logging(log_prefix)
+    main_logger.info(f"共需要导入 {len(file_paths)} 个文件")
+    
+    # 如果是相对路径，转换为绝对路径
+    file_paths = [file_path if os.path.isabs(file_path) or os.path.exists(file_path)
+                  else os.path.join(DATA_DIR, file_path) for file_path in file_paths]
+    for file_path in file_paths:
+        main_logger.info(f"待导入文件: {file_path}")
+    workers = max(1, min(workers, MAX_IMPORT_WORKERS, len(file_paths)))
+    
+    def record_result(result):
+        file_name = os.path.basename(result['file_path'])
+        stats = result['stats']
+        main_logger.info(f"文件日志: {result['log_path']}")
+        if result['success']:
+            if result['verified']:
+                print(f"文件 {file_name} 导入并验证成功!")
+                print(f"成功导入记录数: {stats['imported_records']}")
+                print(f"日志文件: {result['log_path']}")
+                main_logger.info(f"文件 {file_name} 导入并验证成功")
+                main_logger.info(f"成功导入记录数: {stats['imported_records']}")
+                batch_stats['success_files'] += 1
+            else:
+                print(f"文件 {file_name} 导入成功但验证失败!")
+                print(f"请查看日志文件了解详情: {result['log_path']}")
+                main_logger.warning(f"文件 {file_name} 导入成功但验证失败")
+                batch_stats['failed_files'] += 1
+            
+            batch_stats['total_records'] += stats['total_records']
+            batch_stats['total_imported'] += stats['imported_records']
+            batch_stats['total_unchanged'] += stats['unchanged_records']
+            batch_stats['total_skipped'] += (stats['skipped_non_cve_records'] + stats['skipped_error_records'])
+        else:
+            print(f"文件 {file_name} 导入失败!")
+            print(f"请查看日志文件了解详情: {result['log_path']}")
+            main_logger.error(f"文件 {file_name} 导入失败")
+            batch_stats['failed_files'] += 1
+    
+    start_time = datetime.now()
+    
+    try:
+        if replace:
+            clear_table(parser, main_logger)
+        
+        if workers > 1:
+            main_logger.info(f"使用 {workers} 个进程并行导入")
+            # 大文件先开始，避免最后只剩一个大文件在单独运行
+            ordered = sorted(file_paths, key=lambda path: os.path.getsize(path) if os.path.exists(path) else 0,
+                             reverse=True)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(import_and_verify, file_path, parser, 0, staged): file_path
+                           for file_path in ordered}
+                for i, future in enumerate(as_completed(futures)):
+                    print(f"\n{'=' * 80}")
+                    print(f"已完成第 {i+1}/{len(file_paths)} 个文件: {os.path.basename(futures[future])}")
+                    main_logger.info(f"\n{'=' * 80}")
+                    main_logger.info(f"已完成第 {i+1}/{len(file_paths)} 个文件: {os.path.basename(futures[future])}")
+                    try:
+                        record_result(future.result())
+                    except Exception as e:
+                        main_logger.error(f"导入进程出错: {e}")
+                        record_result({'file_path': futures[future], 'log_path': 'N/A', 'success': False,
+                                       'verified': False, 'stats': new_stats()})
+        else:
+            for i, file_path in enumerate(file_paths):
+                print(f"\n{'=' * 80}")
+                print(f"开始处理第 {i+1}/{len(file_paths)} 个文件: {os.path.basename(file_path)}")
+                main_logger.info(f"\n{'=' * 80}")
+                main_logger.info(f"开始处理第 {i+1}/{len(file_paths)} 个文件: {os.path.basename(file_path)}")
+                record_result(import_and_verify(file_path, parser, parse_workers, staged))
+        
+        elapsed_time = datetime.now() - start_time
+        summary = [
+            f"总文件数: {batch_stats['total_files']}",
+            f"并行进程数: {workers}",
+            f"成功文件数: {batch_stats['success_files']}",
+            f"失败文件数: {batch_stats['failed_files']}",
+            f"总记录数: {batch_stats['total_records']}",
+            f"成功导入记录数: {batch_stats['total_imported']}",
+            f"内容未变化跳过: {batch_stats['total_unchanged']}",
+            f"跳过记录数: {batch_stats['total_skipped']}",
+            f"总耗时: {elapsed_time}"
+        ]
+        print(f"\n{'=' * 80}")
+        print("批量导入完成!")
+        main_logger.info("\n批量导入完成总结:")
+        for line in summary:
+            print(line)
+            main_logger.info(line)
+        print(f"主日志文件: {main_log_file}")
+    
+    except Exception as e:
+        print(f"批量导入过程中发生严重错误: {e}")
+        main_logger.error(f"批量导入过程中发生严重错误: {e}")
+        main_logger.debug(traceback.format_exc())
+    finally:
+        main_logger.info("=" * 80)
+        close_logging(main_logger)
+    
+    return batch_stats
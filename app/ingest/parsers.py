@@ -0,0 +1,406 @@
+"""批量导入的数据源解析器
+
+每种数据源一个解析器，描述目标表、写入的列和如何把文件中的一条记录转换为一行：
+    
+    NvdTsvParser         NVD月度TSV（YYYYMM.tsv），写入nvd表
+    CveDetailsTsvParser  cvedetails导出的TSV（cve.tsv），写入cvedetails表
+    CisaCsvParser        CISA已知被利用漏洞列表（cisa-YYYYMMDD.csv），写入cisa表
+
+读取、分批、写入和错误处理由app.ingest.loader统一完成。解析器需要可以被pickle，
+导入时可以把parse_batch交给进程池并行执行。
+"""
+import csv
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from app.cisa.service import CISA_HASH_FIELDS
+from app.hashing import content_hash
+from app.ingest.cleaning import DEFAULT_CLEANER, TEXT_CLEANERS
+from app.nvd.extractor import record_from_tsv_fields, record_hash
+
+class RecordError(ValueError):
+    """记录无法转换时抛出，error_type用于错误类型统计"""
+    
+    def __init__(self, error_type, details):
+        super().__init__(details)
+        self.error_type = error_type
+
+class Parser:
+    """解析器基类
+    
+    子类需要定义table、key、columns，并实现parse_record；
+    key为表上的唯一键，columns中除key以外的列在记录已存在时更新（update_columns可以覆盖）。
+    定义了hash_column时，写入前按内容哈希跳过未变化的记录。
+    """
+    
+    table = None
+    key = None
+    columns = ()
+    update_columns = None
+    hash_column = None
+    
+    def __init__(self, clean='none'):
+        """
+        参数:
+            clean: 文本字段的清理程度，TEXT_CLEANERS中的名称
+        """
+        if clean not in TEXT_CLEANERS:
+            raise ValueError(f"未知的文本清理方式: {clean}")
+        self.clean = clean
+    
+    @property
+    def key_index(self):
+        return self.columns.index(self.key)
+    
+    @property
+    def hash_index(self):
+        return self.columns.index(self.hash_column) if self.hash_column else None
+    
+    @property
+    def update_assignments(self):
+        """ON DUPLICATE KEY UPDATE子句中的赋值列表"""
+        update_columns = self.update_columns or [c for c in self.columns if c != self.key]
+        return ', '.join(f'{c}=VALUES({c})' for c in update_columns)
+    
+    @property
+    def upsert_sql(self):
+        """批量写入的INSERT ... ON DUPLICATE KEY UPDATE语句"""
+        return (f"INSERT INTO {self.table} ({', '.join(self.columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(self.columns))}) "
+                f"ON DUPLICATE KEY UPDATE {self.update_assignments}")
+    
+    def clean_text(self, text):
+        return TEXT_CLEANERS[self.clean](text)
+    
+    def read(self, f):
+        """从打开的文本文件中逐条返回(行号, 原始记录)"""
+        raise NotImplementedError
+    
+    def parse_record(self, raw):
+        """把一条原始记录转换为与columns对应的元组
+        
+        返回None表示不是数据记录（计入skipped_non_cve_records），无法转换时抛出RecordError。
+        """
+        raise NotImplementedError
+    
+    def parse_batch(self, items):
+        """流水线解析阶段：把一批(行号, 原始记录)转换为待写入的数据
+        
+        统计和错误记录作为结果返回，由写入阶段合并，解析阶段可以在其他线程或进程中运行。
+        
+        返回:
+            ([(行号, 字段元组)], 统计增量, 错误记录列表)
+        """
+        rows = []
+        errors = []
+        batch_stats = {
+            'total_records': 0,
+            'skipped_non_cve_records': 0,
+            'skipped_error_records': 0,
+            'error_types': defaultdict(int),
+            'last_line': 0
+        }
+        
+        for line_number, raw in items:
+            batch_stats['total_records'] += 1
+            batch_stats['last_line'] = line_number
+            try:
+                row = self.parse_record(raw)
+            except RecordError as e:
+                batch_stats['skipped_error_records'] += 1
+                batch_stats['error_types'][e.error_type] += 1
+                errors.append({'line': line_number, 'error_type': e.error_type, 'details': str(e)})
+                continue
+            except Exception as e:
+                batch_stats['skipped_error_records'] += 1
+                batch_stats['error_types']['record_processing_error'] += 1
+                errors.append({'line': line_number, 'error_type': 'processing_error', 'details': str(e)})
+                continue
+            
+            if row is None:
+                batch_stats['skipped_non_cve_records'] += 1
+                continue
+            rows.append((line_number, row))
+        
+        return rows, batch_stats, errors
+    
+    def ensure_table(self, conn, logger):
+        """导入前检查目标表，默认不做处理（表由migrate.py创建）"""
+    
+    def verify(self, conn, file_path, logger):
+        """导入后验证，返回是否通过；默认检查目标表非空"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+            count = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        logger.info(f"{self.table}表记录总数: {count}")
+        return count > 0
+
+class NvdTsvParser(Parser):
+    """NVD月度TSV文件，兼容只有前4列的旧格式和9列完整格式"""
+    
+    table = 'nvd'
+    key = 'cve_id'
+    columns = ('cve_id', 'published_date', 'last_modified_date', 'description',
+               'base_score', 'base_severity', 'vector_string', 'vendor', 'product', 'content_hash')
+    hash_column = 'content_hash'
+    
+    def __init__(self, clean=DEFAULT_CLEANER):
+        super().__init__(clean)
+    
+    def read(self, f):
+        f.readline()  # 跳过表头
+        return enumerate(f, start=2)
+    
+    def parse_record(self, line):
+        # 跳过非CVE开头的记录
+        if not line.strip().startswith('CVE'):
+            return None
+        
+        fields = line.strip().split('\t')
+        if len(fields) < 4:
+            raise RecordError('insufficient_fields', f'字段数量不足: {len(fields)}')
+        
+        # 使用与API同步相同的抽取逻辑解析字段
+        record = record_from_tsv_fields(fields)
+        if not record:
+            raise RecordError('missing_fields', '缺少CVE ID或日期')
+        
+        return (
+            record['cve_id'],
+            record['published_date'].date(),
+            record['last_modified_date'].date(),
+            self.clean_text(record['description']),
+            record['base_score'],
+            record['base_severity'],
+            record['vector_string'],
+            record['vendor'],
+            record['product'],
+            record_hash(record)
+        )
+    
+    def ensure_table(self, conn, logger):
+        """检查nvd表结构：表不存在时创建，缺少content_hash/child_hash列时添加"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SHOW TABLES LIKE 'nvd'")
+            if cursor.fetchone() is not None:
+                cursor.execute("DESCRIBE nvd")
+                column_names = [col[0] for col in cursor.fetchall()]
+                logger.info(f"nvd表已存在，表中的列: {', '.join(column_names)}")
+                
+                # 添加内容哈希列，用于跳过内容未变化的记录
+                if 'content_hash' not in column_names:
+                    logger.info("添加content_hash列到nvd表...")
+                    cursor.execute("ALTER TABLE nvd ADD COLUMN content_hash VARCHAR(40) DEFAULT NULL")
+                    conn.commit()
+                if 'child_hash' not in column_names:
+                    logger.info("添加child_hash列到nvd表...")
+                    cursor.execute("ALTER TABLE nvd ADD COLUMN child_hash VARCHAR(40) DEFAULT NULL")
+                    conn.commit()
+            else:
+                logger.warning("nvd表不存在，将创建新表")
+                cursor.execute('''
+                CREATE TABLE IF NOT EXISTS nvd (
+                    id INT(11) NOT NULL AUTO_INCREMENT,
+                    cve_id VARCHAR(20) NOT NULL,
+                    published_date DATETIME DEFAULT NULL,
+                    last_modified_date DATETIME DEFAULT NULL,
+                    description TEXT DEFAULT NULL,
+                    base_score FLOAT DEFAULT NULL,
+                    base_severity VARCHAR(20) DEFAULT NULL,
+                    vector_string TEXT DEFAULT NULL,
+                    vendor TEXT DEFAULT NULL,
+                    product TEXT DEFAULT NULL,
+                    content_hash VARCHAR(40) DEFAULT NULL,
+                    child_hash VARCHAR(40) DEFAULT NULL,
+                    PRIMARY KEY (id),
+                    UNIQUE KEY cve_id (cve_id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
+                ''')
+                conn.commit()
+                logger.info("nvd表已创建")
+        except Exception as e:
+            logger.error(f"检查表结构时出错: {e}")
+            conn.rollback()
+        finally:
+            cursor.close()
+    
+    def verify(self, conn, file_path, logger):
+        """按文件名中的年月检查该月记录数、重复CVE ID和评分分布"""
+        file_name = os.path.basename(file_path)
+        year_month = os.path.splitext(file_name)[0][:6]  # 例如 '202502'
+        try:
+            month_start = datetime.strptime(year_month, '%Y%m').date()
+        except ValueError:
+            logger.info(f"{file_name} 不是按月命名的文件，只检查nvd表非空")
+            return super().verify(conn, file_path, logger)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        
+        cursor = conn.cursor()
+        try:
+            month_filter = "published_date >= %s AND published_date < %s"
+            cursor.execute(f"SELECT COUNT(*) FROM nvd WHERE {month_filter}", (month_start, next_month))
+            month_count = cursor.fetchone()[0]
+            
+            # 检查是否有重复的CVE ID
+            cursor.execute(f"SELECT COUNT(*) FROM (SELECT cve_id FROM nvd WHERE {month_filter} "
+                           f"GROUP BY cve_id HAVING COUNT(*) > 1) AS duplicates", (month_start, next_month))
+            duplicate_count = cursor.fetchone()[0]
+            
+            # 查询该月份的评分分布
+            cursor.execute(f"""SELECT
+                    CASE
+                        WHEN base_score >= 9 THEN 'Critical (9.0-10.0)'
+                        WHEN base_score >= 7 THEN 'High (7.0-8.9)'
+                        WHEN base_score >= 4 THEN 'Medium (4.0-6.9)'
+                        WHEN base_score >= 0 THEN 'Low (0.0-3.9)'
+                        ELSE 'N/A'
+                    END AS score_range,
+                    COUNT(*) AS count
+                FROM nvd WHERE {month_filter}
+                GROUP BY score_range ORDER BY count DESC""", (month_start, next_month))
+            score_distribution = cursor.fetchall()
+        finally:
+            cursor.close()
+        
+        logger.info(f"\n导入验证结果 ({file_name}):")
+        logger.info(f"{month_start.year}年{month_start.month}月的记录总数: {month_count}")
+        logger.info(f"重复的CVE ID数量: {duplicate_count}")
+        if score_distribution:
+            logger.info("评分分布:")
+            for score_range, count in score_distribution:
+                logger.info(f"  {score_range}: {count}")
+        
+        # 验证通过条件：记录数大于0，无重复记录
+        if month_count > 0 and duplicate_count == 0:
+            logger.info(f"验证通过: {file_name} 导入的数据完整且无重复")
+            return True
+        logger.warning(f"验证警告: {file_name} 导入的数据可能存在问题")
+        return False
+
+class CsvParser(Parser):
+    """带表头的CSV/TSV文件，每条记录为{列名: 值}（字段内可以包含被引号括起的分隔符和换行）"""
+    
+    delimiter = ','
+    
+    def read(self, f):
+        reader = csv.DictReader(f, delimiter=self.delimiter, quotechar='"')
+        for row in reader:
+            yield reader.line_num, row
+    
+    def value(self, row, *names):
+        """按候选列名取值，去掉首尾空白并清理文本，空值返回None"""
+        for name in names:
+            value = row.get(name)
+            if value is not None:
+                value = value.strip()
+                return self.clean_text(value) if value else None
+        return None
+
+def _parse_datetime(value, formats):
+    if not value:
+        return None
+    for date_format in formats:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+class CveDetailsTsvParser(CsvParser):
+    """cvedetails导出的TSV文件，列名与cvedetails表的列名相同"""
+    
+    DATETIME_COLUMNS = ('publishDate', 'updateDate', 'exploitExistenceChangeDate', 'cisaExploitAdd',
+                        'cisaActionDue', 'epssScoreChangeDate', 'maxCvssBaseScoreChangeDate')
+    INT_COLUMNS = ('cveNumber', 'cveYear', 'assignerId', 'configCount', 'configConditionCount',
+                   'vendorCommentCount', 'referenceCount', 'metricCount', 'weaknessCount')
+    FLOAT_COLUMNS = ('epssScore', 'epssPercentile', 'maxCvssBaseScore', 'maxCvssBaseScorev2',
+                     'maxCvssBaseScorev3', 'maxCvssBaseScorev4', 'maxCvssExploitabilityScore', 'maxCvssImpactScore')
+    BOOL_COLUMNS = ('exploitExists', 'isInCISAKEV', 'isOverflow', 'isMemoryCorruption', 'isSqlInjection', 'isXss',
+                    'isDirectoryTraversal', 'isFileInclusion', 'isCsrf', 'isXxe', 'isSsrf', 'isOpenRedirect',
+                    'isInputValidation', 'isCodeExecution', 'isBypassSomething', 'isGainPrivilege',
+                    'isDenialOfService', 'isInformationLeak', 'isUsedForRansomware')
+    TEXT_COLUMNS = ('assigner', 'assignerSourceName', 'cveId', 'nvdVulnStatus', 'summary', 'evaluatorComment',
+                    'evaluatorSolution', 'evaluatorImpact', 'cisaVulnerabilityName', 'cisaRequiredAction',
+                    'cisaShortDescription', 'cisaNotes', 'title')
+    
+    delimiter = '\t'
+    table = 'cvedetails'
+    key = 'cveId'
+    columns = TEXT_COLUMNS + DATETIME_COLUMNS + INT_COLUMNS + FLOAT_COLUMNS + BOOL_COLUMNS + ('created_at', 'updated_at')
+    update_columns = [c for c in columns if c not in ('cveId', 'created_at')]
+    
+    def parse_record(self, row):
+        if not self.value(row, 'cveId'):
+            return None
+        now = datetime.utcnow()
+        values = []
+        for column in self.columns:
+            if column in ('created_at', 'updated_at'):
+                values.append(now)
+                continue
+            value = self.value(row, column)
+            if value is None:
+                values.append(None)
+            elif column in self.DATETIME_COLUMNS:
+                values.append(_parse_datetime(value, ('%Y-%m-%d %H:%M:%S',)))
+            elif column in self.INT_COLUMNS:
+                try:
+                    values.append(int(value))
+                except ValueError:
+                    values.append(None)
+            elif column in self.FLOAT_COLUMNS:
+                try:
+                    values.append(float(value))
+                except ValueError:
+                    values.append(None)
+            elif column in self.BOOL_COLUMNS:
+                lowered = value.lower()
+                values.append(True if lowered in ('true', 'yes', '1', 'y')
+                              else False if lowered in ('false', 'no', '0', 'n') else None)
+            else:
+                values.append(value)
+        return tuple(values)
+
+class CisaCsvParser(CsvParser):
+    """CISA已知被利用漏洞列表CSV，内容哈希与定时同步使用相同的字段"""
+    
+    DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d-%b-%y', '%d-%b-%Y')
+    
+    table = 'cisa'
+    key = 'vuln_id'
+    columns = CISA_HASH_FIELDS + ('content_hash', 'created_at', 'updated_at')
+    update_columns = [c for c in columns if c not in ('vuln_id', 'created_at')]
+    hash_column = 'content_hash'
+    
+    def parse_record(self, row):
+        cve_id = self.value(row, 'cveID', 'CVE ID', 'CVE')
+        if not cve_id:
+            return None
+        date_added = _parse_datetime(self.value(row, 'dateAdded', 'Date Added'), self.DATE_FORMATS)
+        if not date_added:
+            raise RecordError('missing_fields', '缺少或无法解析dateAdded')
+        due_date = _parse_datetime(self.value(row, 'dueDate', 'Due Date'), self.DATE_FORMATS)
+        values = (
+            cve_id,  # 使用cveID作为vuln_id
+            self.value(row, 'vendorProject', 'Vendor/Project', 'vendor') or '',
+            self.value(row, 'product', 'Product'),
+            self.value(row, 'vulnerabilityName', 'Vulnerability Name') or '',
+            date_added.date(),
+            self.value(row, 'shortDescription', 'Short Description'),
+            self.value(row, 'requiredAction', 'Required Action'),
+            due_date.date() if due_date else None,
+            cve_id
+        )
+        now = datetime.utcnow()
+        return values + (content_hash(values), now, now)
+
+# 按名称选择解析器，供命令行参数使用
+PARSERS = {
+    'nvd': NvdTsvParser,
+    'cvedetails': CveDetailsTsvParser,
+    'cisa': CisaCsvParser,
+}
@@ -0,0 +1,156 @@
+"""有界队列连接的 获取 → 解析 → 写入 流水线
+
+获取阶段（网络请求/读文件）和解析阶段各在一个后台线程中运行，写入阶段在调用方线程中运行
+（数据库会话和Flask应用上下文都属于调用方线程）。阶段之间用有界队列连接：写入阶段提交第N页时，
+第N+1页已在解析、第N+2页正在下载；队列满时上游阻塞等待，内存占用不随数据量增长。
+解析阶段可以使用进程池并行处理多页，结果仍按原顺序交给写入阶段。
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+# 每个队列最多缓存的页面/批次数
+DEFAULT_QUEUE_SIZE = 4
+
+# 队列操作的轮询间隔（秒），用于及时响应其他阶段的失败
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+def iter_chunks(iterable, size):
+    """把可迭代对象按size切分为列表，用作文件导入流水线的获取阶段"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class IngestPipeline:
+    """三阶段数据导入流水线
+    
+    用法:
+        pipeline = IngestPipeline(parse=抽取函数, write=写入函数)
+        written = pipeline.run(数据源迭代器)
+    
+    数据源的每一项依次经过parse和write；任一阶段出错时其余阶段停止，异常在run中重新抛出。
+    """
+    
+    def __init__(self, parse, write, queue_size=DEFAULT_QUEUE_SIZE, parse_workers=0, use_processes=False):
+        """
+        参数:
+            parse: 解析函数，输入数据源的一项，返回交给write的结果；使用进程池时必须是模块级函数
+            write: 写入函数，在调用run的线程中按数据源顺序调用
+            queue_size: 每个阶段间队列的容量
+            parse_workers: 大于0时解析阶段使用线程池/进程池并行解析
+            use_processes: parse_workers大于0时使用进程池（适合CPU密集的解析）
+        """
+        self.parse = parse
+        self.write = write
+        self.queue_size = queue_size
+        self.parse_workers = parse_workers
+        self.use_processes = use_processes
+        # 最近一次run的累计耗时（秒）；使用执行器时parse_time为写入阶段等待解析结果的时间
+        self.parse_time = 0.0
+        self.write_time = 0.0
+    
+    def run(self, source):
+        """运行流水线直到数据源耗尽，返回写入的项数"""
+        fetch_queue = queue.Queue(self.queue_size)
+        parse_queue = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        errors = []
+        self.parse_time = 0.0
+        self.write_time = 0.0
+        
+        executor = None
+        if self.parse_workers > 0:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            executor = executor_class(max_workers=self.parse_workers)
+        
+        def put(target, item):
+            # 队列满时阻塞（反压），其他阶段失败时放弃
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(source_queue):
+            while True:
+                try:
+                    return source_queue.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if stop.is_set():
+                        return _DONE
+        
+        def fetch_stage():
+            try:
+                for item in source:
+                    if not put(fetch_queue, item):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(fetch_queue, _DONE)
+        
+        def parse_stage():
+            try:
+                while True:
+                    item = get(fetch_queue)
+                    if item is _DONE:
+                        return
+                    # 使用执行器时放入future，写入阶段按顺序取结果，多页可以同时解析
+                    if executor:
+                        result = executor.submit(self.parse, item)
+                    else:
+                        started = time.perf_counter()
+                        result = self.parse(item)
+                        self.parse_time += time.perf_counter() - started
+                    if not put(parse_queue, result):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(parse_queue, _DONE)
+        
+        threads = [
+            threading.Thread(target=fetch_stage, name='ingest-fetch', daemon=True),
+            threading.Thread(target=parse_stage, name='ingest-parse', daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        written = 0
+        try:
+            while True:
+                item = get(parse_queue)
+                if item is _DONE:
+                    break
+                if executor:
+                    started = time.perf_counter()
+                    item = item.result()
+                    self.parse_time += time.perf_counter() - started
+                started = time.perf_counter()
+                self.write(item)
+                self.write_time += time.perf_counter() - started
+                written += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            close = getattr(source, 'close', None)
+            if close:
+                close()
+        
+        if errors:
+            raise errors[0]
+        return written
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from app import db
+
+class SyncJob(db.Model):
+    """后台同步任务队列
+    
+    Web请求只插入一条queued任务并立即返回任务ID，由后台任务执行器领取执行，
+    执行过程中更新进度，页面通过状态接口轮询。
+    """
+    __tablename__ = 'sync_jobs'
+    __table_args__ = (
+        db.Index('ix_sync_jobs_status_id', 'status', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(20), nullable=False)  # 'nvd_sync' 或 'cisa_sync'
+    params = db.Column(db.Text)  # 任务参数（JSON）
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued/running/success/failed
+    progress_current = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(255))
+    result = db.Column(db.Text)  # 执行结果（JSON）
+    error = db.Column(db.String(500))
+    worker = db.Column(db.String(100))  # 执行任务的进程（主机名:PID）
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        percent = None
+        if self.status == 'success':
+            percent = 100
+        elif self.progress_total:
+            percent = min(100, round(self.progress_current * 100 / self.progress_total))
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'params': json.loads(self.params) if self.params else {},
+            'status': self.status,
+            'progress_current': self.progress_current,
+            'progress_total': self.progress_total,
+            'percent': percent,
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'worker': self.worker,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S') if self.started_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncJob {self.id} - {self.job_type} {self.status}>'
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify, request
+from .service import JobService
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+@jobs_bp.route('/<int:job_id>')
+def job_status(job_id):
+    """返回任务状态和进度"""
+    job = JobService.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+@jobs_bp.route('/')
+def job_list():
+    """返回最近的任务"""
+    limit = request.args.get('limit', 20, type=int)
+    job_type = request.args.get('job_type', '')
+    return jsonify([job.to_dict() for job in JobService.list_jobs(limit=limit, job_type=job_type or None)])
@@ -0,0 +1,70 @@
+import threading
+import time
+from app.jobs.service import JobService, worker_name
+
+# 队列为空时的轮询间隔（秒）
+JOB_POLL_INTERVAL = 2
+
+# 检查超时任务的间隔（秒）
+STALE_CHECK_INTERVAL = 60
+
+class JobRunner:
+    """后台任务执行器：轮询sync_jobs表，逐个领取并执行任务
+    
+    多个进程可以同时运行执行器，领取任务时的条件更新保证每个任务只执行一次。
+    """
+    
+    def __init__(self, app, poll_interval=JOB_POLL_INTERVAL):
+        self.app = app
+        self.poll_interval = poll_interval
+        self.worker = worker_name()
+        self._stop = threading.Event()
+        self._last_stale_check = 0
+    
+    def run_once(self):
+        """领取并执行一个任务，没有任务时返回False"""
+        with self.app.app_context():
+            if time.monotonic() - self._last_stale_check > STALE_CHECK_INTERVAL:
+                self._last_stale_check = time.monotonic()
+                stale_count = JobService.fail_stale()
+                if stale_count:
+                    print(f"已将 {stale_count} 个无响应的任务标记为失败")
+            
+            job = JobService.claim_next(self.worker)
+            if job is None:
+                return False
+            print(f"开始执行任务 {job.id}（{job.job_type}）")
+            JobService.run(job)
+            print(f"任务 {job.id} 执行结束")
+            return True
+    
+    def run_forever(self):
+        """持续执行任务直到stop()被调用"""
+        print(f"任务执行器已启动: {self.worker}")
+        # 本机上次被强制终止的执行进程留下的running任务
+        try:
+            with self.app.app_context():
+                orphaned_count = JobService.fail_orphaned()
+            if orphaned_count:
+                print(f"已将 {orphaned_count} 个执行进程已退出的任务标记为失败")
+        except Exception as e:
+            print(f"检查遗留任务时出错: {str(e)}")
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                print(f"任务执行器出错: {str(e)}")
+            self._stop.wait(self.poll_interval)
+    
+    def start(self):
+        """在后台线程中运行，返回自身"""
+        threading.Thread(target=self.run_forever, name='job-runner', daemon=True).start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    @property
+    def stopping(self):
+        return self._stop.is_set()
@@ -0,0 +1,217 @@
+import importlib
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.jobs.models import SyncJob
+
+# 任务类型对应的执行函数（模块路径:函数名），按需导入以避免循环引用
+# 执行函数签名: handler(params, progress)，返回可JSON序列化的结果，失败时抛出异常；
+# progress(current=None, total=None, message=None)用于报告进度
+JOB_HANDLERS = {
+    'nvd_sync': 'app.nvd.service:run_sync_job',
+    'cisa_sync': 'app.cisa.service:run_sync_job'
+}
+
+# 执行任务期间更新updated_at的间隔（秒），长时间没有进度的任务也不会被误判为无响应
+JOB_HEARTBEAT_SECONDS = 60
+
+# 运行中的任务超过该时间没有更新时视为执行进程已退出
+JOB_STALE_SECONDS = 10 * 60
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+def worker_name():
+    """当前进程的标识（主机名:PID）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class JobService:
+    """同步任务队列，所有方法需要在应用上下文中调用"""
+    
+    @staticmethod
+    def enqueue(job_type, params=None):
+        """提交任务，返回SyncJob
+        
+        已有相同类型和参数的任务在排队或运行时直接返回该任务，重复点击同步按钮不会重复执行。
+        """
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"未知的任务类型: {job_type}")
+        params_json = json.dumps(params or {}, sort_keys=True)
+        
+        existing = SyncJob.query.filter(
+            SyncJob.job_type == job_type,
+            SyncJob.params == params_json,
+            SyncJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(SyncJob.id).first()
+        if existing:
+            return existing
+        
+        job = SyncJob(job_type=job_type, params=params_json, status='queued', message='等待执行')
+        db.session.add(job)
+        db.session.commit()
+        return job
+    
+    @staticmethod
+    def get(job_id):
+        return SyncJob.query.get(job_id)
+    
+    @staticmethod
+    def list_jobs(limit=20, job_type=None):
+        query = SyncJob.query
+        if job_type:
+            query = query.filter_by(job_type=job_type)
+        return query.order_by(SyncJob.id.desc()).limit(limit).all()
+    
+    @staticmethod
+    def claim_next(worker=None):
+        """领取最早排队的任务并标记为running，没有任务时返回None
+        
+        用带状态条件的UPDATE抢占任务，多个执行进程同时领取时只有一个能成功。
+        """
+        worker = worker or worker_name()
+        while True:
+            job = SyncJob.query.filter_by(status='queued').order_by(SyncJob.id).first()
+            if job is None:
+                db.session.rollback()
+                return None
+            now = datetime.utcnow()
+            claimed = SyncJob.query.filter_by(id=job.id, status='queued').update(
+                {'status': 'running', 'worker': worker, 'started_at': now, 'updated_at': now,
+                 'message': '正在执行'},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if claimed:
+                db.session.refresh(job)
+                return job
+    
+    @staticmethod
+    def update_progress(job_id, current=None, total=None, message=None):
+        values = {'updated_at': datetime.utcnow()}
+        if current is not None:
+            values['progress_current'] = current
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message[:255]
+        SyncJob.query.filter_by(id=job_id).update(values, synchronize_session=False)
+        db.session.commit()
+    
+    @staticmethod
+    def finish(job_id, result=None, error=None):
+        """把任务标记为success或failed"""
+        now = datetime.utcnow()
+        values = {
+            'status': 'failed' if error else 'success',
+            'finished_at': now,
+            'updated_at': now,
+            'result': json.dumps(result) if result is not None else None,
+            'error': str(error)[:500] if error else None,
+            'message': '执行失败' if error else '执行完成'
+        }
+        SyncJob.query.filter_by(id=job_id).update(values, synchronize_session=False)
+        db.session.commit()
+    
+    @staticmethod
+    def fail_stale(max_age=JOB_STALE_SECONDS):
+        """把长时间没有更新的running任务标记为失败，返回处理的任务数"""
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+        count = SyncJob.query.filter(SyncJob.status == 'running', SyncJob.updated_at < cutoff).update(
+            {'status': 'failed', 'finished_at': datetime.utcnow(), 'error': '执行进程长时间无响应',
+             'message': '执行失败'},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def requeue(job_id, message='执行进程退出，等待重新执行'):
+        """把running任务放回队列，由其他执行进程（或重启后的进程）重新执行"""
+        SyncJob.query.filter_by(id=job_id, status='running').update(
+            {'status': 'queued', 'worker': None, 'started_at': None, 'updated_at': datetime.utcnow(),
+             'message': message},
+            synchronize_session=False
+        )
+        db.session.commit()
+    
+    @staticmethod
+    def fail_orphaned(host=None):
+        """把本机上执行进程已不存在的running任务标记为失败，返回处理的任务数
+        
+        执行进程被强制终止（kill -9）时任务停留在running状态，相同参数的任务无法重新提交；
+        执行器启动时调用，不必等到超时。
+        """
+        host = host or socket.gethostname()
+        jobs = SyncJob.query.filter(SyncJob.status == 'running', SyncJob.worker.like(f"{host}:%")).all()
+        orphaned = [job.id for job in jobs if not _process_alive(job.worker.rsplit(':', 1)[1])]
+        if not orphaned:
+            db.session.rollback()
+            return 0
+        count = SyncJob.query.filter(SyncJob.id.in_(orphaned), SyncJob.status == 'running').update(
+            {'status': 'failed', 'finished_at': datetime.utcnow(), 'error': '执行进程已退出',
+             'message': '执行失败'},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def run(job):
+        """执行一个已领取的任务，记录结果或错误
+        
+        执行期间后台线程定时更新updated_at；执行进程被中断（SystemExit/KeyboardInterrupt）时
+        把任务放回队列后继续退出。
+        """
+        module_name, func_name = JOB_HANDLERS[job.job_type].split(':')
+        handler = getattr(importlib.import_module(module_name), func_name)
+        params = json.loads(job.params) if job.params else {}
+        job_id = job.id
+        
+        def progress(current=None, total=None, message=None):
+            JobService.update_progress(job_id, current, total, message)
+        
+        stop_heartbeat = _start_heartbeat(current_app._get_current_object(), job_id)
+        try:
+            result = handler(params, progress)
+        except Exception as e:
+            db.session.rollback()
+            print(f"任务 {job_id}（{job.job_type}）执行失败: {str(e)}")
+            JobService.finish(job_id, error=e)
+            return False
+        except BaseException:
+            db.session.rollback()
+            print(f"任务 {job_id}（{job.job_type}）被中断，已放回队列")
+            JobService.requeue(job_id)
+            raise
+        finally:
+            stop_heartbeat.set()
+        JobService.finish(job_id, result=result)
+        return True
+
+def _process_alive(pid):
+    """本机上的进程是否存在"""
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+def _start_heartbeat(app, job_id):
+    """在后台线程中定时更新任务的updated_at，返回用于停止的Event"""
+    stop = threading.Event()
+    
+    def beat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                with app.app_context():
+                    JobService.update_progress(job_id)
+            except Exception as e:
+                print(f"更新任务 {job_id} 心跳时出错: {str(e)}")
+    
+    threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True).start()
+    return stop
@@ -0,0 +1,179 @@
+"""基于MySQL命名锁（GET_LOCK）的定时任务主节点选举
+
+可以同时运行多个后台进程（worker.py），每个进程都会启动调度线程。每个调度器在独立的数据库连接上
+持有一把按数据库名区分的命名锁，只有持锁的进程执行定时任务和启动同步，其余进程跳过。
+命名锁随连接存在：主节点进程退出或连接断开后锁自动释放，其他进程在下一次检查时接管。
+锁连接由不使用连接池的独立引擎创建，不占用Flask-SQLAlchemy连接池中的连接。
+非MySQL数据库（本地开发用的SQLite等）只有单个进程，始终视为主节点。
+
+主节点在执行长时间的同步期间也可能失去锁（连接断开），这时新的主节点会开始同样的同步。
+leader_only包装的任务在执行期间调用check_leader()（同步每写入一页时调用），
+失去锁后抛出LeadershipLost，当前同步按出错处理并停止。
+"""
+import functools
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from app import db
+
+# 非主节点重新尝试获取锁、主节点检查锁是否仍然持有的间隔（秒）
+LEADER_CHECK_INTERVAL = 30
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+# 当前线程中正在执行的leader_only任务所属的锁
+_current = threading.local()
+
+class LeadershipLost(Exception):
+    """执行定时任务期间失去了主节点锁"""
+
+class LeaderLock:
+    """一个定时任务组的主节点锁"""
+    
+    def __init__(self, app, name, check_interval=LEADER_CHECK_INTERVAL):
+        """
+        参数:
+            app: Flask应用实例，用于获取数据库引擎
+            name: 任务组名称，如'nvd-scheduler'
+            check_interval: 获取/检查锁的间隔（秒）
+        """
+        with app.app_context():
+            url = db.engine.url
+        # 锁连接长期持有，使用不带连接池的独立引擎，断开时锁随连接一起释放
+        self.engine = create_engine(url, poolclass=NullPool)
+        database = self.engine.url.database or ''
+        # MySQL命名锁在整个实例内共享，加上数据库名避免不同库的部署互相影响（名称最长64个字符）
+        self.name = f"{database}.{name}"[:64]
+        self.check_interval = check_interval
+        self.enabled = self.engine.dialect.name == 'mysql'
+        self._connection = None
+        self._lock = threading.Lock()  # 保护_connection
+        self._refresh_lock = threading.Lock()  # 串行化使用锁连接的数据库操作
+        self._thread = None
+    
+    def start(self):
+        """立即尝试获取一次锁，然后在后台线程中定期重试/检查，返回自身"""
+        if not self.enabled:
+            return self
+        self._refresh()
+        self._thread = threading.Thread(target=self._run, name=f'leader-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+    
+    def is_leader(self):
+        """当前进程是否持有锁"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            return self._connection is not None
+    
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            self._refresh()
+    
+    def _refresh(self):
+        """未持有锁时尝试获取；已持有时确认连接仍然有效且锁仍属于该连接
+        
+        连接数据库和查询锁都不持有self._lock，数据库连接缓慢或无响应时is_leader()和check_leader()
+        不会被阻塞，只在更新连接状态时加锁。_refresh_lock保证同一时间只有一个线程使用锁连接。
+        """
+        with self._refresh_lock:
+            with self._lock:
+                connection = self._connection
+            if connection is not None:
+                try:
+                    owner = connection.execute(
+                        text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {'name': self.name}).scalar()
+                    connection.commit()
+                    if owner == 1:
+                        return
+                except Exception as e:
+                    print(f"检查主节点锁 {self.name} 失败: {str(e)}")
+                print(f"已失去主节点锁 {self.name}")
+                with self._lock:
+                    self._connection = None
+                _close(connection)
+            
+            try:
+                connection = self.engine.connect()
+            except Exception as e:
+                print(f"获取主节点锁 {self.name} 时连接数据库失败: {str(e)}")
+                return
+            try:
+                # 超时为0：锁被其他进程持有时立即返回0
+                acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {'name': self.name}).scalar()
+                connection.commit()
+            except Exception as e:
+                print(f"获取主节点锁 {self.name} 失败: {str(e)}")
+                acquired = None
+            if acquired == 1:
+                with self._lock:
+                    self._connection = connection
+                print(f"当前进程成为 {self.name} 的主节点")
+            else:
+                _close(connection)
+    
+    def release(self):
+        """主动释放锁（进程正常退出时调用）"""
+        with self._refresh_lock:
+            with self._lock:
+                connection = self._connection
+                self._connection = None
+            if connection is None:
+                return
+            try:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': self.name})
+            except Exception:
+                pass
+            _close(connection)
+
+def _close(connection):
+    # 独立引擎不使用连接池，关闭连接即断开，锁随连接释放
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+def get_leader_lock(app, name):
+    """返回进程内按名称共享的主节点锁，首次调用时创建并开始选举"""
+    with _locks_lock:
+        lock = _locks.get(name)
+        if lock is None:
+            lock = LeaderLock(app, name).start()
+            _locks[name] = lock
+        return lock
+
+def leader_only(lock, func):
+    """包装定时任务：只在持有lock的进程中执行，其他进程跳过并返回None
+    
+    任务执行期间可以调用check_leader()确认仍然持有lock。
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not lock.is_leader():
+            print(f"当前进程不是 {lock.name} 的主节点，跳过 {func.__name__}")
+            return None
+        _current.lock = lock
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.lock = None
+    return wrapper
+
+def check_leader():
+    """在leader_only包装的任务中确认当前进程仍是主节点，已失去锁时抛出LeadershipLost
+    
+    不在leader_only任务中（页面提交的同步任务、命令行脚本）调用时不做检查。
+    """
+    lock = getattr(_current, 'lock', None)
+    if lock is not None and not lock.is_leader():
+        raise LeadershipLost(f"已失去主节点锁 {lock.name}，停止当前同步")
+
+def release_all():
+    """释放本进程持有的所有主节点锁，后台进程退出前调用，其他进程可以立即接管"""
+    with _locks_lock:
+        for lock in _locks.values():
+            lock.release()
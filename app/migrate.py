@@ -0,0 +1,71 @@
+"""数据库结构迁移
+
+创建缺失的表，并为已有的表补充后来新增的列。原先create_app()每次启动都连接数据库检查表结构，
+现在作为部署/启动前的独立步骤执行（python migrate.py），Web进程、后台进程和命令行脚本启动时不再访问数据库。
+迁移可以重复执行，已存在的表和列会被跳过。
+"""
+from sqlalchemy import inspect, text
+from app import db
+
+# 已有表上后来新增的列：(表名, 列名, 列定义)
+ADDED_COLUMNS = [
+    ('cisalog', 'sync_type', "VARCHAR(20) NOT NULL DEFAULT 'manual'"),
+    ('nvd', 'content_hash', 'VARCHAR(40) DEFAULT NULL'),
+    ('nvd', 'child_hash', 'VARCHAR(40) DEFAULT NULL'),
+    ('cisa', 'content_hash', 'VARCHAR(40) DEFAULT NULL'),
+]
+
+# 已有表上后来加宽的列：(表名, 列名, 新长度, 列定义)
+WIDENED_COLUMNS = [
+    ('nvd_cpe', 'vendor', 255, 'VARCHAR(255) NOT NULL'),
+    ('nvd_cpe', 'product', 255, 'VARCHAR(255) NOT NULL'),
+    ('nvd_cpe', 'version', 255, 'VARCHAR(255) NULL'),
+    ('nvd_cpe', 'version_start_including', 255, 'VARCHAR(255) NULL'),
+    ('nvd_cpe', 'version_start_excluding', 255, 'VARCHAR(255) NULL'),
+    ('nvd_cpe', 'version_end_including', 255, 'VARCHAR(255) NULL'),
+    ('nvd_cpe', 'version_end_excluding', 255, 'VARCHAR(255) NULL'),
+]
+
+def import_models():
+    """导入所有模型，使db.metadata包含全部表"""
+    from app.cisa.models import CisaData, CisaLog
+    from app.nvd.models import NvdData, SyncLog, SyncWatermark, SyncCheckpoint, NvdCpeMatch, NvdCvssMetric, SyncRun
+    from app.jobs.models import SyncJob
+
+def migrate(app):
+    """执行迁移，返回已执行的变更说明列表"""
+    changes = []
+    with app.app_context():
+        import_models()
+        inspector = inspect(db.engine)
+        existing = set(inspector.get_table_names())
+        
+        # 创建缺失的表
+        missing = [table for table in db.metadata.sorted_tables if table.name not in existing]
+        if missing:
+            db.metadata.create_all(db.engine, tables=missing)
+            for table in missing:
+                changes.append(f"创建表 {table.name}")
+        
+        # 补充新增的列（刚创建的表已经包含这些列）
+        for table, column, definition in ADDED_COLUMNS:
+            if table not in existing:
+                continue
+            columns = {c['name'] for c in inspector.get_columns(table)}
+            if column in columns:
+                continue
+            with db.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+            changes.append(f"添加列 {table}.{column}")
+        
+        # 加宽长度不足的列
+        for table, column, length, definition in WIDENED_COLUMNS:
+            if table not in existing:
+                continue
+            current = {c['name']: c['type'] for c in inspector.get_columns(table)}.get(column)
+            if current is None or (getattr(current, 'length', None) or length) >= length:
+                continue
+            with db.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} MODIFY COLUMN {column} {definition}"))
+            changes.append(f"加宽列 {table}.{column} 到 {length}")
+    return changes
@@ -0,0 +1,179 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from app.nvd.client import NvdClient
+from app.nvd.checkpoint import DbCheckpoint, FileCheckpoint, checkpoint_key
+from app.nvd.service import NvdService, DOWNLOAD_DIR, extract_api_page
+from app.nvd.extractor import TSV_FIELDNAMES, extract_record, to_tsv_row
+from app.ingest.pipeline import IngestPipeline
+
+# 默认并发窗口数，实际请求速率仍受共享限速器约束
+DEFAULT_WORKERS = 4
+
+def _next_month(date):
+    """返回date所在月份的下一个月第一天"""
+    if date.month == 12:
+        return datetime(date.year + 1, 1, 1)
+    return datetime(date.year, date.month + 1, 1)
+
+def split_windows(start_date, end_date):
+    """把[start_date, end_date)按自然月切分为查询窗口
+    
+    每个窗口不超过31天，满足NVD API单次查询120天的限制。
+    
+    返回:
+        (窗口开始, 窗口结束, 'YYYYMM')列表
+    """
+    windows = []
+    current = start_date
+    while current < end_date:
+        window_end = min(_next_month(current), end_date)
+        windows.append((current, window_end, current.strftime('%Y%m')))
+        current = window_end
+    return windows
+
+class NvdBackfill:
+    """并发窗口化回填引擎
+    
+    把任意日期范围切分为月度窗口，多个窗口并发请求，所有请求共享同一个限速器，
+    整体耗时受NVD速率配额约束而不是串行的网络往返。每个窗口的结果写为YYYYMM.tsv，
+    或直接批量写入数据库。每页提交后记录检查点，中断后重新运行会从下一页继续。
+    """
+    
+    def __init__(self, output='tsv', output_dir=DOWNLOAD_DIR, max_workers=DEFAULT_WORKERS,
+                 app=None, tsv_row=None, skip_existing=True, client=None):
+        """
+        参数:
+            output: 'tsv'写出月度TSV文件，'db'直接写入nvd表
+            output_dir: TSV文件输出目录
+            max_workers: 并发窗口数
+            app: Flask应用实例，output为'db'时需要
+            tsv_row: 把API返回的单条漏洞转换为TSV行的函数，返回None表示跳过；
+                     默认使用extractor的抽取和格式
+            skip_existing: TSV文件已存在时跳过该月份
+            client: NvdClient实例，默认新建（共享进程内限速器）
+        """
+        if output not in ('tsv', 'db'):
+            raise ValueError(f"不支持的输出方式: {output}")
+        if output == 'db' and app is None:
+            raise ValueError("写入数据库需要提供Flask应用实例")
+        
+        self.output = output
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.app = app
+        self.tsv_row = tsv_row or NvdBackfill._default_tsv_row
+        self.skip_existing = skip_existing
+        self.client = client or NvdClient()
+    
+    @staticmethod
+    def _default_tsv_row(vuln):
+        record = extract_record(vuln)
+        return to_tsv_row(record) if record else None
+    
+    def run(self, start_date, end_date):
+        """执行回填，返回{'YYYYMM': 记录数}，失败的窗口记为-1"""
+        windows = split_windows(start_date, end_date)
+        print(f"开始回填NVD数据: {start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}，"
+              f"共{len(windows)}个窗口，并发数{self.max_workers}")
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._process_window, window_start, window_end, label): label
+                for window_start, window_end, label in windows
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    results[label] = future.result()
+                except Exception as e:
+                    print(f"窗口{label}回填失败: {str(e)}")
+                    results[label] = -1
+        
+        return dict(sorted(results.items()))
+    
+    def _process_window(self, window_start, window_end, label):
+        """回填单个窗口，返回处理的记录数"""
+        params = NvdService._build_query_params(window_start, window_end)
+        
+        if self.output == 'tsv':
+            return self._write_tsv(params, window_start, window_end, label)
+        
+        with self.app.app_context():
+            checkpoint = DbCheckpoint(checkpoint_key('backfill', 'pub', window_start, window_end),
+                                      window_start, window_end)
+            state = checkpoint.load()
+            start_index = state['next_start_index'] if state else 0
+            if start_index:
+                print(f"窗口{label}从断点startIndex={start_index}继续")
+            
+            count = 0
+            
+            def write_page(page):
+                nonlocal count
+                page_start, total_results, page_size, records, cpe_rows, cvss_rows = page
+                NvdService._upsert_records(records, cpe_rows, cvss_rows)
+                count += len(records)
+                checkpoint.save(page_start + page_size, total_results)
+            
+            # 本窗口内下载、解析、写入分阶段并行
+            IngestPipeline(parse=extract_api_page, write=write_page).run(
+                self.client.iter_pages(params, start_index))
+            
+            checkpoint.clear()
+            print(f"窗口{label}已写入数据库，共{count}条记录")
+            return count
+    
+    def _write_tsv(self, params, window_start, window_end, label):
+        """把窗口数据写入YYYYMM.tsv
+        
+        先写入.part临时文件，每页写完后在旁边的检查点文件中记录下一页的startIndex和已写入的字节数；
+        中断后重新运行时截断未完整写入的内容并从下一页继续，完成后再重命名为正式文件。
+        """
+        file_path = os.path.join(self.output_dir, f"{label}.tsv")
+        if self.skip_existing and os.path.exists(file_path):
+            print(f"文件{label}.tsv已存在，跳过下载")
+            return 0
+        
+        part_path = file_path + '.part'
+        checkpoint = FileCheckpoint(part_path + '.checkpoint', window_start, window_end)
+        state = checkpoint.load() if os.path.exists(part_path) else None
+        
+        if state:
+            start_index = state['next_start_index']
+            count = state.get('count', 0)
+            # 丢弃最后一次检查点之后写入的不完整数据
+            with open(part_path, 'r+b') as f:
+                f.truncate(state['bytes'])
+            mode = 'a'
+            print(f"窗口{label}从断点startIndex={start_index}继续")
+        else:
+            start_index = 0
+            count = 0
+            mode = 'w'
+        
+        with open(part_path, mode, encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=TSV_FIELDNAMES, delimiter='\t')
+            if mode == 'w':
+                writer.writeheader()
+            for page_start, total_results, data in self.client.iter_pages(params, start_index):
+                vulnerabilities = data.get('vulnerabilities', [])
+                for vuln in vulnerabilities:
+                    row = self.tsv_row(vuln)
+                    if row:
+                        writer.writerow(row)
+                        count += 1
+                f.flush()
+                checkpoint.save(page_start + len(vulnerabilities), total_results,
+                                bytes=os.path.getsize(part_path), count=count)
+        
+        if count:
+            os.replace(part_path, file_path)
+            print(f"成功保存{label}.tsv，共{count}条记录")
+        else:
+            os.remove(part_path)
+            print(f"未获取到{label}的数据")
+        checkpoint.clear()
+        return count
@@ -0,0 +1,94 @@
+import json
+import os
+from app import db
+from app.nvd.models import SyncCheckpoint
+
+def checkpoint_key(prefix, date_field, window_start, window_end):
+    """根据窗口生成检查点键，同一窗口重新运行时得到相同的键"""
+    start = window_start.strftime('%Y%m%dT%H%M%S') if window_start else ''
+    end = window_end.strftime('%Y%m%dT%H%M%S') if window_end else ''
+    return f"{prefix}:{date_field}:{start}:{end}"
+
+class DbCheckpoint:
+    """保存在sync_checkpoints表中的检查点，用于数据写入数据库的同步
+    
+    每页数据提交后保存下一页的startIndex，需要在应用上下文中使用。
+    """
+    
+    def __init__(self, key, window_start=None, window_end=None):
+        self.key = key
+        self.window_start = window_start
+        self.window_end = window_end
+    
+    def load(self):
+        """返回{'next_start_index', 'total_results'}，没有检查点时返回None"""
+        checkpoint = SyncCheckpoint.query.filter_by(key=self.key).first()
+        if not checkpoint:
+            return None
+        return {
+            'next_start_index': checkpoint.next_start_index,
+            'total_results': checkpoint.total_results
+        }
+    
+    def save(self, next_start_index, total_results):
+        try:
+            checkpoint = SyncCheckpoint.query.filter_by(key=self.key).first()
+            if not checkpoint:
+                checkpoint = SyncCheckpoint(key=self.key, window_start=self.window_start,
+                                            window_end=self.window_end)
+                db.session.add(checkpoint)
+            checkpoint.next_start_index = next_start_index
+            checkpoint.total_results = total_results
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def clear(self):
+        """窗口完成后删除检查点"""
+        try:
+            SyncCheckpoint.query.filter_by(key=self.key).delete()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+class FileCheckpoint:
+    """与输出文件放在一起的JSON检查点，用于写TSV文件的回填
+    
+    除startIndex外还记录输出文件已提交的字节数，续传时截断未完整写入的部分。
+    """
+    
+    def __init__(self, path, window_start=None, window_end=None):
+        self.path = path
+        self.window_start = window_start
+        self.window_end = window_end
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取检查点文件{self.path}失败: {str(e)}")
+            return None
+    
+    def save(self, next_start_index, total_results, **extra):
+        state = {
+            'window_start': self.window_start.isoformat() if self.window_start else None,
+            'window_end': self.window_end.isoformat() if self.window_end else None,
+            'next_start_index': next_start_index,
+            'total_results': total_results
+        }
+        state.update(extra)
+        
+        # 先写临时文件再替换，避免中断时留下不完整的检查点
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+    
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,115 @@
+import os
+import time
+import requests
+from app.http_client import get_session
+from app.nvd.rate_limiter import backoff_delay, get_nvd_api_key, get_nvd_rate_limiter
+from app.nvd.page_cache import get_page_cache
+
+# NVD API地址，可通过环境变量指向其他服务
+NVD_API_URL = os.environ.get('NVD_API_URL', "https://services.nvd.nist.gov/rest/json/cves/2.0")
+NVD_HISTORY_API_URL = os.environ.get('NVD_HISTORY_API_URL', "https://services.nvd.nist.gov/rest/json/cvehistory/2.0")
+
+# 需要退避重试的HTTP状态码
+RETRY_STATUS_CODES = (429, 503)
+MAX_RETRIES = 6
+REQUEST_TIMEOUT = 60
+
+class NvdClient:
+    """NVD CVE API客户端，负责限速、退避重试和分页"""
+    
+    def __init__(self, api_key=None, api_url=None, rate_limiter=None, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, cache=None, session=None, metrics=None):
+        """
+        参数:
+            session: requests会话，默认使用进程内共享的'nvd'连接池；
+                     重试和限速由本类处理，共享会话不做传输层重试
+            cache: NvdPageCache实例，成功获取的每页原始响应都会写入缓存；
+                   默认根据环境变量NVD_PAGE_CACHE_DIR决定是否缓存
+            metrics: SyncMetrics实例，记录每页的HTTP耗时、响应字节数和重试次数
+        """
+        self.api_key = api_key if api_key is not None else get_nvd_api_key()
+        self.api_url = api_url or NVD_API_URL
+        self.rate_limiter = rate_limiter or get_nvd_rate_limiter(self.api_key)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache if cache is not None else get_page_cache()
+        self.session = session or get_session('nvd', retries=0)
+        self.metrics = metrics
+    
+    def _headers(self):
+        return {'apiKey': self.api_key} if self.api_key else {}
+    
+    @staticmethod
+    def _retry_after(response):
+        """读取Retry-After响应头（秒），没有或无法解析时返回None"""
+        value = response.headers.get('Retry-After')
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+    
+    def fetch_page(self, params):
+        """请求一页数据并返回解析后的JSON
+        
+        每次请求前从共享限速器获取配额；遇到429/503或网络错误时按指数退避加抖动重试，
+        429/503的退避会暂停共享同一限速器的所有请求。
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(self.api_url, params=params, headers=self._headers(),
+                                            timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                if self.metrics:
+                    self.metrics.record_retry(time.perf_counter() - started)
+                delay = backoff_delay(attempt)
+                print(f"  请求NVD API失败: {str(e)}，{delay:.1f}秒后重试")
+                attempt += 1
+                time.sleep(delay)
+                continue
+            
+            latency = time.perf_counter() - started
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                if self.metrics:
+                    self.metrics.record_retry(latency)
+                delay = self._retry_after(response) or backoff_delay(attempt)
+                print(f"  NVD API返回{response.status_code}，{delay:.1f}秒后重试")
+                self.rate_limiter.pause(delay)
+                attempt += 1
+                continue
+            
+            response.raise_for_status()
+            data = response.json()
+            if self.metrics:
+                self.metrics.record_page(latency, len(response.content))
+            
+            if self.cache:
+                try:
+                    self.cache.store(params, response.content, url=self.api_url)
+                except OSError as e:
+                    print(f"  写入NVD分页缓存失败: {str(e)}")
+            return data
+    
+    def iter_pages(self, params, start_index=0, items_key='vulnerabilities'):
+        """按startIndex分页请求，逐页返回(startIndex, totalResults, 数据)
+        
+        items_key为响应中结果列表的字段名，CVE接口为vulnerabilities，变更历史接口为cveChanges。
+        """
+        params = dict(params)
+        params['startIndex'] = start_index
+        total_results = None
+        
+        while total_results is None or params['startIndex'] < total_results:
+            data = self.fetch_page(params)
+            total_results = data.get('totalResults', 0)
+            items = data.get(items_key, [])
+            
+            yield params['startIndex'], total_results, data
+            
+            if not items:
+                break
+            params['startIndex'] += len(items)
@@ -0,0 +1,372 @@
+"""NVD CVE记录抽取
+
+NVD API 2.0 JSON（以及旧版1.x字段）到nvd表记录/TSV行的唯一转换实现，
+API同步、回填、缓存重放和TSV文件导入都通过这里生成记录，保证各入口得到相同的数据。
+"""
+from datetime import datetime
+from app.hashing import content_hash
+
+# TSV文件的列名
+TSV_FIELDNAMES = ['CVE ID', 'Published Date', 'Last Modified Date', 'Description',
+                  'Base Score', 'Base Severity', 'Vector String', 'Vendor', 'Product']
+
+# 按优先级选择的CVSS版本（nvd表只保存一条评分，v4.0仅在没有其他版本时使用）
+CVSS_METRIC_KEYS = ('cvssMetricV31', 'cvssMetricV30', 'cvssMetricV2', 'cvssMetricV40')
+
+# nvd_cvss表保存的全部CVSS版本: (API字段, 版本号)
+CVSS_VERSION_KEYS = (
+    ('cvssMetricV40', '4.0'),
+    ('cvssMetricV31', '3.1'),
+    ('cvssMetricV30', '3.0'),
+    ('cvssMetricV2', '2.0'),
+)
+
+# 严重程度序号，用于数值比较和排序
+SEVERITY_ORDINALS = {'NONE': 0, 'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'CRITICAL': 4}
+
+# 参与内容哈希的nvd表字段（日期使用完整的NVD时间，只要NVD修改过记录哈希就会变化）
+HASH_FIELDS = ('cve_id', 'published_date', 'last_modified_date', 'description', 'base_score',
+               'base_severity', 'vector_string', 'vendor', 'product')
+
+# CPE匹配中的版本范围字段: (API字段, nvd_cpe表列名)
+CPE_VERSION_RANGE_KEYS = (
+    ('versionStartIncluding', 'version_start_including'),
+    ('versionStartExcluding', 'version_start_excluding'),
+    ('versionEndIncluding', 'version_end_including'),
+    ('versionEndExcluding', 'version_end_excluding'),
+)
+
+# nvd_cpe表以及nvd表vendor/product列的长度，超长的CPE字段截断后保存，避免整页写入失败
+CPE_FIELD_MAX_LENGTH = 255
+
+# 替换可能导致MySQL编码问题的特殊字符
+_DESCRIPTION_TRANSLATION = str.maketrans({
+    '‑': '-',  # 非标准连字符
+    '–': '-',  # 长连字符
+    '—': '-',  # 破折号
+})
+
+_EMPTY = {}
+_EMPTY_LIST = []
+
+def parse_nvd_datetime(value):
+    """解析NVD时间字符串，如2024-05-01T00:15:06.890或带Z后缀的格式，也接受YYYY-MM-DD"""
+    if value[-1:] == 'Z':
+        value = value[:-1]
+    return datetime.fromisoformat(value)
+
+def format_nvd_datetime(value):
+    """把时间格式化为TSV归档中使用的NVD格式（毫秒精度）"""
+    return value.isoformat(timespec='milliseconds')
+
+def split_cpe(cpe_uri, maxsplit=-1):
+    """按冒号拆分CPE 2.3字符串，反斜杠转义的冒号（\\:）属于字段内容，不作为分隔符"""
+    if '\\' not in cpe_uri:
+        return cpe_uri.split(':', maxsplit)
+    parts = []
+    current = []
+    chars = iter(cpe_uri)
+    for char in chars:
+        if char == '\\':
+            current.append(char)
+            current.append(next(chars, ''))
+        elif char == ':' and (maxsplit < 0 or len(parts) < maxsplit):
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+def _truncate(value):
+    return value[:CPE_FIELD_MAX_LENGTH] if value else value
+
+def _split_cpe(cpe_uri):
+    """从CPE 2.3字符串中取出(vendor, product)"""
+    parts = split_cpe(cpe_uri, 5)
+    if len(parts) >= 5:
+        return _truncate(parts[3]), _truncate(parts[4])
+    return '', ''
+
+def _first_cpe(configurations):
+    """取第一个配置节点中的第一个CPE，兼容API 2.0的cpeMatch/criteria和1.x的cpes/cpe23Uri"""
+    if not configurations:
+        return '', ''
+    nodes = configurations[0].get('nodes')
+    if not nodes:
+        return '', ''
+    node = nodes[0]
+    matches = node.get('cpeMatch')
+    if matches:
+        cpe_uri = matches[0].get('criteria', '')
+    else:
+        matches = node.get('cpes')
+        if not matches:
+            return '', ''
+        cpe_uri = matches[0].get('cpe23Uri', '')
+    return _split_cpe(cpe_uri) if cpe_uri else ('', '')
+
+def _primary_cvss(metrics):
+    """按v3.1、v3.0、v2、v4.0的顺序取第一条CVSS评分，返回(分数, 严重程度, 向量)"""
+    for key in CVSS_METRIC_KEYS:
+        entries = metrics.get(key)
+        if entries:
+            metric = entries[0]
+            cvss_data = metric.get('cvssData', _EMPTY)
+            # v2的baseSeverity在指标层而不在cvssData中
+            severity = cvss_data.get('baseSeverity') or metric.get('baseSeverity', '')
+            return cvss_data.get('baseScore'), severity, cvss_data.get('vectorString', '')
+    return None, '', ''
+
+def _severity_from_score(base_score, version):
+    """缺少严重程度时按CVSS规范由分数推算"""
+    if base_score is None:
+        return ''
+    if version == '2.0':
+        return 'LOW' if base_score < 4.0 else 'MEDIUM' if base_score < 7.0 else 'HIGH'
+    if base_score == 0:
+        return 'NONE'
+    if base_score < 4.0:
+        return 'LOW'
+    if base_score < 7.0:
+        return 'MEDIUM'
+    return 'HIGH' if base_score < 9.0 else 'CRITICAL'
+
+def extract_record(vuln):
+    """把API返回的单条漏洞（{"cve": {...}}或cve对象本身）转换为记录字典
+    
+    缺少ID或日期时返回None。
+    """
+    cve = vuln.get('cve', vuln)
+    cve_id = cve.get('id')
+    published = cve.get('published')
+    last_modified = cve.get('lastModified')
+    if not cve_id or not published or not last_modified:
+        return None
+    
+    descriptions = cve.get('descriptions')
+    description = descriptions[0].get('value', '') if descriptions else ''
+    
+    base_score, base_severity, vector_string = _primary_cvss(cve.get('metrics') or _EMPTY)
+    vendor, product = _first_cpe(cve.get('configurations') or _EMPTY_LIST)
+    
+    return {
+        'cve_id': cve_id,
+        'published_date': parse_nvd_datetime(published),
+        'last_modified_date': parse_nvd_datetime(last_modified),
+        'description': description.translate(_DESCRIPTION_TRANSLATION),
+        'base_score': base_score,
+        'base_severity': base_severity,
+        'vector_string': vector_string,
+        'vendor': vendor,
+        'product': product
+    }
+
+def record_hash(record):
+    """计算记录的内容哈希（只包含nvd表的列），需要在日期转换为DATE之前调用
+    
+    API同步和TSV导入对同一条记录得到相同的哈希，重新导入时内容未变化的记录不会被改写。
+    """
+    return content_hash(record.get(field) for field in HASH_FIELDS)
+
+def child_hash(child_rows):
+    """计算一条CVE的nvd_cpe/nvd_cvss行的内容哈希，用于判断是否需要重写子表"""
+    return content_hash(sorted(row.items()) for row in child_rows)
+
+def extract_records(vulnerabilities):
+    """批量抽取一页漏洞数据，跳过无效记录"""
+    records = []
+    append = records.append
+    for vuln in vulnerabilities:
+        record = extract_record(vuln)
+        if record is not None:
+            append(record)
+    return records
+
+def _iter_cpe_matches(nodes):
+    """遍历配置节点中的全部CPE匹配，兼容API 2.0的cpeMatch和1.x的cpe_match/cpes及嵌套children"""
+    for node in nodes:
+        matches = node.get('cpeMatch') or node.get('cpe_match') or node.get('cpes')
+        if matches:
+            yield from matches
+        children = node.get('children')
+        if children:
+            yield from _iter_cpe_matches(children)
+
+def extract_cpe_matches(vuln):
+    """抽取单条漏洞configurations中的全部CPE匹配，返回nvd_cpe表行字典列表（已去重）"""
+    cve = vuln.get('cve', vuln)
+    cve_id = cve.get('id')
+    if not cve_id:
+        return []
+    
+    rows = []
+    seen = set()
+    for configuration in cve.get('configurations') or _EMPTY_LIST:
+        for match in _iter_cpe_matches(configuration.get('nodes') or _EMPTY_LIST):
+            cpe_uri = match.get('criteria') or match.get('cpe23Uri')
+            if not cpe_uri:
+                continue
+            parts = split_cpe(cpe_uri, 6)
+            if len(parts) < 5 or not parts[3] or not parts[4]:
+                continue
+            
+            row = {
+                'cve_id': cve_id,
+                'part': parts[2][:1],
+                'vendor': _truncate(parts[3]),
+                'product': _truncate(parts[4]),
+                'version': _truncate(parts[5]) if len(parts) > 5 else '',
+                'vulnerable': bool(match.get('vulnerable', True))
+            }
+            for api_key, column in CPE_VERSION_RANGE_KEYS:
+                row[column] = _truncate(match.get(api_key))
+            
+            # 同一CPE可能出现在多个配置中
+            key = tuple(row.values())
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+    return rows
+
+def extract_cpe_rows(vulnerabilities):
+    """批量抽取一页漏洞数据的CPE匹配，只包含extract_record认为有效的记录"""
+    rows = []
+    for vuln in vulnerabilities:
+        cve = vuln.get('cve', vuln)
+        if cve.get('published') and cve.get('lastModified'):
+            rows.extend(extract_cpe_matches(cve))
+    return rows
+
+def extract_cvss_metrics(vuln):
+    """抽取单条漏洞的全部CVSS评分（所有版本和来源），返回nvd_cvss表行字典列表"""
+    cve = vuln.get('cve', vuln)
+    cve_id = cve.get('id')
+    published = cve.get('published')
+    metrics = cve.get('metrics')
+    if not cve_id or not published or not metrics:
+        return []
+    
+    published_date = parse_nvd_datetime(published).date()
+    rows = []
+    for key, default_version in CVSS_VERSION_KEYS:
+        for metric in metrics.get(key) or _EMPTY_LIST:
+            cvss_data = metric.get('cvssData', _EMPTY)
+            version = cvss_data.get('version') or default_version
+            base_score = cvss_data.get('baseScore')
+            # v2的baseSeverity在指标层而不在cvssData中
+            severity = (cvss_data.get('baseSeverity') or metric.get('baseSeverity')
+                        or _severity_from_score(base_score, version)).upper()
+            rows.append({
+                'cve_id': cve_id,
+                'version': version,
+                'source': metric.get('source'),
+                'type': metric.get('type'),
+                'base_score': base_score,
+                'base_severity': severity,
+                'severity_ordinal': SEVERITY_ORDINALS.get(severity),
+                'vector_string': cvss_data.get('vectorString', ''),
+                'exploitability_score': metric.get('exploitabilityScore'),
+                'impact_score': metric.get('impactScore'),
+                'published_date': published_date
+            })
+    return rows
+
+def extract_cvss_rows(vulnerabilities):
+    """批量抽取一页漏洞数据的CVSS评分，只包含extract_record认为有效的记录"""
+    rows = []
+    for vuln in vulnerabilities:
+        cve = vuln.get('cve', vuln)
+        if cve.get('lastModified'):
+            rows.extend(extract_cvss_metrics(cve))
+    return rows
+
+def extract_page(vulnerabilities):
+    """抽取一页漏洞数据写入数据库所需的全部内容，返回(nvd记录, CPE匹配行, CVSS评分行)"""
+    return (extract_records(vulnerabilities), extract_cpe_rows(vulnerabilities),
+            extract_cvss_rows(vulnerabilities))
+
+def to_tsv_row(record):
+    """把记录转换为TSV行字典（键为TSV_FIELDNAMES）"""
+    base_score = record.get('base_score')
+    return {
+        'CVE ID': record['cve_id'],
+        'Published Date': format_nvd_datetime(record['published_date']),
+        'Last Modified Date': format_nvd_datetime(record['last_modified_date']),
+        'Description': record.get('description', ''),
+        'Base Score': base_score if base_score is not None else '',
+        'Base Severity': record.get('base_severity', ''),
+        'Vector String': record.get('vector_string', ''),
+        'Vendor': record.get('vendor', ''),
+        'Product': record.get('product', '')
+    }
+
+def record_from_tsv_fields(fields):
+    """把TSV文件中的一行（已按制表符拆分的字段列表）转换为记录字典
+    
+    兼容完整的9列格式和只有前4列的旧格式，日期可以是YYYY-MM-DD或NVD时间格式。
+    缺少ID或日期时返回None。
+    """
+    if len(fields) < 4:
+        return None
+    cve_id = fields[0].strip()
+    published = fields[1].strip()
+    last_modified = fields[2].strip()
+    if not cve_id or not published or not last_modified:
+        return None
+    
+    # 旧格式缺少的列补空
+    if len(fields) < 9:
+        fields = list(fields) + [''] * (9 - len(fields))
+    base_score = fields[4].strip()
+    
+    return {
+        'cve_id': cve_id,
+        'published_date': parse_nvd_datetime(published),
+        'last_modified_date': parse_nvd_datetime(last_modified),
+        'description': fields[3].strip().translate(_DESCRIPTION_TRANSLATION),
+        'base_score': float(base_score) if base_score else None,
+        'base_severity': fields[5].strip(),
+        'vector_string': fields[6].strip(),
+        'vendor': fields[7].strip(),
+        'product': fields[8].strip()
+    }
+
+def to_nvd_vulnerability(record):
+    """把记录还原为NVD API 2.0格式的漏洞对象，用于性能测试语料和本地模拟服务"""
+    cve = {
+        'id': record['cve_id'],
+        'published': format_nvd_datetime(record['published_date']),
+        'lastModified': format_nvd_datetime(record['last_modified_date']),
+        'descriptions': [{'lang': 'en', 'value': record.get('description', '')}],
+        'metrics': {},
+        'configurations': []
+    }
+    
+    vector_string = record.get('vector_string') or ''
+    if record.get('base_score') is not None:
+        cvss_data = {
+            'baseScore': record['base_score'],
+            'vectorString': vector_string
+        }
+        if vector_string.startswith('CVSS:4'):
+            metric_key = 'cvssMetricV40'
+        elif vector_string.startswith('CVSS:3.0'):
+            metric_key = 'cvssMetricV30'
+        elif vector_string.startswith('CVSS:3'):
+            metric_key = 'cvssMetricV31'
+        else:
+            metric_key = 'cvssMetricV2'
+        metric = {'source': 'nvd@nist.gov', 'type': 'Primary', 'cvssData': cvss_data}
+        if metric_key == 'cvssMetricV2':
+            metric['baseSeverity'] = record.get('base_severity', '')
+        else:
+            cvss_data['baseSeverity'] = record.get('base_severity', '')
+        cve['metrics'][metric_key] = [metric]
+    
+    if record.get('vendor') or record.get('product'):
+        criteria = f"cpe:2.3:a:{record.get('vendor', '')}:{record.get('product', '')}:*:*:*:*:*:*:*:*"
+        cve['configurations'] = [{'nodes': [{'operator': 'OR', 'negate': False,
+                                             'cpeMatch': [{'vulnerable': True, 'criteria': criteria}]}]}]
+    
+    return {'cve': cve}
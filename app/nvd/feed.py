@@ -0,0 +1,122 @@
+"""NVD JSON 2.0数据源文件（nvdcve-2.0-*.json[.gz]）的流式读取
+
+数据源文件的结构与API响应相同（顶层的vulnerabilities数组），单个年度文件解压后可达数百MB。
+这里按块读取文件，用json.JSONDecoder.raw_decode逐个解析数组元素，内存占用只与单条记录和读取块大小有关。
+"""
+import gzip
+import json
+import os
+
+# 每次从文件读取的字符数
+READ_CHUNK_SIZE = 1 << 20
+
+# 每页交给解析阶段的漏洞条数，与API分页大小一致
+FEED_PAGE_SIZE = 2000
+
+FEED_SUFFIXES = ('.json', '.json.gz')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_WHITESPACE = ' \t\r\n'
+
+def open_feed(file_path):
+    """以文本方式打开数据源文件，按内容自动识别gzip压缩"""
+    with open(file_path, 'rb') as f:
+        magic = f.read(2)
+    if magic == _GZIP_MAGIC:
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+def iter_feed_files(path):
+    """返回path下按文件名排序的数据源文件；path为文件时直接返回该文件"""
+    if os.path.isfile(path):
+        return [path]
+    return [os.path.join(path, name) for name in sorted(os.listdir(path))
+            if name.endswith(FEED_SUFFIXES) and os.path.isfile(os.path.join(path, name))]
+
+def iter_feed_vulnerabilities(file_path, items_key='vulnerabilities', chunk_size=READ_CHUNK_SIZE):
+    """逐条返回数据源文件中items_key数组的元素（API 2.0格式的{'cve': {...}}）"""
+    decoder = json.JSONDecoder()
+    marker = f'"{items_key}"'
+    
+    with open_feed(file_path) as f:
+        buffer = ''
+        eof = False
+        
+        def read_more():
+            nonlocal buffer, eof
+            chunk = f.read(chunk_size)
+            if chunk:
+                buffer += chunk
+            else:
+                eof = True
+        
+        # 定位数组起始位置
+        while True:
+            index = buffer.find(marker)
+            if index >= 0:
+                pos = index + len(marker)
+                break
+            if eof:
+                raise ValueError(f"{file_path} 中没有找到{items_key}数组")
+            # 保留末尾可能被截断的键名
+            buffer = buffer[-len(marker):]
+            read_more()
+        
+        expected = ':['
+        while expected:
+            while pos >= len(buffer):
+                if eof:
+                    raise ValueError(f"{file_path} 的{items_key}数组不完整")
+                read_more()
+            char = buffer[pos]
+            pos += 1
+            if char in _WHITESPACE:
+                continue
+            if char != expected[0]:
+                raise ValueError(f"{file_path} 的{items_key}不是数组")
+            expected = expected[1:]
+        
+        while True:
+            # 跳过元素之间的空白和逗号
+            while True:
+                while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ','):
+                    pos += 1
+                if pos < len(buffer):
+                    break
+                if eof:
+                    raise ValueError(f"{file_path} 的{items_key}数组不完整")
+                buffer = ''
+                pos = 0
+                read_more()
+            
+            if buffer[pos] == ']':
+                return
+            
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # 元素跨越读取块，丢弃已解析的部分后继续读取
+                buffer = buffer[pos:]
+                pos = 0
+                read_more()
+                continue
+            yield item
+            pos = end
+
+def iter_feed_pages(file_path, page_size=FEED_PAGE_SIZE):
+    """把数据源文件切分为与NvdClient.iter_pages相同格式的(startIndex, totalResults, 数据)
+    
+    totalResults在读完文件前未知，返回0。
+    """
+    page = []
+    start_index = 0
+    for vuln in iter_feed_vulnerabilities(file_path):
+        page.append(vuln)
+        if len(page) >= page_size:
+            yield start_index, 0, {'vulnerabilities': page}
+            start_index += len(page)
+            page = []
+    if page:
+        yield start_index, 0, {'vulnerabilities': page}
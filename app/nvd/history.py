@@ -0,0 +1,77 @@
+"""NVD CVE变更历史（cvehistory 2.0）
+
+按变更时间窗口分页读取变更事件，汇总出发生变化的CVE。变化的CVE很少时按cveId逐条拉取这些CVE的
+最新记录，比按lastModified窗口分页少发请求；逐条拉取的请求数不少于分页页数时改为分页同步（见NvdService.sync_from_history）。
+"""
+from collections import Counter
+from datetime import timedelta
+from app.nvd.client import NvdClient, NVD_HISTORY_API_URL
+
+# 变更历史接口每页最多返回5000条事件，单次查询的时间跨度不超过120天
+HISTORY_PAGE_SIZE = 5000
+MAX_CHANGE_RANGE_DAYS = 120
+
+class ChangeSet:
+    """一个时间窗口内的变更事件汇总"""
+    
+    def __init__(self):
+        self.cve_ids = []  # 按首次出现顺序去重的CVE ID
+        self.event_count = 0
+        self.event_names = Counter()
+        self._seen = set()
+    
+    def add(self, change):
+        """加入一条变更事件（cveChanges[].change）"""
+        self.event_count += 1
+        self.event_names[change.get('eventName', '')] += 1
+        cve_id = change.get('cveId')
+        if cve_id and cve_id not in self._seen:
+            self._seen.add(cve_id)
+            self.cve_ids.append(cve_id)
+    
+    def summary(self):
+        """返回"事件名: 数量"形式的摘要"""
+        return ', '.join(f"{name or '未知'}: {count}" for name, count in self.event_names.most_common())
+
+class NvdHistoryClient:
+    """变更历史接口客户端，与CVE接口共享限速器和连接池"""
+    
+    def __init__(self, client=None, metrics=None):
+        self.client = client or NvdClient(api_url=NVD_HISTORY_API_URL, metrics=metrics)
+    
+    @staticmethod
+    def _build_query_params(start_date, end_date):
+        return {
+            'changeStartDate': start_date.isoformat() + 'Z',
+            'changeEndDate': end_date.isoformat() + 'Z',
+            'resultsPerPage': HISTORY_PAGE_SIZE
+        }
+    
+    def iter_changes(self, start_date, end_date):
+        """逐条返回[start_date, end_date]内的变更事件，超过120天时自动分段查询"""
+        window_start = start_date
+        while window_start < end_date:
+            window_end = min(window_start + timedelta(days=MAX_CHANGE_RANGE_DAYS), end_date)
+            params = NvdHistoryClient._build_query_params(window_start, window_end)
+            for _, _, data in self.client.iter_pages(params, items_key='cveChanges'):
+                for item in data.get('cveChanges', []):
+                    change = item.get('change')
+                    if change:
+                        yield change
+            window_start = window_end
+    
+    def collect_changes(self, start_date, end_date):
+        """汇总时间窗口内的变更事件，返回ChangeSet"""
+        changes = ChangeSet()
+        for change in self.iter_changes(start_date, end_date):
+            changes.add(change)
+        return changes
+
+def iter_cve_pages(client, cve_ids):
+    """按cveId逐条请求CVE记录，返回与NvdClient.iter_pages相同格式的(startIndex, totalResults, 数据)
+    
+    作为导入流水线的获取阶段；已被删除的CVE返回空结果，写入阶段会跳过。
+    """
+    for cve_id in cve_ids:
+        data = client.fetch_page({'cveId': cve_id})
+        yield 0, data.get('totalResults', 0), data
@@ -3,7 +3,7 @@ import json
 from datetime import datetime
 import threading
 from app import db
-from app.nvd.models import NvdData, SyncLog
+from app.nvd.models import NvdData, SyncLog, SyncRun
 
 class NvdLogService:
     """NVD数据同步日志服务"""
@@ -12,20 +12,21 @@ class NvdLogService:
     _lock = threading.Lock()
     
     @classmethod
-    def add_log(cls, action_type, count, start_date=None, end_date=None):
+    def add_log(cls, action_type, count, start_date=None, end_date=None, metrics=None):
         """添加同步日志到数据库
         
         参数:
             action_type: 操作类型（'auto'自动同步, 'manual'手动同步）
-            count: 新增记录数量
+            count: 新增记录数量，小于0表示同步失败
             start_date: 开始日期
             end_date: 结束日期
+            metrics: 本次同步的SyncMetrics，提供时同时写入sync_runs表，记录运行状态和性能数据
         """
         with cls._lock:
             # 创建新日志条目
             new_log = SyncLog(
                 action_type=action_type,
-                count=count,
+                count=max(count, 0),
                 start_date=start_date,
                 end_date=end_date
             )
@@ -35,13 +36,25 @@ class NvdLogService:
                 db.session.add(new_log)
                 db.session.commit()
                 
+                if metrics is not None:
+                    db.session.add(SyncRun(
+                        sync_log_id=new_log.id,
+                        action_type=action_type,
+                        start_date=start_date,
+                        end_date=end_date,
+                        **metrics.to_columns(count)
+                    ))
+                    db.session.commit()
+                
                 # 限制日志数量，保留最近1000条
                 # 先查询当前日志总数
                 total_logs = SyncLog.query.count()
                 if total_logs > 1000:
                     # 获取最早的日志记录
                     oldest_logs = SyncLog.query.order_by(SyncLog.timestamp).limit(total_logs - 1000).all()
-                    # 删除多余的日志记录
+                    # 删除多余的日志记录及其性能数据
+                    SyncRun.query.filter(SyncRun.sync_log_id.in_([log.id for log in oldest_logs])).delete(
+                        synchronize_session=False)
                     for log in oldest_logs:
                         db.session.delete(log)
                     db.session.commit()
@@ -64,12 +77,59 @@ class NvdLogService:
         try:
             # 查询最新的日志记录
             logs = SyncLog.query.order_by(SyncLog.timestamp.desc()).limit(limit).all()
-            # 转换为字典列表
-            return [log.to_dict() for log in logs]
+            # 附加每条日志对应的运行状态和性能数据
+            runs = {
+                run.sync_log_id: run
+                for run in SyncRun.query.filter(SyncRun.sync_log_id.in_([log.id for log in logs]))
+            } if logs else {}
+            result = []
+            for log in logs:
+                entry = log.to_dict()
+                run = runs.get(log.id)
+                entry['status'] = run.status if run else None
+                entry['metrics'] = run.to_dict() if run else None
+                result.append(entry)
+            return result
         except Exception as e:
             print(f"获取同步日志失败: {str(e)}")
             return []
     
+    @classmethod
+    def get_runs(cls, limit=50, action_type=None):
+        """获取最近的同步运行性能数据
+        
+        参数:
+            limit: 返回的最大条数
+            action_type: 只返回该操作类型的运行
+        
+        返回:
+            {'runs': 运行列表（从新到旧）, 'summary': 汇总}
+        """
+        try:
+            query = SyncRun.query
+            if action_type:
+                query = query.filter_by(action_type=action_type)
+            runs = [run.to_dict() for run in query.order_by(SyncRun.finished_at.desc()).limit(limit)]
+        except Exception as e:
+            print(f"获取同步性能数据失败: {str(e)}")
+            runs = []
+        
+        statuses = {}
+        for run in runs:
+            statuses[run['status']] = statuses.get(run['status'], 0) + 1
+        throughputs = [run['rows_per_sec'] for run in runs if run['status'] == 'success' and run['rows_per_sec']]
+        latencies = [latency for run in runs for latency in run['page_latencies']]
+        return {
+            'runs': runs,
+            'summary': {
+                'count': len(runs),
+                'statuses': statuses,
+                'avg_rows_per_sec': round(sum(throughputs) / len(throughputs), 1) if throughputs else None,
+                'avg_page_latency': round(sum(latencies) / len(latencies)) if latencies else None,
+                'total_retries': sum(run['retries'] for run in runs)
+            }
+        }
+    
     @classmethod
     def get_last_sync_info(cls):
         """获取最后一次同步信息
@@ -129,7 +189,7 @@ class NvdLogService:
 # 初始化日志服务
 def init_log_service():
     """初始化日志服务"""
-    # 不需要创建文件，数据库表会在应用启动时自动创建
+    # 不需要创建文件，数据库表由migrate.py创建
     pass
 
 # 初始化日志服务实例
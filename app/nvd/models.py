@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from app import db
 
@@ -14,6 +15,8 @@ class NvdData(db.Model):
     vector_string = db.Column(db.String(255))
     vendor = db.Column(db.String(255))
     product = db.Column(db.String(255))
+    content_hash = db.Column(db.String(40))  # 记录内容哈希，内容未变化时跳过更新
+    child_hash = db.Column(db.String(40))  # nvd_cpe/nvd_cvss子表内容哈希，未变化时不重写子表
     
     def __repr__(self):
         return f'<NvdData {self.cve_id}>'
@@ -38,4 +41,186 @@ class SyncLog(db.Model):
         }
     
     def __repr__(self):
-        return f'<SyncLog {self.timestamp} - {self.action_type}>'
\ No newline at end of file
+        return f'<SyncLog {self.timestamp} - {self.action_type}>'
+
+class SyncWatermark(db.Model):
+    """增量同步的水位线，记录上一次成功同步的lastModified时间边界"""
+    __tablename__ = 'sync_watermarks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    last_mod_start = db.Column(db.DateTime)
+    last_mod_end = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_mod_start': self.last_mod_start.strftime('%Y-%m-%d %H:%M:%S') if self.last_mod_start else None,
+            'last_mod_end': self.last_mod_end.strftime('%Y-%m-%d %H:%M:%S') if self.last_mod_end else None,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncWatermark {self.name} - {self.last_mod_end}>'
+
+class SyncCheckpoint(db.Model):
+    """同步/回填窗口的断点，记录已提交的下一页startIndex，用于中断后续传"""
+    __tablename__ = 'sync_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(191), unique=True, nullable=False)
+    window_start = db.Column(db.DateTime)
+    window_end = db.Column(db.DateTime)
+    next_start_index = db.Column(db.Integer, nullable=False, default=0)
+    total_results = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SyncCheckpoint {self.key} - {self.next_start_index}/{self.total_results}>'
+
+class NvdCpeMatch(db.Model):
+    """CVE受影响产品表，保存configurations中的每一条CPE匹配
+    
+    nvd表的vendor/product只保留第一条CPE，按厂商/产品查询时使用本表的索引做等值查询。
+    """
+    __tablename__ = 'nvd_cpe'
+    __table_args__ = (
+        db.Index('ix_nvd_cpe_vendor_product', 'vendor', 'product'),
+        db.Index('ix_nvd_cpe_product', 'product'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cve_id = db.Column(db.String(50), nullable=False, index=True)
+    part = db.Column(db.String(1))  # a: 应用, o: 操作系统, h: 硬件
+    # 长度与extractor.CPE_FIELD_MAX_LENGTH一致，超长的值在抽取时截断
+    vendor = db.Column(db.String(255), nullable=False)
+    product = db.Column(db.String(255), nullable=False)
+    version = db.Column(db.String(255))
+    version_start_including = db.Column(db.String(255))
+    version_start_excluding = db.Column(db.String(255))
+    version_end_including = db.Column(db.String(255))
+    version_end_excluding = db.Column(db.String(255))
+    vulnerable = db.Column(db.Boolean, nullable=False, default=True)
+    
+    def to_dict(self):
+        return {
+            'cve_id': self.cve_id,
+            'part': self.part,
+            'vendor': self.vendor,
+            'product': self.product,
+            'version': self.version,
+            'version_start_including': self.version_start_including,
+            'version_start_excluding': self.version_start_excluding,
+            'version_end_including': self.version_end_including,
+            'version_end_excluding': self.version_end_excluding,
+            'vulnerable': self.vulnerable
+        }
+    
+    def __repr__(self):
+        return f'<NvdCpeMatch {self.cve_id} - {self.vendor}:{self.product}>'
+
+class NvdCvssMetric(db.Model):
+    """CVE的全部CVSS评分（v2、v3.0、v3.1、v4.0，每个来源一行）
+    
+    分数和严重程度序号为数值列并建立索引，"近30天v3.1评分≥9.0"这类查询走索引范围扫描。
+    published_date从nvd表冗余过来，避免按时间过滤时再关联nvd表。
+    """
+    __tablename__ = 'nvd_cvss'
+    __table_args__ = (
+        db.Index('ix_nvd_cvss_version_score', 'version', 'base_score'),
+        db.Index('ix_nvd_cvss_version_published', 'version', 'published_date'),
+        db.Index('ix_nvd_cvss_severity_published', 'severity_ordinal', 'published_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cve_id = db.Column(db.String(50), nullable=False, index=True)
+    version = db.Column(db.String(4), nullable=False)  # '2.0', '3.0', '3.1', '4.0'
+    source = db.Column(db.String(100))
+    type = db.Column(db.String(20))  # 'Primary' 或 'Secondary'
+    base_score = db.Column(db.Float)
+    base_severity = db.Column(db.String(20))
+    severity_ordinal = db.Column(db.SmallInteger)  # NONE=0, LOW=1, MEDIUM=2, HIGH=3, CRITICAL=4
+    vector_string = db.Column(db.String(255))
+    exploitability_score = db.Column(db.Float)
+    impact_score = db.Column(db.Float)
+    published_date = db.Column(db.Date)
+    
+    def to_dict(self):
+        return {
+            'cve_id': self.cve_id,
+            'version': self.version,
+            'source': self.source,
+            'type': self.type,
+            'base_score': self.base_score,
+            'base_severity': self.base_severity,
+            'severity_ordinal': self.severity_ordinal,
+            'vector_string': self.vector_string,
+            'exploitability_score': self.exploitability_score,
+            'impact_score': self.impact_score,
+            'published_date': self.published_date.strftime('%Y-%m-%d') if self.published_date else None
+        }
+    
+    def __repr__(self):
+        return f'<NvdCvssMetric {self.cve_id} - v{self.version} {self.base_score}>'
+
+class SyncRun(db.Model):
+    """一次同步运行的性能数据，与sync_logs中的日志条目一一对应
+    
+    记录请求页数、字节数、每页HTTP耗时、重试次数、解析/写入耗时和新增/更新/未变化的行数，
+    用于区分慢同步、失败的同步和没有新数据的同步。
+    """
+    __tablename__ = 'sync_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sync_log_id = db.Column(db.Integer, index=True)  # 对应的sync_logs.id
+    action_type = db.Column(db.String(10), nullable=False)
+    status = db.Column(db.String(10), nullable=False)  # 'success'、'empty'或'failed'
+    error = db.Column(db.String(500))
+    started_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=False, index=True)
+    start_date = db.Column(db.DateTime)
+    end_date = db.Column(db.DateTime)
+    pages = db.Column(db.Integer, nullable=False, default=0)
+    bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    http_time = db.Column(db.Float, nullable=False, default=0)  # 所有请求的HTTP耗时合计（秒）
+    page_latencies = db.Column(db.Text)  # 每页HTTP耗时（毫秒）的JSON数组
+    retries = db.Column(db.Integer, nullable=False, default=0)
+    parse_time = db.Column(db.Float, nullable=False, default=0)
+    write_time = db.Column(db.Float, nullable=False, default=0)
+    rows_inserted = db.Column(db.Integer, nullable=False, default=0)
+    rows_updated = db.Column(db.Integer, nullable=False, default=0)
+    rows_unchanged = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        latencies = json.loads(self.page_latencies) if self.page_latencies else []
+        duration = (self.finished_at - self.started_at).total_seconds()
+        rows = self.rows_inserted + self.rows_updated + self.rows_unchanged
+        return {
+            'id': self.id,
+            'sync_log_id': self.sync_log_id,
+            'action_type': self.action_type,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'start_date': self.start_date.strftime('%Y-%m-%d %H:%M:%S') if self.start_date else None,
+            'end_date': self.end_date.strftime('%Y-%m-%d %H:%M:%S') if self.end_date else None,
+            'duration': round(duration, 3),
+            'pages': self.pages,
+            'bytes': self.bytes,
+            'http_time': round(self.http_time, 3),
+            'page_latencies': latencies,
+            'avg_page_latency': round(sum(latencies) / len(latencies)) if latencies else None,
+            'max_page_latency': max(latencies) if latencies else None,
+            'retries': self.retries,
+            'parse_time': round(self.parse_time, 3),
+            'write_time': round(self.write_time, 3),
+            'rows_inserted': self.rows_inserted,
+            'rows_updated': self.rows_updated,
+            'rows_unchanged': self.rows_unchanged,
+            'rows_per_sec': round(rows / duration, 1) if duration > 0 else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncRun {self.finished_at} - {self.action_type} {self.status}>'
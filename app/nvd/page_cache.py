@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 原始API分页缓存目录，设置环境变量NVD_PAGE_CACHE_DIR后NvdClient会自动缓存每页响应
+DEFAULT_CACHE_DIR = os.path.join(BASE_DIR, 'nvd_page_cache')
+FETCHED_AT_FORMAT = '%Y%m%dT%H%M%S%f'
+
+def get_page_cache():
+    """根据环境变量NVD_PAGE_CACHE_DIR返回缓存实例，未配置时返回None"""
+    cache_dir = os.environ.get('NVD_PAGE_CACHE_DIR')
+    return NvdPageCache(cache_dir) if cache_dir else None
+
+def is_cve_page(page):
+    """缓存的页面是否来自CVE接口：变更历史接口（cvehistory）的页面没有vulnerabilities，重放时跳过"""
+    return 'vulnerabilities' in page['response'] and 'cvehistory' not in (page.get('url') or '')
+
+class NvdPageCache:
+    """NVD API原始分页响应的压缩磁盘缓存
+    
+    每页响应按接口地址、查询参数和获取时间保存为gzip压缩的JSON文件：
+        <cache_dir>/<键前2位>/<键>/<获取时间>.json.gz
+    文件内容为{"url": 接口地址, "params": 查询参数, "fetched_at": 获取时间, "response": 原始响应}。
+    CVE接口和变更历史接口的页面使用不同的键，重放时按url区分。
+    修改解析逻辑后可以离线重放缓存重新抽取数据，也可以作为性能测试语料。
+    """
+    
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+    
+    @staticmethod
+    def cache_key(params, url=None):
+        """根据接口地址和查询参数生成缓存键"""
+        canonical = json.dumps({k: str(v) for k, v in params.items()}, sort_keys=True)
+        if url:
+            canonical = url + '?' + canonical
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+    
+    def _key_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+    
+    def store(self, params, content, fetched_at=None, url=None):
+        """保存一页原始响应
+        
+        参数:
+            params: 查询参数
+            content: 原始响应体（bytes），直接写入不再重新序列化
+            fetched_at: 获取时间，默认当前UTC时间
+            url: 接口地址
+        
+        返回:
+            缓存文件路径
+        """
+        fetched_at = fetched_at or datetime.utcnow()
+        key = NvdPageCache.cache_key(params, url)
+        key_dir = self._key_dir(key)
+        os.makedirs(key_dir, exist_ok=True)
+        
+        file_path = os.path.join(key_dir, fetched_at.strftime(FETCHED_AT_FORMAT) + '.json.gz')
+        temp_path = file_path + '.tmp'
+        header = json.dumps({k: v for k, v in params.items()})
+        with gzip.open(temp_path, 'wb', compresslevel=6) as f:
+            f.write(b'{"url": ' + json.dumps(url).encode('utf-8'))
+            f.write(b', "params": ' + header.encode('utf-8'))
+            f.write(b', "fetched_at": "' + fetched_at.isoformat().encode('ascii') + b'"')
+            f.write(b', "response": ' + content + b'}')
+        os.replace(temp_path, file_path)
+        return file_path
+    
+    @staticmethod
+    def load(file_path):
+        """读取一个缓存文件，返回{"url", "params", "fetched_at", "response"}（早期的缓存文件没有url）"""
+        with gzip.open(file_path, 'rb') as f:
+            return json.loads(f.read())
+    
+    def iter_files(self, latest_only=True, since=None):
+        """按获取时间顺序返回缓存文件路径
+        
+        参数:
+            latest_only: 同一组查询参数只返回最近一次获取的页面
+            since: 只返回该时间之后获取的页面
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return
+        
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                names = sorted(name for name in os.listdir(os.path.join(prefix_dir, key))
+                               if name.endswith('.json.gz'))
+                if latest_only:
+                    names = names[-1:]
+                for name in names:
+                    fetched_at = datetime.strptime(name[:-len('.json.gz')], FETCHED_AT_FORMAT)
+                    if since and fetched_at < since:
+                        continue
+                    entries.append((fetched_at, os.path.join(prefix_dir, key, name)))
+        
+        # 按获取时间重放，同一CVE以最新获取的数据为准
+        for _, file_path in sorted(entries):
+            yield file_path
+    
+    def iter_pages(self, latest_only=True, since=None):
+        """按获取时间顺序返回缓存的页面内容"""
+        for file_path in self.iter_files(latest_only=latest_only, since=since):
+            yield NvdPageCache.load(file_path)
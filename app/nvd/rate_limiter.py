@@ -0,0 +1,75 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# NVD API速率限制：滚动30秒窗口内允许的请求数
+NVD_RATE_WINDOW = 30
+NVD_RATE_LIMIT_WITH_KEY = 50
+NVD_RATE_LIMIT_WITHOUT_KEY = 5
+
+# 退避参数（秒）
+BACKOFF_BASE = 2
+BACKOFF_MAX = 120
+
+class RateLimiter:
+    """滚动窗口令牌桶限速器（线程安全）
+    
+    在任意period秒的窗口内最多放行max_requests个请求，预算未用完时立即放行，
+    用完后只等待到最早的请求移出窗口为止，而不是每次固定休眠。
+    多个线程共享同一个实例时共享同一份预算。
+    """
+    
+    def __init__(self, max_requests, period=NVD_RATE_WINDOW):
+        self.max_requests = max_requests
+        self.period = period
+        self._timestamps = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """阻塞直到可以发送下一个请求"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                
+                # 服务端要求退避期间，所有调用方一起等待
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    # 移除已经滑出窗口的请求
+                    while self._timestamps and now - self._timestamps[0] >= self.period:
+                        self._timestamps.popleft()
+                    
+                    if len(self._timestamps) < self.max_requests:
+                        self._timestamps.append(now)
+                        return
+                    wait = self.period - (now - self._timestamps[0])
+            time.sleep(wait)
+    
+    def pause(self, seconds):
+        """收到429/503后暂停所有请求seconds秒"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """计算第attempt次重试的退避时间：指数增长并加入随机抖动"""
+    delay = min(cap, base * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+def get_nvd_api_key():
+    """从环境变量NVD_API_KEY读取API密钥，未配置时返回None"""
+    return os.environ.get('NVD_API_KEY') or None
+
+_nvd_limiters = {}
+_nvd_limiters_lock = threading.Lock()
+
+def get_nvd_rate_limiter(api_key=None):
+    """获取进程内共享的NVD限速器，按是否使用API密钥区分配额"""
+    keyed = bool(api_key)
+    with _nvd_limiters_lock:
+        if keyed not in _nvd_limiters:
+            max_requests = NVD_RATE_LIMIT_WITH_KEY if keyed else NVD_RATE_LIMIT_WITHOUT_KEY
+            _nvd_limiters[keyed] = RateLimiter(max_requests, NVD_RATE_WINDOW)
+        return _nvd_limiters[keyed]
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify
 from .service import NvdService
 from .log_service import sync_log_service
+from app.jobs.service import JobService
 
 nvd_bp = Blueprint('nvd', __name__, url_prefix='/nvd')
 
@@ -8,6 +9,8 @@ nvd_bp = Blueprint('nvd', __name__, url_prefix='/nvd')
 def nvd_index():
     # 获取搜索参数
     search_query = request.args.get('search', '')
+    vendor = request.args.get('vendor', '')
+    product = request.args.get('product', '')
     
     # 获取分页参数
     page = request.args.get('page', 1, type=int)
@@ -17,8 +20,11 @@ def nvd_index():
     sort_by = request.args.get('sort_by', '')
     sort_order = request.args.get('sort_order', '')
     
-    # 获取数据
-    if search_query:
+    # 获取数据，指定厂商/产品时走nvd_cpe表的索引查询
+    if vendor or product:
+        pagination = NvdService.search_by_product(vendor, product, page=page, per_page=per_page, sort_by=sort_by, sort_order=sort_order)
+        total_count = pagination.total
+    elif search_query:
         pagination = NvdService.search_data(search_query, page=page, per_page=per_page, sort_by=sort_by, sort_order=sort_order)
         total_count = NvdService.get_search_count(search_query)
     else:
@@ -32,6 +38,8 @@ def nvd_index():
         'nvd/index.html', 
         data=pagination.items, 
         search_query=search_query,
+        vendor=vendor,
+        product=product,
         pagination=pagination,
         total_count=total_count,
         per_page=per_page,
@@ -43,36 +51,38 @@ def nvd_index():
 @nvd_bp.route('/sync')
 def sync_data():
     """手动触发数据同步"""
-    from datetime import datetime, timedelta
+    from datetime import datetime
     from flask import request, redirect, url_for, flash
     
     # 获取时间范围参数
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
     
-    # 如果没有提供时间范围，默认同步最近7天的数据
+    # 没有提供时间范围时不带参数提交，由任务执行时按当时的时间同步最近7天的数据
+    params = {}
     if start_date_str and end_date_str:
         try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+            datetime.strptime(start_date_str, '%Y-%m-%d')
+            datetime.strptime(end_date_str, '%Y-%m-%d')
         except ValueError:
-            flash('日期格式错误，请使用YYYY-MM-DD格式', 'danger')
+            message = '日期格式错误，请使用YYYY-MM-DD格式'
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({'error': message}), 400
+            flash(message, 'danger')
             return redirect(url_for('nvd.nvd_index'))
-    else:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=7)
+        params = {'start_date': start_date_str, 'end_date': end_date_str}
     
-    # 调用同步方法
-    success_count = NvdService.sync_and_save_tsv(start_date=start_date, end_date=end_date)
+    # 提交后台同步任务后立即返回，由任务执行器逐页同步并记录日志
+    job = JobService.enqueue('nvd_sync', params)
     
-    # 记录同步日志并显示消息
-    if success_count >= 0:
-        sync_log_service.add_log('manual', success_count, start_date, end_date)
-        flash(f'数据同步成功，新增 {success_count} 条记录', 'success')
-    else:
-        # 记录失败日志
-        sync_log_service.add_log('manual', 0, start_date, end_date)
-        flash('数据同步失败', 'danger')
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': url_for('jobs.job_status', job_id=job.id)
+        }), 202
+    
+    flash(f'同步任务已提交（任务ID: {job.id}），可在同步日志中查看结果', 'success')
     
     # 重定向回NVD主页面
     return redirect(url_for('nvd.nvd_index'))
@@ -90,6 +100,8 @@ def api_data():
     """提供API接口，返回JSON格式的NVD数据"""
     # 获取搜索参数
     search_query = request.args.get('search', '')
+    vendor = request.args.get('vendor', '')
+    product = request.args.get('product', '')
     
     # 获取分页参数
     page = request.args.get('page', 1, type=int)
@@ -99,8 +111,11 @@ def api_data():
     sort_by = request.args.get('sort_by', '')
     sort_order = request.args.get('sort_order', '')
     
-    # 获取数据
-    if search_query:
+    # 获取数据，指定厂商/产品时走nvd_cpe表的索引查询
+    if vendor or product:
+        pagination = NvdService.search_by_product(vendor, product, page=page, per_page=per_page, sort_by=sort_by, sort_order=sort_order)
+        total_count = pagination.total
+    elif search_query:
         pagination = NvdService.search_data(search_query, page=page, per_page=per_page, sort_by=sort_by, sort_order=sort_order)
         total_count = NvdService.get_search_count(search_query)
     else:
@@ -132,6 +147,57 @@ def api_data():
         'has_prev': pagination.has_prev
     })
 
+@nvd_bp.route('/api/cpe/<cve_id>')
+def api_cpe(cve_id):
+    """返回单个CVE的全部受影响产品（CPE匹配）"""
+    cpe_matches = NvdService.get_cpe_matches(cve_id)
+    return jsonify([match.to_dict() for match in cpe_matches])
+
+@nvd_bp.route('/api/cvss')
+def api_cvss():
+    """按CVSS版本、分数、严重程度和发布日期查询评分，例如
+    /nvd/api/cvss?version=3.1&min_score=9.0&days=30
+    """
+    from datetime import datetime, timedelta
+    
+    version = request.args.get('version', '3.1')
+    min_score = request.args.get('min_score', type=float)
+    max_score = request.args.get('max_score', type=float)
+    min_severity = request.args.get('min_severity', '')
+    days = request.args.get('days', type=int)
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        if days:
+            start_date = datetime.utcnow().date() - timedelta(days=days)
+        
+        pagination = NvdService.query_by_cvss(
+            version=version, min_score=min_score, max_score=max_score, min_severity=min_severity,
+            start_date=start_date, end_date=end_date, page=page, per_page=per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'data': [metric.to_dict() for metric in pagination.items],
+        'total': pagination.total,
+        'page': page,
+        'per_page': per_page,
+        'pages': pagination.pages,
+        'has_next': pagination.has_next,
+        'has_prev': pagination.has_prev
+    })
+
+@nvd_bp.route('/api/cvss/<cve_id>')
+def api_cve_cvss(cve_id):
+    """返回单个CVE的全部CVSS评分"""
+    metrics = NvdService.get_cvss_metrics(cve_id)
+    return jsonify([metric.to_dict() for metric in metrics])
+
 @nvd_bp.route('/api/logs')
 def api_logs():
     """提供同步日志API接口"""
@@ -145,6 +211,13 @@ def api_logs():
     
     # 返回JSON响应
     return jsonify(logs)
+
+@nvd_bp.route('/api/metrics')
+def api_metrics():
+    """返回最近同步运行的性能数据：每页HTTP耗时、重试、解析/写入耗时、行数和吞吐量"""
+    limit = request.args.get('limit', 50, type=int)
+    action_type = request.args.get('action_type', '')
+    return jsonify(sync_log_service.get_runs(limit=limit, action_type=action_type or None))
     
 @nvd_bp.route('/cve/<cve_id>')
 def cve_detail(cve_id):
@@ -157,4 +230,7 @@ def cve_detail(cve_id):
         flash(f'未找到CVE ID为 {cve_id} 的记录', 'danger')
         return redirect(url_for('nvd.nvd_index'))
     
-    return render_template('nvd/cve_detail.html', cve_data=cve_data)
\ No newline at end of file
+    cpe_matches = NvdService.get_cpe_matches(cve_id)
+    cvss_metrics = NvdService.get_cvss_metrics(cve_id)
+    return render_template('nvd/cve_detail.html', cve_data=cve_data, cpe_matches=cpe_matches,
+                           cvss_metrics=cvss_metrics)
\ No newline at end of file
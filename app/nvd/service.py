@@ -1,28 +1,72 @@
-import requests
 import json
 import time
-import requests
 from datetime import datetime, timedelta
-import schedule
 from threading import Thread
 import os
 from flask import current_app, jsonify
-from .models import NvdData
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from .models import NvdData, SyncWatermark, SyncCheckpoint, NvdCpeMatch, NvdCvssMetric
 from app import db
 from app.nvd.log_service import sync_log_service
+from app.nvd.telemetry import SyncMetrics
+from app.leader import check_leader, get_leader_lock, leader_only
+from app.nvd.feed import FEED_PAGE_SIZE, iter_feed_files, iter_feed_pages
+from app.nvd.checkpoint import DbCheckpoint, checkpoint_key
+from app.nvd.page_cache import NvdPageCache, get_page_cache, is_cve_page
+from app.nvd.extractor import (TSV_FIELDNAMES, SEVERITY_ORDINALS, extract_page, extract_records,
+                               record_from_tsv_fields, record_hash, child_hash, to_tsv_row)
+from app.ingest.pipeline import IngestPipeline, iter_chunks
 
 # 存储应用实例的引用
 _app = None
 
-# NVD API相关配置
-NVD_API_URL = "https://services.nvd.nist.gov/rest/json/cves/2.0"
-REQUEST_DELAY = 6  # 符合NVD API使用政策的延迟时间
+# NVD API相关配置（请求速率由NvdClient共享的限速器控制）
 BATCH_SIZE = 2000  # 每页获取的记录数
+MAX_DATE_RANGE_DAYS = 120  # NVD API单次查询允许的最大日期跨度
+WATERMARK_NAME = 'nvd_last_modified'  # 增量同步水位线名称
+HISTORY_WATERMARK_NAME = 'nvd_change_history'  # 变更历史同步水位线名称
+
+# 定时增量同步方式：'lastmod'按lastModified窗口分页，'history'按变更历史逐条更新
+DAILY_SYNC_MODE = os.environ.get('NVD_DAILY_SYNC_MODE', 'lastmod')
+
+# 批量写入时遇到重复CVE需要更新的列
+UPSERT_COLUMNS = ['published_date', 'last_modified_date', 'description', 'base_score',
+                  'base_severity', 'vector_string', 'vendor', 'product']
 
 # 下载目录
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DOWNLOAD_DIR = BASE_DIR
 
+def extract_api_page(page):
+    """流水线解析阶段：把NvdClient.iter_pages返回的(startIndex, totalResults, 响应数据)抽取为
+    (startIndex, totalResults, 本页条数, nvd记录, CPE匹配行, CVSS评分行)
+    
+    模块级函数，流水线使用进程池解析时可以被pickle。
+    """
+    page_start, total_results, data = page
+    vulnerabilities = data.get('vulnerabilities', [])
+    return (page_start, total_results, len(vulnerabilities)) + extract_page(vulnerabilities)
+
+def parse_tsv_rows(rows):
+    """流水线解析阶段：把一批TSV字段列表转换为nvd表记录，返回(记录列表, 跳过的行数)"""
+    records = []
+    skipped_count = 0
+    for fields in rows:
+        try:
+            record = record_from_tsv_fields(fields)
+        except ValueError as e:
+            print(f"处理记录 {fields[0] if fields else '未知'} 时出错: {str(e)}")
+            record = None
+        if not record:
+            skipped_count += 1
+            continue
+        record['content_hash'] = record_hash(record)
+        # nvd表的日期列为DATE类型
+        record['published_date'] = record['published_date'].date()
+        record['last_modified_date'] = record['last_modified_date'].date()
+        records.append(record)
+    return records, skipped_count
+
 class NvdService:
     @staticmethod
     def set_app(app):
@@ -30,20 +74,23 @@ class NvdService:
         global _app
         _app = app
     
+    @staticmethod
+    def _apply_sort(query, sort_by='', sort_order=''):
+        """按列排序，未指定或列不存在时按发布日期倒序"""
+        if sort_by and hasattr(NvdData, sort_by):
+            sort_column = getattr(NvdData, sort_by)
+            if sort_order == 'desc':
+                return query.order_by(sort_column.desc())
+            return query.order_by(sort_column.asc())
+        return query.order_by(NvdData.published_date.desc())
+    
     @staticmethod
     def get_all_data(page=1, per_page=20, sort_by='', sort_order=''):
         """获取所有NVD数据，支持分页和排序"""
         query = NvdData.query
         
         # 处理排序
-        if sort_by and hasattr(NvdData, sort_by):
-            sort_column = getattr(NvdData, sort_by)
-            if sort_order == 'desc':
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(NvdData.published_date.desc())
+        query = NvdService._apply_sort(query, sort_by, sort_order)
         
         # 分页
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -63,19 +110,79 @@ class NvdService:
         )
         
         # 处理排序
-        if sort_by and hasattr(NvdData, sort_by):
-            sort_column = getattr(NvdData, sort_by)
-            if sort_order == 'desc':
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(NvdData.published_date.desc())
+        query = NvdService._apply_sort(query, sort_by, sort_order)
         
         # 分页
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
         return pagination
     
+    @staticmethod
+    def search_by_product(vendor='', product='', page=1, per_page=20, sort_by='', sort_order=''):
+        """按厂商/产品查询受影响的CVE
+        
+        在nvd_cpe表上做等值查询（走vendor/product索引），覆盖CVE的全部CPE匹配，
+        而不是对nvd表的第一条CPE做LIKE全表扫描。
+        """
+        cve_ids = db.session.query(NvdCpeMatch.cve_id)
+        if vendor:
+            cve_ids = cve_ids.filter(NvdCpeMatch.vendor == vendor.strip().lower())
+        if product:
+            cve_ids = cve_ids.filter(NvdCpeMatch.product == product.strip().lower())
+        
+        query = NvdData.query.filter(NvdData.cve_id.in_(cve_ids.distinct()))
+        query = NvdService._apply_sort(query, sort_by, sort_order)
+        
+        # 分页
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return pagination
+    
+    @staticmethod
+    def get_cpe_matches(cve_id):
+        """获取单个CVE的全部受影响产品"""
+        return NvdCpeMatch.query.filter_by(cve_id=cve_id).order_by(
+            NvdCpeMatch.vendor, NvdCpeMatch.product, NvdCpeMatch.id).all()
+    
+    @staticmethod
+    def get_cvss_metrics(cve_id):
+        """获取单个CVE的全部CVSS评分，按版本从新到旧排列"""
+        return NvdCvssMetric.query.filter_by(cve_id=cve_id).order_by(
+            NvdCvssMetric.version.desc(), NvdCvssMetric.id).all()
+    
+    @staticmethod
+    def query_by_cvss(version='3.1', min_score=None, max_score=None, min_severity='',
+                      start_date=None, end_date=None, page=1, per_page=20):
+        """按CVSS版本、分数、严重程度和发布日期查询评分记录
+        
+        条件都落在nvd_cvss表的数值列上，例如
+        query_by_cvss('3.1', min_score=9.0, start_date=30天前)走(version, base_score)
+        或(version, published_date)索引范围扫描。结果按分数、发布日期倒序。
+        
+        参数:
+            version: CVSS版本，'2.0'、'3.0'、'3.1'或'4.0'，为空时不限
+            min_score/max_score: 分数范围（含边界）
+            min_severity: 最低严重程度，如'HIGH'
+            start_date/end_date: 发布日期范围（含边界）
+        """
+        query = NvdCvssMetric.query
+        if version:
+            query = query.filter(NvdCvssMetric.version == version)
+        if min_score is not None:
+            query = query.filter(NvdCvssMetric.base_score >= min_score)
+        if max_score is not None:
+            query = query.filter(NvdCvssMetric.base_score <= max_score)
+        if min_severity:
+            ordinal = SEVERITY_ORDINALS.get(min_severity.upper())
+            if ordinal is None:
+                raise ValueError(f"未知的严重程度: {min_severity}")
+            query = query.filter(NvdCvssMetric.severity_ordinal >= ordinal)
+        if start_date:
+            query = query.filter(NvdCvssMetric.published_date >= start_date)
+        if end_date:
+            query = query.filter(NvdCvssMetric.published_date <= end_date)
+        
+        query = query.order_by(NvdCvssMetric.base_score.desc(), NvdCvssMetric.published_date.desc())
+        return query.paginate(page=page, per_page=per_page, error_out=False)
+    
     @staticmethod
     def get_total_count():
         """获取总记录数"""
@@ -100,8 +207,11 @@ class NvdService:
         return NvdData.query.filter_by(cve_id=cve_id).first()
     
     @staticmethod
-    def import_from_tsv(file_path):
-        """从TSV文件导入数据"""
+    def import_from_tsv(file_path, batch_size=1000):
+        """从TSV文件导入数据（只插入不存在的CVE）
+        
+        读文件、解析字段和写入数据库通过IngestPipeline分阶段并行，每批查询一次已存在的CVE并提交一次。
+        """
         import csv
         try:
             # 确保在应用上下文中操作数据库
@@ -109,52 +219,53 @@ class NvdService:
                 raise RuntimeError("应用上下文未设置")
                 
             with _app.app_context():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter='\t')
-                    imported_count = 0
-                    skipped_count = 0
-                    duplicate_count = 0
+                counts = {'imported': 0, 'skipped': 0, 'duplicate': 0}
+                
+                def write_batch(batch):
+                    records, skipped_count = batch
+                    counts['skipped'] += skipped_count
+                    if not records:
+                        return
                     
-                    for row in reader:
-                        try:
-                            # 使用no_autoflush确保先检查记录是否存在
-                            with db.session.no_autoflush:
-                                # 检查是否已存在
-                                existing = NvdData.query.filter_by(cve_id=row['CVE ID']).first()
-                                if not existing:
-                                    # 创建新记录
-                                    nvd_data = NvdData(
-                                        cve_id=row['CVE ID'],
-                                        published_date=datetime.strptime(row['Published Date'], '%Y-%m-%d'),
-                                        last_modified_date=datetime.strptime(row['Last Modified Date'], '%Y-%m-%d'),
-                                        description=row['Description'],
-                                        base_score=float(row['Base Score']) if row['Base Score'] else None,
-                                        base_severity=row['Base Severity'],
-                                        vector_string=row['Vector String'],
-                                        vendor=row['Vendor'],
-                                        product=row['Product']
-                                    )
-                                    db.session.add(nvd_data)
-                                    imported_count += 1
-                                    
-                                    # 每100条记录提交一次
-                                    if imported_count % 100 == 0:
-                                        db.session.commit()
-                                else:
-                                    duplicate_count += 1
-                                    print(f"记录 {row['CVE ID']} 已存在，跳过")
-                        except Exception as row_error:
-                            # 记录错误但继续处理其他记录
-                            print(f"处理记录 {row.get('CVE ID', '未知')} 时出错: {str(row_error)}")
-                            skipped_count += 1
-                            # 清除当前会话中的错误记录
-                            db.session.rollback()
+                    # 检查本批中已存在的记录
+                    cve_ids = [record['cve_id'] for record in records]
+                    existing_ids = {
+                        cve_id for (cve_id,) in
+                        db.session.query(NvdData.cve_id).filter(NvdData.cve_id.in_(cve_ids))
+                    }
+                    new_records = []
+                    for record in records:
+                        if record['cve_id'] in existing_ids:
+                            counts['duplicate'] += 1
                             continue
+                        existing_ids.add(record['cve_id'])
+                        new_records.append(record)
                     
-                    # 提交剩余的记录
-                    db.session.commit()
-                    print(f"成功导入 {imported_count} 条记录，跳过 {skipped_count} 条错误记录，{duplicate_count} 条重复记录")
-                    return imported_count
+                    try:
+                        db.session.add_all(NvdData(**record) for record in new_records)
+                        db.session.commit()
+                        counts['imported'] += len(new_records)
+                    except Exception as batch_error:
+                        # 批量提交失败时逐条插入，跳过有问题的记录
+                        db.session.rollback()
+                        print(f"批量写入失败，改为逐条写入: {str(batch_error)}")
+                        for record in new_records:
+                            try:
+                                db.session.add(NvdData(**record))
+                                db.session.commit()
+                                counts['imported'] += 1
+                            except Exception as row_error:
+                                db.session.rollback()
+                                print(f"处理记录 {record['cve_id']} 时出错: {str(row_error)}")
+                                counts['skipped'] += 1
+                
+                with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                    reader = csv.reader(f, delimiter='\t')
+                    next(reader, None)  # 跳过表头
+                    IngestPipeline(parse=parse_tsv_rows, write=write_batch).run(iter_chunks(reader, batch_size))
+                
+                print(f"成功导入 {counts['imported']} 条记录，跳过 {counts['skipped']} 条错误记录，{counts['duplicate']} 条重复记录")
+                return counts['imported']
         except Exception as e:
             db.session.rollback()
             print(f"导入TSV文件时出错: {str(e)}")
@@ -163,8 +274,8 @@ class NvdService:
     @staticmethod
     def sync_from_api(start_date=None, end_date=None):
         """从NVD API同步数据"""
-        # 使用新的同步并保存TSV的方法
-        return NvdService.sync_and_save_tsv(start_date=start_date, end_date=end_date)
+        # 使用流式同步，逐页写入数据库
+        return NvdService.sync_streaming(start_date=start_date, end_date=end_date)
     
     @staticmethod
     def save_to_tsv(data, file_path):
@@ -174,35 +285,237 @@ class NvdService:
             # 确保目录存在
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
             
-            # 定义TSV文件的列名
-            fieldnames = ['CVE ID', 'Published Date', 'Last Modified Date', 'Description', 
-                         'Base Score', 'Base Severity', 'Vector String', 'Vendor', 'Product']
-            
             with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter='\t')
+                writer = csv.DictWriter(f, fieldnames=TSV_FIELDNAMES, delimiter='\t')
                 writer.writeheader()
                 
                 for item in data:
-                    writer.writerow({
-                        'CVE ID': item.get('cve_id', ''),
-                        'Published Date': item.get('published_date', '').strftime('%Y-%m-%d') if isinstance(item.get('published_date'), datetime) else item.get('published_date', ''),
-                        'Last Modified Date': item.get('last_modified_date', '').strftime('%Y-%m-%d') if isinstance(item.get('last_modified_date'), datetime) else item.get('last_modified_date', ''),
-                        'Description': item.get('description', ''),
-                        'Base Score': item.get('base_score', '') if item.get('base_score') is not None else '',
-                        'Base Severity': item.get('base_severity', ''),
-                        'Vector String': item.get('vector_string', ''),
-                        'Vendor': item.get('vendor', ''),
-                        'Product': item.get('product', '')
-                    })
+                    writer.writerow(to_tsv_row(item))
             
             return True
         except Exception as e:
             print(f"保存TSV文件时出错: {str(e)}")
             return False
     
+    @staticmethod
+    def _upsert_records(records, cpe_rows=None, cvss_rows=None, metrics=None):
+        """将一页记录批量写入nvd表（存在则更新），返回新增记录数
+        
+        先按content_hash比较本页CVE的已有内容，内容未变化的记录直接跳过，只有新增或变化的记录
+        进入INSERT ... ON DUPLICATE KEY UPDATE；重新导入大部分未变化的数据时只产生读操作。
+        content_hash只包含nvd表的列，API同步和TSV导入得到相同的哈希。
+        
+        传入cpe_rows/cvss_rows（extract_cpe_rows/extract_cvss_rows的结果）时，按child_hash比较子表内容，
+        在同一事务中只替换子表内容变化的CVE（包括只从TSV导入过、还没有子表记录的CVE）
+        在nvd_cpe/nvd_cvss表中的记录；TSV文件只含第一条CPE和一条评分，不传时不改动这两个表和child_hash。
+        传入metrics（SyncMetrics）时累计新增、更新和未变化的行数。
+        需要在应用上下文中调用。
+        """
+        if not records:
+            return 0
+        
+        # 按CVE分组子表数据，用于计算子表哈希
+        with_children = cpe_rows is not None or cvss_rows is not None
+        children = {}
+        for child_rows in (cpe_rows, cvss_rows):
+            for child in child_rows or ():
+                children.setdefault(child['cve_id'], []).append(child)
+        
+        update_columns = UPSERT_COLUMNS + ['content_hash']
+        if with_children:
+            update_columns.append('child_hash')
+        
+        rows = []
+        for item in records:
+            row = {column: item.get(column) for column in UPSERT_COLUMNS}
+            row['cve_id'] = item['cve_id']
+            # 哈希基于完整的NVD时间计算，需要在转换为DATE之前
+            row['content_hash'] = record_hash(item)
+            if with_children:
+                row['child_hash'] = child_hash(children.get(item['cve_id'], ()))
+            # nvd表的日期列为DATE类型
+            for column in ('published_date', 'last_modified_date'):
+                if isinstance(row[column], datetime):
+                    row[column] = row[column].date()
+            rows.append(row)
+        
+        try:
+            # 先查询本页中已存在的CVE及其内容哈希，用于跳过未变化的记录和统计新增数量
+            cve_ids = [row['cve_id'] for row in rows]
+            existing_hashes = {
+                cve_id: (content, children_hash) for cve_id, content, children_hash in
+                db.session.query(NvdData.cve_id, NvdData.content_hash, NvdData.child_hash)
+                .filter(NvdData.cve_id.in_(cve_ids))
+            }
+            changed_rows = []
+            child_changed_ids = set()
+            for row in rows:
+                existing = existing_hashes.get(row['cve_id'])
+                content_changed = existing is None or existing[0] != row['content_hash']
+                children_changed = with_children and (existing is None or existing[1] != row['child_hash'])
+                if content_changed or children_changed:
+                    changed_rows.append(row)
+                if children_changed:
+                    child_changed_ids.add(row['cve_id'])
+            if not changed_rows:
+                db.session.rollback()
+                if metrics:
+                    metrics.record_rows(unchanged=len(rows))
+                return 0
+            
+            stmt = mysql_insert(NvdData.__table__).values(changed_rows)
+            stmt = stmt.on_duplicate_key_update(
+                {column: stmt.inserted[column] for column in update_columns}
+            )
+            db.session.execute(stmt)
+            
+            # 替换子表内容变化的CVE的受影响产品和CVSS评分
+            if child_changed_ids:
+                for model, child_rows in ((NvdCpeMatch, cpe_rows), (NvdCvssMetric, cvss_rows)):
+                    if child_rows is None:
+                        continue
+                    model.query.filter(model.cve_id.in_(child_changed_ids)).delete(synchronize_session=False)
+                    child_rows = [row for row in child_rows if row['cve_id'] in child_changed_ids]
+                    if child_rows:
+                        db.session.execute(model.__table__.insert(), child_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        inserted_count = sum(1 for cve_id in cve_ids if cve_id not in existing_hashes)
+        if metrics:
+            metrics.record_rows(inserted=inserted_count, updated=len(changed_rows) - inserted_count,
+                                unchanged=len(rows) - len(changed_rows))
+        return inserted_count
+    
+    @staticmethod
+    def _build_query_params(start_date=None, end_date=None, date_field='pub'):
+        """构建NVD API查询参数
+        
+        date_field为'pub'时按发布时间过滤，为'lastMod'时按最后修改时间过滤
+        """
+        params = {
+            "resultsPerPage": BATCH_SIZE,
+            "startIndex": 0
+        }
+        
+        # 设置日期范围
+        if start_date:
+            params[f"{date_field}StartDate"] = start_date.isoformat() + "Z"
+        if end_date:
+            params[f"{date_field}EndDate"] = end_date.isoformat() + "Z"
+        return params
+    
+    @staticmethod
+    def sync_streaming(start_date=None, end_date=None, save_tsv=True, date_field='pub', resumable=True,
+                       metrics=None, progress=None):
+        """流式同步：每获取一页数据就立即解析并批量写入数据库
+        
+        与sync_and_save_tsv不同，不在内存中累积全部记录，也不再经过
+        "写TSV-读TSV-导入"的往返；TSV归档作为可选的旁路输出随每页追加写入。
+        指定了完整时间范围时每页提交后记录检查点，同一窗口中断后重新运行会从下一页继续。
+        
+        参数:
+            start_date: 开始时间
+            end_date: 结束时间
+            save_tsv: 是否同时写出YYYYMMDD.tsv归档文件
+            date_field: 日期过滤字段，'pub'(发布时间)或'lastMod'(最后修改时间)
+            resumable: 是否记录检查点以支持断点续传
+            metrics: SyncMetrics实例，记录请求、解析、写入的耗时和行数
+            progress: 每页写入后调用progress(已处理记录数, 总记录数, 新增记录数)，用于报告任务进度
+        
+        返回:
+            新增记录数，出错时返回-1
+        """
+        import csv
+        from app.nvd.client import NvdClient
+        tsv_file = None
+        try:
+            # 确保在应用上下文中操作数据库
+            if not _app:
+                raise RuntimeError("应用上下文未设置")
+            
+            with _app.app_context():
+                params = NvdService._build_query_params(start_date, end_date, date_field)
+                
+                # TSV归档文件路径 (格式: YYYYMMDD.tsv)
+                file_date = end_date if end_date else datetime.utcnow()
+                file_path = os.path.join(DOWNLOAD_DIR, file_date.strftime('%Y%m%d') + '.tsv')
+                writer = None
+                
+                # 从检查点恢复
+                checkpoint = None
+                start_index = 0
+                if resumable and start_date and end_date:
+                    checkpoint = DbCheckpoint(checkpoint_key('sync', date_field, start_date, end_date),
+                                              start_date, end_date)
+                    state = checkpoint.load()
+                    if state:
+                        start_index = state['next_start_index']
+                        print(f"从断点startIndex={start_index}继续同步")
+                
+                imported_count = 0
+                processed_count = start_index
+                
+                def write_page(page):
+                    nonlocal imported_count, processed_count, writer, tsv_file
+                    page_start, total_results, page_size, records, cpe_rows, cvss_rows = page
+                    # 定时同步期间失去主节点锁时停止，由新的主节点从检查点继续
+                    check_leader()
+                    
+                    if records:
+                        # 写入数据库
+                        imported_count += NvdService._upsert_records(records, cpe_rows, cvss_rows, metrics)
+                        processed_count += len(records)
+                        
+                        # 追加写入TSV归档，续传时接着已有文件写
+                        if save_tsv:
+                            if writer is None:
+                                append = start_index > 0 and os.path.exists(file_path)
+                                tsv_file = open(file_path, 'a' if append else 'w', encoding='utf-8', newline='')
+                                writer = csv.DictWriter(tsv_file, fieldnames=TSV_FIELDNAMES, delimiter='\t')
+                                if not append:
+                                    writer.writeheader()
+                            writer.writerows(to_tsv_row(item) for item in records)
+                            tsv_file.flush()
+                    
+                    if checkpoint:
+                        checkpoint.save(page_start + page_size, total_results)
+                    
+                    print(f"已处理 {processed_count}/{total_results} 条记录，新增 {imported_count} 条")
+                    if progress:
+                        progress(processed_count, total_results, imported_count)
+                
+                # 下载、解析、写入分阶段并行：提交本页时后续页面已在下载和解析
+                pipeline = IngestPipeline(parse=extract_api_page, write=write_page)
+                try:
+                    pipeline.run(NvdClient(metrics=metrics).iter_pages(params, start_index))
+                finally:
+                    if metrics:
+                        metrics.record_pipeline(pipeline)
+                
+                if checkpoint:
+                    checkpoint.clear()
+                
+                if writer is not None:
+                    print(f"成功保存TSV文件: {file_path}")
+                if processed_count == 0:
+                    print("没有获取到新的漏洞数据")
+                return imported_count
+        except Exception as e:
+            print(f"流式同步NVD数据时出错: {str(e)}")
+            if metrics:
+                metrics.record_error(e)
+            return -1
+        finally:
+            if tsv_file is not None:
+                tsv_file.close()
+    
     @staticmethod
     def sync_and_save_tsv(start_date=None, end_date=None):
         """同步数据并保存为TSV文件"""
+        from app.nvd.client import NvdClient
         try:
             # 确保在应用上下文中操作数据库
             if not _app:
@@ -210,123 +523,13 @@ class NvdService:
                 
             with _app.app_context():
                 # 设置查询参数
-                params = {
-                    "resultsPerPage": BATCH_SIZE,
-                    "startIndex": 0
-                }
-                
-                # 设置日期范围
-                if start_date:
-                    params["pubStartDate"] = start_date.isoformat() + "Z"
-                if end_date:
-                    params["pubEndDate"] = end_date.isoformat() + "Z"
+                params = NvdService._build_query_params(start_date, end_date)
                 
-                total_results = None
                 all_vulnerabilities = []
                 
-                while total_results is None or params["startIndex"] < total_results:
-                    # 发送请求
-                    import requests
-                    response = requests.get(NVD_API_URL, params=params, timeout=60)
-                    response.raise_for_status()
-                    
-                    data = response.json()
-                    
-                    # 获取总数
-                    if total_results is None:
-                        total_results = data.get("totalResults", 0)
-                    
+                for _, _, data in NvdClient().iter_pages(params):
                     # 处理漏洞数据
-                    vulnerabilities = data.get("vulnerabilities", [])
-                    for vuln in vulnerabilities:
-                        cve = vuln.get("cve", {})
-                        
-                        # 获取基本信息
-                        cve_id = cve.get("id", "")
-                        published_date_str = cve.get("published", "")
-                        last_modified_date_str = cve.get("lastModified", "")
-                        
-                        if not cve_id or not published_date_str or not last_modified_date_str:
-                            continue
-                        
-                        # 解析日期 - 适配NVD API返回的格式
-                        try:
-                            # 尝试解析带Z的格式
-                            published_date = datetime.strptime(published_date_str, '%Y-%m-%dT%H:%M:%S.%fZ')
-                            last_modified_date = datetime.strptime(last_modified_date_str, '%Y-%m-%dT%H:%M:%S.%fZ')
-                        except ValueError:
-                            # 如果失败，尝试解析不带Z的格式
-                            published_date = datetime.strptime(published_date_str, '%Y-%m-%dT%H:%M:%S.%f')
-                            last_modified_date = datetime.strptime(last_modified_date_str, '%Y-%m-%dT%H:%M:%S.%f')
-                        
-                        # 获取描述并清理特殊Unicode字符
-                        descriptions = cve.get("descriptions", [])
-                        description = descriptions[0].get("value", "") if descriptions else ""
-                        # 替换可能导致MySQL编码问题的特殊字符
-                        description = description.replace('‑', '-')  # 替换非标准连字符
-                        description = description.replace('–', '-')  # 替换长连字符
-                        description = description.replace('—', '-')  # 替换破折号
-                        # 可以根据需要添加更多的字符替换规则
-                        
-                        # 获取评分信息
-                        base_score = None
-                        base_severity = ""
-                        vector_string = ""
-                        
-                        metrics = cve.get("metrics", {})
-                        # 尝试获取CVSS v3评分
-                        if "cvssMetricV31" in metrics and metrics["cvssMetricV31"]:
-                            cvss_data = metrics["cvssMetricV31"][0].get("cvssData", {})
-                            base_score = cvss_data.get("baseScore")
-                            base_severity = cvss_data.get("baseSeverity", "")
-                            vector_string = cvss_data.get("vectorString", "")
-                        elif "cvssMetricV30" in metrics and metrics["cvssMetricV30"]:
-                            cvss_data = metrics["cvssMetricV30"][0].get("cvssData", {})
-                            base_score = cvss_data.get("baseScore")
-                            base_severity = cvss_data.get("baseSeverity", "")
-                            vector_string = cvss_data.get("vectorString", "")
-                        # 尝试获取CVSS v2评分
-                        elif "cvssMetricV2" in metrics and metrics["cvssMetricV2"]:
-                            cvss_data = metrics["cvssMetricV2"][0].get("cvssData", {})
-                            base_score = cvss_data.get("baseScore")
-                            base_severity = cvss_data.get("baseSeverity", "")
-                            vector_string = cvss_data.get("vectorString", "")
-                        
-                        # 获取厂商和产品信息
-                        vendor = ""
-                        product = ""
-                        configurations = cve.get("configurations", [])
-                        if configurations:
-                            nodes = configurations[0].get("nodes", [])
-                            if nodes:
-                                cpe_match = nodes[0].get("cpeMatch", [])
-                                if cpe_match:
-                                    cpe_uri = cpe_match[0].get("criteria", "")
-                                    if cpe_uri:
-                                        cpe_parts = cpe_uri.split(':')
-                                        if len(cpe_parts) >= 5:
-                                            vendor = cpe_parts[3]
-                                            product = cpe_parts[4]
-                        
-                        # 添加到列表
-                        all_vulnerabilities.append({
-                            'cve_id': cve_id,
-                            'published_date': published_date,
-                            'last_modified_date': last_modified_date,
-                            'description': description,
-                            'base_score': base_score,
-                            'base_severity': base_severity,
-                            'vector_string': vector_string,
-                            'vendor': vendor,
-                            'product': product
-                        })
-                    
-                    # 更新起始索引
-                    params["startIndex"] += BATCH_SIZE
-                    
-                    # 添加延迟，符合NVD API使用政策
-                    if total_results > params["startIndex"]:
-                        time.sleep(REQUEST_DELAY)
+                    all_vulnerabilities.extend(extract_records(data.get("vulnerabilities", [])))
                 
                 # 保存为TSV文件
                 if all_vulnerabilities:
@@ -355,30 +558,307 @@ class NvdService:
             print(f"同步数据并保存为TSV文件时出错: {str(e)}")
             return 0
 
+    @staticmethod
+    def replay_from_cache(cache_dir=None, since=None):
+        """离线重放NVD分页缓存：不访问网络，重新抽取记录并写入数据库
+        
+        修改解析逻辑后可用于重建nvd表。只重放CVE接口的页面，跳过变更历史接口的页面。
+        
+        参数:
+            cache_dir: 缓存目录，默认使用NVD_PAGE_CACHE_DIR或项目下的nvd_page_cache
+            since: 只重放该时间之后获取的页面
+        
+        返回:
+            (处理的页面数, 处理的记录数, 新增记录数)
+        """
+        if not _app:
+            raise RuntimeError("应用上下文未设置")
+        
+        cache = NvdPageCache(cache_dir) if cache_dir else (get_page_cache() or NvdPageCache())
+        page_count = 0
+        processed_count = 0
+        imported_count = 0
+        
+        def write_page(page):
+            nonlocal page_count, processed_count, imported_count
+            _, _, _, records, cpe_rows, cvss_rows = page
+            imported_count += NvdService._upsert_records(records, cpe_rows, cvss_rows)
+            processed_count += len(records)
+            page_count += 1
+            
+            if page_count % 10 == 0:
+                print(f"已重放 {page_count} 页，{processed_count} 条记录")
+        
+        with _app.app_context():
+            # 读取解压缓存文件与写入数据库并行
+            pages = ((0, 0, page['response']) for page in cache.iter_pages(since=since) if is_cve_page(page))
+            IngestPipeline(parse=extract_api_page, write=write_page).run(pages)
+        
+        print(f"缓存重放完成: {page_count} 页，{processed_count} 条记录，新增 {imported_count} 条")
+        return page_count, processed_count, imported_count
+    
+    @staticmethod
+    def import_from_feeds(path, page_size=FEED_PAGE_SIZE, parse_workers=0):
+        """从本地NVD JSON 2.0数据源文件（nvdcve-2.0-*.json或.json.gz）导入，用于冷启动时初始化nvd表
+        
+        文件按块流式解析，每page_size条作为一页经过与API同步相同的抽取和批量写入流程，
+        内存占用不随文件大小增长。
+        
+        参数:
+            path: 数据源文件或包含数据源文件的目录（镜像目录）
+            page_size: 每页条数
+            parse_workers: 大于0时使用进程池并行抽取
+        
+        返回:
+            (处理的文件数, 处理的记录数, 新增记录数)
+        """
+        if not _app:
+            raise RuntimeError("应用上下文未设置")
+        
+        file_paths = iter_feed_files(path)
+        processed_count = 0
+        imported_count = 0
+        
+        def write_page(page):
+            nonlocal processed_count, imported_count
+            _, _, _, records, cpe_rows, cvss_rows = page
+            imported_count += NvdService._upsert_records(records, cpe_rows, cvss_rows)
+            processed_count += len(records)
+        
+        with _app.app_context():
+            for file_path in file_paths:
+                file_start = processed_count
+                start_time = time.time()
+                # 解压和解析文件与写入数据库并行
+                IngestPipeline(parse=extract_api_page, write=write_page, parse_workers=parse_workers,
+                               use_processes=parse_workers > 0).run(iter_feed_pages(file_path, page_size))
+                print(f"已导入 {os.path.basename(file_path)}: {processed_count - file_start} 条记录，"
+                      f"耗时 {time.time() - start_time:.1f} 秒")
+        
+        print(f"数据源导入完成: {len(file_paths)} 个文件，{processed_count} 条记录，新增 {imported_count} 条")
+        return len(file_paths), processed_count, imported_count
+    
+    @staticmethod
+    def get_watermark(name=WATERMARK_NAME):
+        """获取增量同步水位线，需要在应用上下文中调用"""
+        return SyncWatermark.query.filter_by(name=name).first()
+    
+    @staticmethod
+    def _save_watermark(last_mod_start, last_mod_end, name=WATERMARK_NAME):
+        """持久化增量同步水位线，需要在应用上下文中调用"""
+        try:
+            watermark = NvdService.get_watermark(name)
+            if not watermark:
+                watermark = SyncWatermark(name=name)
+                db.session.add(watermark)
+            watermark.last_mod_start = last_mod_start
+            watermark.last_mod_end = last_mod_end
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    @staticmethod
+    def _pending_window_end(date_field, window_start):
+        """返回从window_start开始、上次没有完成（留有检查点）的同步分段的结束时间，没有时返回None
+        
+        需要在应用上下文中调用。
+        """
+        prefix = checkpoint_key('sync', date_field, window_start, None)
+        checkpoint = SyncCheckpoint.query.filter(SyncCheckpoint.key.like(prefix + '%')) \
+            .order_by(SyncCheckpoint.id.desc()).first()
+        if not checkpoint:
+            return None
+        return datetime.strptime(checkpoint.key[len(prefix):], '%Y%m%dT%H%M%S')
+    
+    @staticmethod
+    def sync_incremental(default_days=1, metrics=None):
+        """基于lastModified水位线的增量同步
+        
+        只请求上一次成功同步之后修改过的记录（包括被重新评分的旧CVE）。
+        时间跨度超过NVD限制时按MAX_DATE_RANGE_DAYS分段请求，每段成功后推进水位线，
+        失败时水位线停留在最后一个成功的分段，下次从该处继续。
+        每页提交后记录检查点：分段中途停止（出错或失去主节点锁）后，下次同步沿用该分段原来的结束时间，
+        从检查点的下一页继续，不重新请求已写入的页。
+        
+        参数:
+            default_days: 尚无水位线时向前回溯的天数
+            metrics: SyncMetrics实例，累计各分段的性能数据
+        
+        返回:
+            (新增记录数, 开始时间, 结束时间)，出错时新增记录数为-1
+        """
+        if not _app:
+            raise RuntimeError("应用上下文未设置")
+        
+        # 水位线和检查点键只保存到秒，结束时间取整秒，下次同步的开始时间才与本次查询的结束时间一致
+        end_date = datetime.utcnow().replace(microsecond=0)
+        with _app.app_context():
+            watermark = NvdService.get_watermark()
+            if watermark and watermark.last_mod_end:
+                start_date = watermark.last_mod_end
+            else:
+                start_date = end_date - timedelta(days=default_days)
+            resume_end = NvdService._pending_window_end('lastMod', start_date)
+        
+        imported_count = 0
+        window_start = start_date
+        while window_start < end_date:
+            # 上次中途停止的分段按原来的结束时间续传，检查点键才能对应
+            window_end = resume_end or min(window_start + timedelta(days=MAX_DATE_RANGE_DAYS), end_date)
+            resume_end = None
+            
+            # 增量数据只是当日归档的一部分，不写TSV以免覆盖当天的归档文件
+            count = NvdService.sync_streaming(start_date=window_start, end_date=window_end,
+                                              save_tsv=False, date_field='lastMod', resumable=True,
+                                              metrics=metrics)
+            if count < 0:
+                return -1, start_date, end_date
+            
+            with _app.app_context():
+                NvdService._save_watermark(window_start, window_end)
+            imported_count += count
+            window_start = window_end
+        
+        return imported_count, start_date, end_date
+    
+    @staticmethod
+    def _count_pages(client, start_date, end_date):
+        """按lastModified窗口分页同步[start_date, end_date)需要的请求数
+        
+        每个MAX_DATE_RANGE_DAYS分段请求一条记录读取totalResults，没有记录的分段也按一次请求计算。
+        """
+        page_count = 0
+        window_start = start_date
+        while window_start < end_date:
+            window_end = min(window_start + timedelta(days=MAX_DATE_RANGE_DAYS), end_date)
+            params = NvdService._build_query_params(window_start, window_end, 'lastMod')
+            params['resultsPerPage'] = 1
+            total_results = client.fetch_page(params).get('totalResults', 0)
+            page_count += max(1, -(-total_results // BATCH_SIZE))
+            window_start = window_end
+        return page_count
+    
+    @staticmethod
+    def sync_from_history(start_date=None, end_date=None, default_days=1, metrics=None):
+        """基于NVD变更历史（cvehistory）的增量同步
+        
+        读取时间范围内的变更事件，按请求数选择更新方式：按cveId逐条拉取每个CVE需要一次请求，
+        按lastModified窗口分页每次请求最多返回BATCH_SIZE条记录。只有变化的CVE数少于分页同步
+        需要的页数时才逐条拉取，否则按lastModified窗口分页同步。
+        
+        参数:
+            start_date: 开始时间，为空时从变更历史水位线开始（没有水位线时回溯default_days天），
+                        成功后推进水位线
+            end_date: 结束时间，默认当前UTC时间
+            default_days: 尚无水位线时向前回溯的天数
+            metrics: SyncMetrics实例，记录变更历史和CVE请求的性能数据
+        
+        返回:
+            (新增记录数, 开始时间, 结束时间)，出错时新增记录数为-1
+        """
+        from app.nvd.client import NvdClient
+        from app.nvd.history import NvdHistoryClient, iter_cve_pages
+        if not _app:
+            raise RuntimeError("应用上下文未设置")
+        
+        use_watermark = start_date is None
+        end_date = (end_date or datetime.utcnow()).replace(microsecond=0)
+        if use_watermark:
+            with _app.app_context():
+                watermark = NvdService.get_watermark(HISTORY_WATERMARK_NAME)
+                if watermark and watermark.last_mod_end:
+                    start_date = watermark.last_mod_end
+                else:
+                    start_date = end_date - timedelta(days=default_days)
+        
+        try:
+            changes = NvdHistoryClient(metrics=metrics).collect_changes(start_date, end_date)
+            print(f"获取到 {changes.event_count} 个变更事件，涉及 {len(changes.cve_ids)} 个CVE"
+                  + (f"（{changes.summary()}）" if changes.event_count else ""))
+            
+            # 逐条拉取需要的请求数等于变化的CVE数，不少于分页同步的页数时改为分页同步
+            page_count = NvdService._count_pages(NvdClient(metrics=metrics), start_date, end_date) \
+                if changes.cve_ids else 0
+            if changes.cve_ids and len(changes.cve_ids) >= page_count:
+                print(f"变化的CVE有{len(changes.cve_ids)}个，按lastModified分页同步只需 {page_count} 次请求，"
+                      f"改为分页同步")
+                imported_count = 0
+                window_start = start_date
+                while window_start < end_date:
+                    window_end = min(window_start + timedelta(days=MAX_DATE_RANGE_DAYS), end_date)
+                    count = NvdService.sync_streaming(start_date=window_start, end_date=window_end,
+                                                      save_tsv=False, date_field='lastMod', resumable=False,
+                                                      metrics=metrics)
+                    if count < 0:
+                        return -1, start_date, end_date
+                    imported_count += count
+                    window_start = window_end
+            else:
+                imported_count = 0
+                processed_count = 0
+                
+                def write_page(page):
+                    nonlocal imported_count, processed_count
+                    _, _, _, records, cpe_rows, cvss_rows = page
+                    check_leader()
+                    imported_count += NvdService._upsert_records(records, cpe_rows, cvss_rows, metrics)
+                    processed_count += len(records)
+                
+                with _app.app_context():
+                    # 逐条拉取变化的CVE，下载、解析、写入分阶段并行
+                    pipeline = IngestPipeline(parse=extract_api_page, write=write_page)
+                    try:
+                        pipeline.run(iter_cve_pages(NvdClient(metrics=metrics), changes.cve_ids))
+                    finally:
+                        if metrics:
+                            metrics.record_pipeline(pipeline)
+                print(f"已更新 {processed_count} 个变化的CVE，新增 {imported_count} 条")
+            
+            if use_watermark:
+                with _app.app_context():
+                    NvdService._save_watermark(start_date, end_date, HISTORY_WATERMARK_NAME)
+            return imported_count, start_date, end_date
+        except Exception as e:
+            print(f"基于变更历史同步NVD数据时出错: {str(e)}")
+            if metrics:
+                metrics.record_error(e)
+            return -1, start_date, end_date
+
 # 定时任务相关函数
-def run_scheduled_tasks():
-    """运行所有定时任务"""
+def run_scheduled_tasks(leader):
+    """运行所有定时任务，只有主节点进程实际执行同步"""
+    import schedule
+    # 使用独立的调度器，与CISA的调度线程互不影响
+    scheduler = schedule.Scheduler()
+    
     # 设置每6小时同步一次最新数据
-    schedule.every(6).hours.do(sync_daily_data)
+    scheduler.every(6).hours.do(leader_only(leader, sync_daily_data))
     
     # 不再在这里进行初始同步，改为在延迟启动函数中执行
     
     # 循环执行调度任务
     while True:
-        schedule.run_pending()
+        scheduler.run_pending()
         time.sleep(60)  # 每分钟检查一次
 
+def run_incremental_sync(metrics=None):
+    """按NVD_DAILY_SYNC_MODE选择增量同步方式：'history'使用变更历史，其他使用lastModified水位线"""
+    if DAILY_SYNC_MODE == 'history':
+        return NvdService.sync_from_history(metrics=metrics)
+    return NvdService.sync_incremental(metrics=metrics)
+
 def sync_daily_data():
-    """同步最近一天的数据"""
+    """增量同步NVD数据"""
     try:
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=1)
-        
-        print(f"开始同步NVD数据: {start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}")
-        imported_count = NvdService.sync_and_save_tsv(start_date=start_date, end_date=end_date)
+        print("开始增量同步NVD数据...")
+        metrics = SyncMetrics()
+        imported_count, start_date, end_date = run_incremental_sync(metrics)
+        print(f"同步时间范围: {start_date.strftime('%Y-%m-%d %H:%M:%S')} 至 {end_date.strftime('%Y-%m-%d %H:%M:%S')}")
         
-        # 记录自动同步日志
-        sync_log_service.add_log('auto', imported_count, start_date, end_date)
+        # 记录自动同步日志和本次运行的性能数据
+        with _app.app_context():
+            sync_log_service.add_log('auto', imported_count, start_date, end_date, metrics=metrics)
         
         print(f"NVD数据同步完成，新增 {imported_count} 条记录")
     except Exception as e:
@@ -391,30 +871,64 @@ def sync_on_startup():
         print("服务启动后将在1分钟后开始同步NVD数据...")
         time.sleep(60)
         
-        # 执行同步操作
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=1)
+        # 执行增量同步操作
+        print("[延迟同步] 开始增量同步NVD数据...")
+        metrics = SyncMetrics()
+        imported_count, start_date, end_date = run_incremental_sync(metrics)
         
-        print(f"[延迟同步] 开始同步NVD数据: {start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}")
-        imported_count = NvdService.sync_and_save_tsv(start_date=start_date, end_date=end_date)
-        
-        # 记录自动同步日志（已包含在sync_and_save_tsv中）
-        sync_log_service.add_log('startup', imported_count, start_date, end_date)
+        # 记录自动同步日志和本次运行的性能数据
+        with _app.app_context():
+            sync_log_service.add_log('startup', imported_count, start_date, end_date, metrics=metrics)
         
         print(f"[延迟同步] NVD数据同步完成，新增 {imported_count} 条记录")
     except Exception as e:
         print(f"[延迟同步] NVD数据同步任务执行失败: {str(e)}")
 
+def run_sync_job(params, progress):
+    """后台任务：按时间范围流式同步NVD数据并记录同步日志（由任务执行器调用）
+    
+    参数:
+        params: {'start_date': 'YYYY-MM-DD', 'end_date': 'YYYY-MM-DD'}，为空时同步截至当前时间的最近7天
+        progress: 进度回调
+    """
+    if not _app:
+        NvdService.set_app(current_app._get_current_object())
+    if params.get('start_date') and params.get('end_date'):
+        start_date = datetime.fromisoformat(params['start_date'])
+        end_date = datetime.fromisoformat(params['end_date'])
+    else:
+        # 默认时间窗口在执行时计算，包含今天已发布的数据
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=7)
+    
+    def report(processed_count, total_results, imported_count):
+        progress(processed_count, total_results, f"已处理 {processed_count}/{total_results} 条记录，新增 {imported_count} 条")
+    
+    progress(message=f"正在同步 {start_date:%Y-%m-%d %H:%M} 至 {end_date:%Y-%m-%d %H:%M} 的NVD数据")
+    metrics = SyncMetrics()
+    imported_count = NvdService.sync_streaming(start_date=start_date, end_date=end_date, metrics=metrics,
+                                               progress=report)
+    sync_log_service.add_log('manual', imported_count, start_date, end_date, metrics=metrics)
+    if imported_count < 0:
+        raise RuntimeError(metrics.error or "NVD数据同步失败")
+    return {'imported': imported_count, 'inserted': metrics.rows['inserted'],
+            'updated': metrics.rows['updated'], 'unchanged': metrics.rows['unchanged']}
+
 def start_scheduler(app):
-    """启动调度器"""
+    """启动调度器
+    
+    由后台进程（worker.py）调用。运行多个后台进程时通过MySQL命名锁选出一个主节点进程
+    执行定时同步和启动同步，避免多个进程同时请求NVD API并重复写入。
+    """
     NvdService.set_app(app)
+    leader = get_leader_lock(app, 'nvd-scheduler')
     
     # 启动定时任务线程
-    scheduler_thread = Thread(target=run_scheduled_tasks, daemon=True)
+    scheduler_thread = Thread(target=run_scheduled_tasks, args=(leader,), daemon=True)
     scheduler_thread.start()
     print("NVD数据同步调度器已启动")
     
     # 启动延迟同步线程（服务启动后1分钟执行）
-    startup_sync_thread = Thread(target=sync_on_startup, daemon=True)
+    startup_sync_thread = Thread(target=leader_only(leader, sync_on_startup), daemon=True)
     startup_sync_thread.start()
     print("启动时延迟同步线程已启动，将在1分钟后执行同步操作")
\ No newline at end of file
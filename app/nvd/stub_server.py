@@ -0,0 +1,292 @@
+"""本地NVD API替身服务
+
+在本机端口上实现CVE API 2.0和变更历史（cvehistory 2.0）接口的查询参数：
+cveId、pubStartDate/pubEndDate、lastModStartDate/lastModEndDate、changeStartDate/changeEndDate、
+eventName、startIndex、resultsPerPage，响应中返回totalResults。数据来自内存中的漏洞列表，
+可以由月度TSV文件或NVD分页缓存生成；变更事件可以从JSON文件读取，或按记录的最后修改时间生成。
+
+可以注入响应延迟和429/503错误，用于在没有NVD服务的环境下验证同步逻辑，
+并离线测量限速、退避重试和导入流水线的吞吐量。
+
+用法:
+    vulnerabilities = list(load_tsv_vulnerabilities(paths))
+    server = NvdStubServer(vulnerabilities, changes_from_vulnerabilities(vulnerabilities),
+                           latency=0.2, error_rate=0.05).start()
+    client = NvdClient(api_url=server.cves_url)
+    ...
+    server.stop()
+"""
+import bisect
+import csv
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from app.nvd.extractor import record_from_tsv_fields, to_nvd_vulnerability
+from app.nvd.page_cache import NvdPageCache
+
+CVES_PATH = '/rest/json/cves/2.0'
+HISTORY_PATH = '/rest/json/cvehistory/2.0'
+
+# 与NVD一致的每页默认条数、上限和单次查询的最大日期跨度
+DEFAULT_RESULTS_PER_PAGE = 2000
+MAX_CVE_RESULTS_PER_PAGE = 2000
+MAX_HISTORY_RESULTS_PER_PAGE = 5000
+MAX_RANGE_DAYS = 120
+
+# 默认注入的错误状态码
+DEFAULT_ERROR_STATUSES = (429, 503)
+
+def _parse_date(value):
+    """解析查询参数或记录中的ISO时间，忽略末尾的Z和时区"""
+    value = value.rstrip('Z')
+    if len(value) > 19 and value[19] in '+-':
+        value = value[:19]
+    return datetime.fromisoformat(value)
+
+def _in_range(value, start, end):
+    if not value:
+        return False
+    value = _parse_date(value)
+    return start <= value <= end
+
+def load_tsv_vulnerabilities(file_paths):
+    """把月度TSV文件（YYYYMM.tsv）还原为API 2.0格式的漏洞记录"""
+    for file_path in file_paths:
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f, delimiter='\t')
+            next(reader, None)
+            for fields in reader:
+                try:
+                    record = record_from_tsv_fields(fields)
+                except ValueError:
+                    continue
+                if record:
+                    yield to_nvd_vulnerability(record)
+
+def load_cached_vulnerabilities(cache_dir):
+    """读取NVD分页缓存中的原始漏洞记录，按获取时间顺序返回"""
+    for page in NvdPageCache(cache_dir).iter_pages():
+        for vuln in page['response'].get('vulnerabilities', []):
+            yield vuln
+
+def load_changes(file_path):
+    """读取变更历史接口响应格式的JSON文件（含cveChanges数组），也接受直接的事件列表"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('cveChanges', []) if isinstance(data, dict) else data
+
+def changes_from_vulnerabilities(vulnerabilities):
+    """按每条记录的最后修改时间生成一个变更事件，用于没有真实变更历史时演练变更历史同步
+    
+    发布时间与最后修改时间相同的记录视为新收录（New CVE Received），其余视为修改（CVE Modified）。
+    """
+    changes = []
+    for vuln in vulnerabilities:
+        cve = vuln.get('cve', {})
+        if not cve.get('id') or not cve.get('lastModified'):
+            continue
+        changes.append({'change': {
+            'cveId': cve['id'],
+            'eventName': 'New CVE Received' if cve.get('published') == cve['lastModified'] else 'CVE Modified',
+            'cveChangeId': f"{cve['id']}-{cve['lastModified']}",
+            'sourceIdentifier': cve.get('sourceIdentifier', 'nvd@nist.gov'),
+            'created': cve['lastModified'],
+            'details': []
+        }})
+    return changes
+
+class NvdStubServer:
+    """基于ThreadingHTTPServer的NVD接口替身"""
+    
+    def __init__(self, vulnerabilities=(), changes=(), host='127.0.0.1', port=0,
+                 latency=0.0, jitter=0.0, error_rate=0.0, error_statuses=DEFAULT_ERROR_STATUSES,
+                 retry_after=None, seed=None):
+        """
+        参数:
+            vulnerabilities: API 2.0格式的漏洞记录（{'cve': {...}}），同一CVE以最后出现的为准
+            changes: 变更历史格式的事件列表（{'change': {...}}）
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            latency: 每个请求的固定延迟（秒）
+            jitter: 在固定延迟之外再随机增加0~jitter秒
+            error_rate: 以该概率返回error_statuses中的错误状态码
+            error_statuses: 注入的错误状态码
+            retry_after: 注入错误时返回的Retry-After（秒），为None时不返回
+            seed: 随机数种子，便于复现同一组注入的错误
+        """
+        by_id = {}
+        for vuln in vulnerabilities:
+            cve_id = vuln.get('cve', {}).get('id')
+            if cve_id:
+                by_id[cve_id] = vuln
+        # 按发布时间排序，发布时间范围查询用二分查找定位
+        self.vulnerabilities = sorted(by_id.values(), key=lambda v: v['cve'].get('published', ''))
+        self._by_id = by_id
+        self._published = [_parse_date(v['cve']['published']) if v['cve'].get('published') else datetime.min
+                           for v in self.vulnerabilities]
+        self.changes = list(changes)
+        
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        
+        self.request_count = 0
+        self.status_counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+    
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    @property
+    def cves_url(self):
+        return self.base_url + CVES_PATH
+    
+    @property
+    def history_url(self):
+        return self.base_url + HISTORY_PATH
+    
+    def start(self):
+        """在后台线程中开始监听，返回自身"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='nvd-stub', daemon=True)
+        self._thread.start()
+        return self
+    
+    def serve_forever(self):
+        """在当前线程中监听，直到被中断"""
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+    
+    def _handle(self, handler):
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            inject_error = self.error_rate and self._random.random() < self.error_rate
+            status = self._random.choice(self.error_statuses) if inject_error else None
+        
+        if delay:
+            time.sleep(delay)
+        if status:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else None
+            self._send(handler, status, {'message': '注入的错误'}, headers)
+            return
+        
+        url = urlparse(handler.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == CVES_PATH:
+                body = self._query_cves(params)
+            elif url.path == HISTORY_PATH:
+                body = self._query_changes(params)
+            else:
+                self._send(handler, 404, {'message': 'Not Found'})
+                return
+        except ValueError as e:
+            # NVD对非法参数返回404
+            self._send(handler, 404, {'message': str(e)})
+            return
+        self._send(handler, 200, body)
+    
+    def _send(self, handler, status, body, headers=None):
+        with self._lock:
+            self.status_counts[status] += 1
+        payload = json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
+    
+    @staticmethod
+    def _date_range(params, prefix):
+        start = params.get(prefix + 'StartDate')
+        end = params.get(prefix + 'EndDate')
+        if bool(start) != bool(end):
+            raise ValueError(f"{prefix}StartDate和{prefix}EndDate必须同时提供")
+        if not start:
+            return None
+        start, end = _parse_date(start), _parse_date(end)
+        if end - start > timedelta(days=MAX_RANGE_DAYS):
+            raise ValueError(f"{prefix}日期跨度不能超过{MAX_RANGE_DAYS}天")
+        return start, end
+    
+    @staticmethod
+    def _page(items, params, items_key, max_per_page, response_format):
+        start_index = int(params.get('startIndex', 0))
+        per_page = int(params.get('resultsPerPage', DEFAULT_RESULTS_PER_PAGE))
+        if start_index < 0 or per_page < 1 or per_page > max_per_page:
+            raise ValueError(f"resultsPerPage必须在1到{max_per_page}之间")
+        return {
+            'resultsPerPage': len(items[start_index:start_index + per_page]),
+            'startIndex': start_index,
+            'totalResults': len(items),
+            'format': response_format,
+            'version': '2.0',
+            'timestamp': datetime.utcnow().isoformat(timespec='milliseconds'),
+            items_key: items[start_index:start_index + per_page]
+        }
+    
+    def _query_cves(self, params):
+        cve_id = params.get('cveId')
+        if cve_id:
+            items = [self._by_id[cve_id]] if cve_id in self._by_id else []
+        else:
+            items = self.vulnerabilities
+        
+        pub_range = NvdStubServer._date_range(params, 'pub')
+        if pub_range and not cve_id:
+            low = bisect.bisect_left(self._published, pub_range[0])
+            high = bisect.bisect_right(self._published, pub_range[1])
+            items = items[low:high]
+        elif pub_range:
+            items = [v for v in items if _in_range(v['cve'].get('published'), *pub_range)]
+        
+        last_mod_range = NvdStubServer._date_range(params, 'lastMod')
+        if last_mod_range:
+            items = [v for v in items if _in_range(v['cve'].get('lastModified'), *last_mod_range)]
+        return NvdStubServer._page(items, params, 'vulnerabilities', MAX_CVE_RESULTS_PER_PAGE, 'NVD_CVE')
+    
+    def _query_changes(self, params):
+        items = self.changes
+        cve_id = params.get('cveId')
+        if cve_id:
+            items = [c for c in items if c.get('change', {}).get('cveId') == cve_id]
+        event_name = params.get('eventName')
+        if event_name:
+            items = [c for c in items if c.get('change', {}).get('eventName') == event_name]
+        date_range = NvdStubServer._date_range(params, 'change')
+        if date_range:
+            items = [c for c in items if _in_range(c.get('change', {}).get('created'), *date_range)]
+        return NvdStubServer._page(items, params, 'cveChanges', MAX_HISTORY_RESULTS_PER_PAGE, 'NVD_CVEHistory')
@@ -0,0 +1,88 @@
+"""同步运行的性能数据收集
+
+一次同步（手动、定时或启动时）创建一个SyncMetrics，传给NvdClient、IngestPipeline和
+NvdService._upsert_records，分别累计HTTP请求、解析/写入耗时和行数；同步结束后
+由sync_log_service.add_log与日志条目一起写入sync_runs表。
+获取、解析、写入阶段在不同线程中运行，所有累计操作都加锁。
+"""
+import json
+import threading
+from datetime import datetime
+
+# 每次运行最多保存的每页HTTP耗时数
+MAX_PAGE_LATENCIES = 1000
+
+class SyncMetrics:
+    """一次同步运行的性能计数器（线程安全）"""
+    
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self.pages = 0
+        self.bytes = 0
+        self.http_time = 0.0
+        self.page_latencies = []
+        self.retries = 0
+        self.parse_time = 0.0
+        self.write_time = 0.0
+        self.rows = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.error = None
+        self._lock = threading.Lock()
+    
+    def record_page(self, latency, size):
+        """记录一次成功的HTTP请求：耗时（秒）和响应体字节数"""
+        with self._lock:
+            self.pages += 1
+            self.bytes += size
+            self.http_time += latency
+            if len(self.page_latencies) < MAX_PAGE_LATENCIES:
+                self.page_latencies.append(round(latency * 1000))
+    
+    def record_retry(self, latency=0.0):
+        """记录一次需要重试的请求（429/503或网络错误）"""
+        with self._lock:
+            self.retries += 1
+            self.http_time += latency
+    
+    def record_pipeline(self, pipeline):
+        """累计一次IngestPipeline运行的解析和写入耗时"""
+        with self._lock:
+            self.parse_time += pipeline.parse_time
+            self.write_time += pipeline.write_time
+    
+    def record_rows(self, inserted=0, updated=0, unchanged=0):
+        with self._lock:
+            self.rows['inserted'] += inserted
+            self.rows['updated'] += updated
+            self.rows['unchanged'] += unchanged
+    
+    def record_error(self, error):
+        with self._lock:
+            self.error = str(error)
+    
+    def status(self, count):
+        """根据同步返回的新增记录数判断运行状态：'failed'、'empty'或'success'"""
+        if count < 0 or self.error:
+            return 'failed'
+        if not self.pages or not sum(self.rows.values()):
+            return 'empty'
+        return 'success'
+    
+    def to_columns(self, count):
+        """转换为SyncRun的列值"""
+        with self._lock:
+            return {
+                'status': self.status(count),
+                'error': self.error[:500] if self.error else None,
+                'started_at': self.started_at,
+                'finished_at': datetime.utcnow(),
+                'pages': self.pages,
+                'bytes': self.bytes,
+                'http_time': self.http_time,
+                'page_latencies': json.dumps(self.page_latencies),
+                'retries': self.retries,
+                'parse_time': self.parse_time,
+                'write_time': self.write_time,
+                'rows_inserted': self.rows['inserted'],
+                'rows_updated': self.rows['updated'],
+                'rows_unchanged': self.rows['unchanged']
+            }
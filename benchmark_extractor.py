@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""CVE记录抽取性能测试
+
+比较app.nvd.extractor与原先逐条strptime、多层.get解析方式的吞吐量（records/sec），
+并逐条比较两者生成的记录：新实现有意的改动（v2评分的严重程度、只有v4.0评分的记录、
+CPE转义的冒号）单独统计，其他差异视为错误。
+
+语料来源：
+    --cache-dir 指定NVD分页缓存目录时使用缓存的原始API响应；
+    否则由月度TSV文件（默认202405.tsv）还原为API 2.0格式。
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+from app.nvd.extractor import CPE_FIELD_MAX_LENGTH, extract_record, extract_records, record_from_tsv_fields, to_nvd_vulnerability
+from app.nvd.page_cache import NvdPageCache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def legacy_extract(vuln):
+    """原NvdService.sync_data中的解析代码（逐字保留，continue改为return None），作为对比基准"""
+    cve = vuln.get("cve", {})
+    
+    # 获取基本信息
+    cve_id = cve.get("id", "")
+    published_date_str = cve.get("published", "")
+    last_modified_date_str = cve.get("lastModified", "")
+    
+    if not cve_id or not published_date_str or not last_modified_date_str:
+        return None
+    
+    # 解析日期 - 适配NVD API返回的格式
+    try:
+        # 尝试解析带Z的格式
+        published_date = datetime.strptime(published_date_str, '%Y-%m-%dT%H:%M:%S.%fZ')
+        last_modified_date = datetime.strptime(last_modified_date_str, '%Y-%m-%dT%H:%M:%S.%fZ')
+    except ValueError:
+        # 如果失败，尝试解析不带Z的格式
+        published_date = datetime.strptime(published_date_str, '%Y-%m-%dT%H:%M:%S.%f')
+        last_modified_date = datetime.strptime(last_modified_date_str, '%Y-%m-%dT%H:%M:%S.%f')
+    
+    # 获取描述并清理特殊Unicode字符
+    descriptions = cve.get("descriptions", [])
+    description = descriptions[0].get("value", "") if descriptions else ""
+    # 替换可能导致MySQL编码问题的特殊字符
+    description = description.replace('‑', '-')  # 替换非标准连字符
+    description = description.replace('–', '-')  # 替换长连字符
+    description = description.replace('—', '-')  # 替换破折号
+    # 可以根据需要添加更多的字符替换规则
+    
+    # 获取评分信息
+    base_score = None
+    base_severity = ""
+    vector_string = ""
+    
+    metrics = cve.get("metrics", {})
+    # 尝试获取CVSS v3评分
+    if "cvssMetricV31" in metrics and metrics["cvssMetricV31"]:
+        cvss_data = metrics["cvssMetricV31"][0].get("cvssData", {})
+        base_score = cvss_data.get("baseScore")
+        base_severity = cvss_data.get("baseSeverity", "")
+        vector_string = cvss_data.get("vectorString", "")
+    elif "cvssMetricV30" in metrics and metrics["cvssMetricV30"]:
+        cvss_data = metrics["cvssMetricV30"][0].get("cvssData", {})
+        base_score = cvss_data.get("baseScore")
+        base_severity = cvss_data.get("baseSeverity", "")
+        vector_string = cvss_data.get("vectorString", "")
+    # 尝试获取CVSS v2评分
+    elif "cvssMetricV2" in metrics and metrics["cvssMetricV2"]:
+        cvss_data = metrics["cvssMetricV2"][0].get("cvssData", {})
+        base_score = cvss_data.get("baseScore")
+        base_severity = cvss_data.get("baseSeverity", "")
+        vector_string = cvss_data.get("vectorString", "")
+    
+    # 获取厂商和产品信息
+    vendor = ""
+    product = ""
+    configurations = cve.get("configurations", [])
+    if configurations:
+        nodes = configurations[0].get("nodes", [])
+        if nodes:
+            cpe_match = nodes[0].get("cpeMatch", [])
+            if cpe_match:
+                cpe_uri = cpe_match[0].get("criteria", "")
+                if cpe_uri:
+                    cpe_parts = cpe_uri.split(':')
+                    if len(cpe_parts) >= 5:
+                        vendor = cpe_parts[3]
+                        product = cpe_parts[4]
+    
+    # 添加到列表
+    return {
+        'cve_id': cve_id,
+        'published_date': published_date,
+        'last_modified_date': last_modified_date,
+        'description': description,
+        'base_score': base_score,
+        'base_severity': base_severity,
+        'vector_string': vector_string,
+        'vendor': vendor,
+        'product': product
+    }
+
+# 判断差异是否属于新实现有意的改动
+def _is_v2_severity(vuln, legacy, record):
+    # v2评分的baseSeverity在指标层，原实现只读cvssData，严重程度为空
+    metrics = vuln.get('cve', {}).get('metrics', {})
+    return (not metrics.get('cvssMetricV31') and not metrics.get('cvssMetricV30') and bool(metrics.get('cvssMetricV2'))
+            and legacy['base_severity'] == '' and {**legacy, 'base_severity': record['base_severity']} == record)
+
+def _is_v4_only(vuln, legacy, record):
+    # 只有v4.0评分的记录，原实现不读取v4.0，分数、严重程度和向量为空
+    metrics = vuln.get('cve', {}).get('metrics', {})
+    scored = {field: record[field] for field in ('base_score', 'base_severity', 'vector_string')}
+    return (bool(metrics.get('cvssMetricV40')) and legacy['base_score'] is None
+            and {**legacy, **scored} == record)
+
+def _is_cpe_split(vuln, legacy, record):
+    # 原实现按所有冒号拆分CPE，没有处理转义的冒号（\\:），也没有截断超长的字段
+    escaped = '\\' in _first_criteria(vuln)
+    too_long = max(len(legacy['vendor']), len(legacy['product'])) > CPE_FIELD_MAX_LENGTH
+    cpe = {field: record[field] for field in ('vendor', 'product')}
+    return (escaped or too_long) and {**legacy, **cpe} == record
+
+def _first_criteria(vuln):
+    # 与原实现相同，只取第一个配置节点的第一个CPE
+    try:
+        return vuln['cve']['configurations'][0]['nodes'][0]['cpeMatch'][0]['criteria']
+    except (KeyError, IndexError):
+        return ''
+
+# 新实现有意与原实现不同的地方: (说明, 判断函数)
+INTENDED_DIFFERENCES = [
+    ('v2评分的严重程度取自指标层baseSeverity', _is_v2_severity),
+    ('只有v4.0评分的记录使用v4.0评分', _is_v4_only),
+    ('CPE中转义的冒号和超长的厂商/产品名', _is_cpe_split),
+]
+
+def compare_records(vulnerabilities):
+    """逐条比较两种实现，返回(各类有意差异的数量, 无法解释的差异CVE列表)"""
+    intended = {name: 0 for name, _ in INTENDED_DIFFERENCES}
+    unexpected = []
+    for vuln in vulnerabilities:
+        legacy, record = legacy_extract(vuln), extract_record(vuln)
+        if legacy == record:
+            continue
+        if legacy is None or record is None:
+            unexpected.append((legacy or record)['cve_id'])
+            continue
+        for name, matches in INTENDED_DIFFERENCES:
+            if matches(vuln, legacy, record):
+                intended[name] += 1
+                break
+        else:
+            unexpected.append(record['cve_id'])
+    return intended, unexpected
+
+def load_corpus(args):
+    """加载测试语料，返回API 2.0格式的漏洞列表"""
+    if args.cache_dir:
+        vulnerabilities = []
+        for page in NvdPageCache(args.cache_dir).iter_pages():
+            vulnerabilities.extend(page['response'].get('vulnerabilities', []))
+        return vulnerabilities
+    
+    file_path = args.tsv if os.path.isabs(args.tsv) else os.path.join(BASE_DIR, args.tsv)
+    vulnerabilities = []
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter='\t')
+        next(reader, None)
+        for fields in reader:
+            record = record_from_tsv_fields(fields)
+            if record:
+                vulnerabilities.append(to_nvd_vulnerability(record))
+    return vulnerabilities
+
+def run_benchmark(name, func, vulnerabilities, repeat):
+    """多次运行取最好成绩，返回(结果, records/sec)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(vulnerabilities)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rate = len(vulnerabilities) / best if best else 0
+    print(f"{name:<10} {best * 1000:10.1f} ms   {rate:12,.0f} records/sec")
+    return result, rate
+
+def main():
+    parser = argparse.ArgumentParser(description='CVE记录抽取性能测试')
+    parser.add_argument('--tsv', default='202405.tsv', help='用于生成语料的月度TSV文件')
+    parser.add_argument('--cache-dir', default=None, help='使用NVD分页缓存作为语料')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最好成绩')
+    args = parser.parse_args()
+    
+    vulnerabilities = load_corpus(args)
+    if not vulnerabilities:
+        print("语料为空")
+        sys.exit(1)
+    print(f"语料: {len(vulnerabilities)} 条记录，重复 {args.repeat} 次")
+    
+    _, legacy_rate = run_benchmark(
+        'legacy', lambda vulns: [r for r in map(legacy_extract, vulns) if r], vulnerabilities, args.repeat)
+    _, rate = run_benchmark('extractor', extract_records, vulnerabilities, args.repeat)
+    print(f"加速比: {rate / legacy_rate:.2f}x")
+    
+    intended, unexpected = compare_records(vulnerabilities)
+    for name, count in intended.items():
+        print(f"有意差异 - {name}: {count} 条")
+    if unexpected:
+        print(f"警告: {len(unexpected)} 条记录与基准实现不一致: {', '.join(unexpected[:10])}")
+        sys.exit(1)
+    print("除上述有意差异外，两种实现生成的记录一致")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""NVD同步吞吐量离线测试
+
+在进程内启动NVD API替身服务（数据来自月度TSV文件），按月度窗口分页请求并经过
+下载 → 抽取流水线（不写数据库），报告耗时、records/sec、请求数和重试情况。
+可以注入延迟和429/503，观察限速器和退避重试对吞吐量的影响。
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+from app.ingest.pipeline import IngestPipeline
+from app.nvd.backfill import split_windows
+from app.nvd.client import NvdClient
+from app.nvd.rate_limiter import RateLimiter
+from app.nvd.service import NvdService, extract_api_page
+from app.nvd.stub_server import NvdStubServer, load_tsv_vulnerabilities
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='NVD同步吞吐量离线测试')
+    parser.add_argument('--tsv', nargs='+', default=['202405.tsv'], help='作为数据的TSV文件')
+    parser.add_argument('--start', default='2024-05-01', help='开始日期，格式YYYY-MM-DD')
+    parser.add_argument('--end', default='2024-06-01', help='结束日期，格式YYYY-MM-DD')
+    parser.add_argument('--page-size', type=int, default=2000, help='每页条数')
+    parser.add_argument('--rate', type=int, default=50, help='每个限速窗口允许的请求数')
+    parser.add_argument('--period', type=float, default=30, help='限速窗口（秒）')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回429/503的概率')
+    parser.add_argument('--retry-after', type=int, default=1, help='注入错误时返回的Retry-After（秒）')
+    parser.add_argument('--seed', type=int, default=1, help='随机数种子')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    file_paths = [path if os.path.isabs(path) else os.path.join(BASE_DIR, path) for path in args.tsv]
+    server = NvdStubServer(load_tsv_vulnerabilities(file_paths), latency=args.latency,
+                           error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed).start()
+    print(f"替身服务: {server.cves_url}，{len(server.vulnerabilities)} 条记录")
+    
+    client = NvdClient(api_url=server.cves_url, rate_limiter=RateLimiter(args.rate, args.period), cache=False)
+    record_count = 0
+    
+    def count_page(page):
+        nonlocal record_count
+        record_count += len(page[3])
+    
+    start_date = datetime.strptime(args.start, '%Y-%m-%d')
+    end_date = datetime.strptime(args.end, '%Y-%m-%d')
+    start_time = time.perf_counter()
+    try:
+        for window_start, window_end, _ in split_windows(start_date, end_date):
+            params = NvdService._build_query_params(window_start, window_end)
+            params['resultsPerPage'] = args.page_size
+            IngestPipeline(parse=extract_api_page, write=count_page).run(client.iter_pages(params))
+    finally:
+        server.stop()
+    elapsed = time.perf_counter() - start_time
+    
+    errors = sum(count for status, count in server.status_counts.items() if status != 200)
+    print(f"记录数: {record_count}，耗时: {elapsed:.2f} 秒，{record_count / elapsed if elapsed else 0:,.0f} records/sec")
+    print(f"请求数: {server.request_count}，错误响应（重试）: {errors}，状态码分布: {dict(server.status_counts)}")
+
+if __name__ == "__main__":
+    main()
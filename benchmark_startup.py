@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""应用冷启动耗时测试
+
+每次在新的Python进程中导入app并调用create_app()（与run.py、worker.py和命令行脚本的启动过程相同），
+报告进程总耗时、create_app()耗时，以及启动过程中是否加载了pandas、requests等较重的模块。
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# 只在首次使用时加载的模块，冷启动时不应出现
+HEAVY_MODULES = ['pandas', 'bs4', 'requests', 'schedule']
+
+# 子进程中执行的启动代码
+STARTUP_CODE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'create_app': created - imported,
+    'modules': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='应用冷启动耗时测试')
+    parser.add_argument('--runs', type=int, default=5, help='重复启动的次数')
+    return parser.parse_args()
+
+# 在新进程中启动一次应用，返回(进程总耗时, 子进程报告的数据)
+def run_once():
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', STARTUP_CODE], capture_output=True, text=True, check=True).stdout
+    elapsed = time.perf_counter() - start
+    # create_app()中的print输出在前，结果在最后一行
+    return elapsed, json.loads(output.strip().splitlines()[-1])
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    totals, imports, creates = [], [], []
+    modules = []
+
+    for i in range(args.runs):
+        elapsed, result = run_once()
+        totals.append(elapsed)
+        imports.append(result['import'])
+        creates.append(result['create_app'])
+        modules = result['modules']
+        print(f"第 {i + 1} 次: 进程 {elapsed * 1000:.0f}ms，导入app {result['import'] * 1000:.0f}ms，"
+              f"create_app() {result['create_app'] * 1000:.0f}ms")
+
+    print(f"\n中位数: 进程 {statistics.median(totals) * 1000:.0f}ms，导入app {statistics.median(imports) * 1000:.0f}ms，"
+          f"create_app() {statistics.median(creates) * 1000:.0f}ms")
+    print(f"启动时加载的重模块: {', '.join(modules) if modules else '无'}")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import shutil
 import subprocess
 from datetime import datetime, timedelta
 import requests
+from app.http_client import create_session
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -49,7 +50,7 @@ class CveDetailsAutomator:
     
     def _create_requests_session(self):
         """创建并配置requests会话"""
-        session = requests.Session()
+        session = create_session()
         # 添加更完整的请求头
         session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
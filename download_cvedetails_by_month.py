@@ -3,11 +3,11 @@
 """从cvedetails.com下载2015年每个月的CVE数据"""
 
 import os
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import time
 from datetime import datetime
+from app.http_client import create_session
 
 # 设置请求头，模拟浏览器访问
 HEADERS = {
@@ -39,7 +39,7 @@ class CveDetailsDownloader:
         
         try:
             # 创建会话对象，保持连接状态
-            session = requests.Session()
+            session = create_session()
             session.headers.update(HEADERS)
             
             # 先访问一个预热页面，获取初始cookie
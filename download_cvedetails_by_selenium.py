@@ -14,8 +14,8 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-import requests
 from urllib.parse import urljoin
+from app.http_client import create_session
 
 # 下载目录
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -175,7 +175,7 @@ class CveDetailsSeleniumDownloader:
                 # 使用requests下载文件（Selenium下载可能不稳定）
                 # 获取当前cookie
                 cookies = driver.get_cookies()
-                session = requests.Session()
+                session = create_session()
                 
                 # 添加cookie到session
                 for cookie in cookies:
@@ -12,6 +12,7 @@ from urllib.parse import urljoin, urlparse
 from http.cookiejar import LWPCookieJar
 import ssl
 from bs4 import BeautifulSoup
+from app.http_client import create_session
 
 # 下载目录
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,7 +26,7 @@ ssl_context.verify_mode = ssl.CERT_NONE
 class CveDetailsEnhancedDownloader:
     def __init__(self):
         # 创建会话对象
-        self.session = requests.Session()
+        self.session = create_session()
         self.session.cookies = LWPCookieJar('cookies.txt')
         
         # 加载已保存的cookie（如果有）
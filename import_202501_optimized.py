@@ -1,612 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import pymysql
-import os
-import traceback
-import re
-import sys
-from datetime import datetime
-import logging
-from collections import defaultdict
+from app.ingest.loader import batch_import
+from app.ingest.parsers import NvdTsvParser
 
 """
 优化版TSV文件导入脚本，用于处理202501.tsv文件中的Unicode字符编码问题
-主要改进：
-1. 增强字符清理功能，支持更多特殊Unicode字符转换
-2. 添加详细日志记录，将导入过程和问题写入本地文件
-3. 改进错误处理机制，提供更灵活的错误恢复策略
-4. 添加进度显示和统计分析功能
+在增强版清理的基础上，把非拉丁文字和其他特殊Unicode字符替换为描述文本
+读取、解析和写入由app.ingest.loader统一实现，这里只选择文件和文本清理方式。
 """
 
-# 配置日志记录
-def setup_logging():
-    """设置日志记录配置"""
-    log_dir = '/data_nfs/121/app/security/logs'
-    os.makedirs(log_dir, exist_ok=True)
-    
-    log_file = f'{log_dir}/import_202501_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-    
-    # 配置日志记录器
-    logger = logging.getLogger('import_logger')
-    logger.setLevel(logging.INFO)
-    
-    # 创建文件处理器
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
-    file_handler.setLevel(logging.INFO)
-    
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # 设置日志格式
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # 添加处理器到记录器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger, log_file
-
-# 高级Unicode字符清理函数
-def advanced_clean_text(text):
-    """高级Unicode字符清理函数，处理更多类型的特殊字符"""
-    if not text:
-        return text
-    
-    # 基础清理：移除控制字符和不可打印字符
-    text = ''.join(char for char in text if ord(char) >= 32 or ord(char) in (9, 10, 13))
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-    
-    # 替换常见的全角字符为半角字符
-    full_to_half = {
-        '，': ',', '。': '.', '！': '!', '？': '?',
-        '：': ':', '；': ';', '“': '"', '”': '"',
-        '‘': "'", '’': "'", '（': '(', '）': ')',
-        '【': '[', '】': ']', '《': '<', '》': '>',
-        '「': '[', '」': ']', '『': '[', '』': ']',
-        '、': ',', '—': '-', '～': '~', '…': '...',
-        '　': ' ',  # 全角空格
-        '–': '-',  # 短破折号
-        '—': '-',  # 长破折号
-        '′': "'",  # 撇号
-        '″': '"',  # 引号
-        '°': ' degrees ',  # 度符号
-        '℃': 'C',  # 摄氏度
-        '℉': 'F',  # 华氏度
-        '€': 'EUR',  # 欧元
-        '£': 'GBP',  # 英镑
-        '¥': 'Y',  # 日元
-    }
-    
-    for full_char, half_char in full_to_half.items():
-        text = text.replace(full_char, half_char)
-    
-    # 处理特殊Unicode字符的其他方法
-    # 1. 替换非拉丁字母为描述文本
-    # 注意：这是一个保守的方法，可能会丢失一些信息
-    # 但可以确保数据能被MySQL正确存储
-    text = re.sub(r'[\u0600-\u06FF\u0750-\u077F]+', '[Arabic text]', text)  # 阿拉伯文
-    text = re.sub(r'[\u4E00-\u9FFF]+', '[Chinese text]', text)  # 中文
-    text = re.sub(r'[\u3040-\u309F\u30A0-\u30FF]+', '[Japanese text]', text)  # 日文
-    text = re.sub(r'[\uAC00-\uD7AF\u1100-\u11FF]+', '[Korean text]', text)  # 韩文
-    
-    # 2. 对于其他无法处理的字符，使用base64编码的占位符
-    # 这个方法会保留原始信息，但需要额外的解码步骤
-    problematic_pattern = re.compile(r'[\u0800-\uFFFF]')  # 处理其他可能有问题的Unicode字符
-    if problematic_pattern.search(text):
-        text = problematic_pattern.sub('[Unicode character]', text)
-    
-    return text
-
-# 数据库配置
-DB_CONFIG = {
-    'host': '192.168.233.121',
-    'user': 'root',
-    'password': 'Xl123,56',
-    'port': 3306,
-    'db': 'security',
-    'charset': 'utf8mb4'
-}
-
 # 目标文件
-DATA_DIR = '/data_nfs/121/app/security'
 TARGET_FILE = '202501.tsv'
-TARGET_FILE_PATH = os.path.join(DATA_DIR, TARGET_FILE)
-
-# 创建nvd表（如果不存在）
-def create_nvd_table(conn, logger):
-    """创建nvd表（如果不存在）"""
-    cursor = conn.cursor()
-    try:
-        create_table_sql = '''
-        CREATE TABLE IF NOT EXISTS nvd (
-            cve_id VARCHAR(50) PRIMARY KEY,
-            published_date DATETIME,
-            last_modified_date DATETIME,
-            description TEXT,
-            source_identifier VARCHAR(100),
-            severity VARCHAR(20),
-            base_score FLOAT,
-            base_severity VARCHAR(20),
-            vector_string VARCHAR(200),
-            vendor VARCHAR(100),
-            product VARCHAR(100)
-        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-        '''
-        cursor.execute(create_table_sql)
-        conn.commit()
-        logger.info("nvd表已创建或已存在")
-    except Exception as e:
-        logger.error(f"创建nvd表时出错: {e}")
-        logger.debug(traceback.format_exc())
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
-
-# 预处理文件，修复潜在的编码问题
-def preprocess_file(file_path, logger):
-    """预处理文件，修复潜在的编码问题但保留文件结构"""
-    temp_file = f"{file_path}.preprocessed"
-    logger.info(f"开始预处理文件: {file_path}")
-    
-    try:
-        problematic_lines = 0
-        total_lines = 0
-        
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f_in, \
-             open(temp_file, 'w', encoding='utf-8') as f_out:
-            # 复制表头
-            header = f_in.readline()
-            f_out.write(header)
-            total_lines += 1
-            
-            for line in f_in:
-                total_lines += 1
-                # 简单的预处理，只替换有问题的控制字符，保留制表符和其他结构
-                # 移除控制字符，但保留制表符、换行符和回车符
-                cleaned_line = ''.join(char for char in line if ord(char) >= 32 or ord(char) in (9, 10, 13))
-                
-                # 处理Unicode替换字符
-                if '\ufffd' in cleaned_line:
-                    problematic_lines += 1
-                    if problematic_lines <= 10:  # 只记录前10条问题行
-                        logger.warning(f"预处理发现问题行: {total_lines}")
-                
-                f_out.write(cleaned_line)
-        
-        logger.info(f"文件预处理完成，共处理 {total_lines} 行，发现 {problematic_lines} 行可能有问题")
-        return temp_file
-        
-    except Exception as e:
-        logger.error(f"预处理文件时出错: {e}")
-        logger.debug(traceback.format_exc())
-        # 如果预处理失败，返回原始文件
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        return file_path
-
-# 导入特定的TSV文件
-def import_specific_tsv_file(file_path, logger):
-    """导入特定的TSV文件，支持详细日志记录和错误处理"""
-    start_time = datetime.now()
-    logger.info(f"开始导入文件: {file_path}")
-    logger.info(f"开始时间: {start_time}")
-    
-    # 统计信息
-    stats = {
-        'total_records': 0,
-        'imported_records': 0,
-        'skipped_non_cve_records': 0,
-        'skipped_error_records': 0,
-        'batch_success_count': 0,
-        'batch_failure_count': 0,
-        'individual_success_count': 0,
-        'individual_failure_count': 0,
-        'error_types': defaultdict(int)
-    }
-    
-    # 错误记录
-    error_records = []
-    max_error_records = 100  # 最多记录100条错误
-    
-    try:
-        # 连接数据库
-        conn = pymysql.connect(**DB_CONFIG)
-        logger.info(f"成功连接到数据库: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['db']}")
-        
-        # 创建表（如果不存在）
-        create_nvd_table(conn, logger)
-        
-        # 检查文件是否存在
-        if not os.path.exists(file_path):
-            logger.error(f"错误: 文件 {file_path} 不存在")
-            return False, stats, error_records
-        
-        # 预处理文件
-        preprocessed_file = preprocess_file(file_path, logger)
-        
-        # 读取并导入数据
-        batch_size = 1000
-        data_batch = []
-        
-        # 获取文件总行数用于进度显示
-        with open(preprocessed_file, 'r', encoding='utf-8') as f:
-            total_file_lines = sum(1 for _ in f)
-        
-        processed_lines = 0
-        
-        with open(preprocessed_file, 'r', encoding='utf-8') as f:
-            header = f.readline()  # 跳过表头
-            processed_lines += 1
-            
-            for line in f:
-                processed_lines += 1
-                stats['total_records'] += 1
-                
-                # 显示进度
-                if processed_lines % 1000 == 0:
-                    progress = (processed_lines / total_file_lines) * 100
-                    logger.info(f"处理进度: {processed_lines}/{total_file_lines} ({progress:.1f}%)")
-                
-                # 跳过非CVE开头的记录
-                if not line.strip().startswith('CVE'):
-                    stats['skipped_non_cve_records'] += 1
-                    continue
-                
-                # 处理每一行数据
-                fields = line.strip().split('\t')
-                
-                # 确保字段数量足够 (实际文件格式只有4个字段)
-                if len(fields) < 4:
-                    stats['skipped_error_records'] += 1
-                    stats['error_types']['insufficient_fields'] += 1
-                    if len(error_records) < max_error_records:
-                        error_records.append({
-                            'line': processed_lines,
-                            'error_type': 'insufficient_fields',
-                            'details': f'字段数量不足: {len(fields)}'
-                        })
-                    continue
-                
-                try:
-                    # 提取字段值，使用高级清理函数
-                    cve_id = fields[0].strip()
-                    
-                    # 处理日期格式
-                    published_date = fields[1].strip()
-                    if 'T' in published_date:
-                        published_date = published_date.split('T')[0]  # 移除时间部分
-                    if '.' in published_date:
-                        published_date = published_date.split('.')[0]  # 移除毫秒部分
-                    
-                    last_modified_date = fields[2].strip()
-                    if 'T' in last_modified_date:
-                        last_modified_date = last_modified_date.split('T')[0]  # 移除时间部分
-                    if '.' in last_modified_date:
-                        last_modified_date = last_modified_date.split('.')[0]  # 移除毫秒部分
-                    
-                    # 使用高级清理函数处理文本字段
-                    description = advanced_clean_text(fields[3].strip())
-                    
-                    # 对于缺失的字段，设置默认值
-                    source_identifier = ''
-                    severity = ''
-                    base_score = 0.0
-                    base_severity = ''
-                    vector_string = ''
-                    vendor = ''
-                    product = ''
-                    
-                    # 添加到批次
-                    data_batch.append((
-                        cve_id, published_date, last_modified_date, description, 
-                        source_identifier, severity, base_score, base_severity, 
-                        vector_string, vendor, product
-                    ))
-                    
-                    # 当批次达到指定大小时，执行批量插入
-                    if len(data_batch) >= batch_size:
-                        # 批量插入数据
-                        try:
-                            cursor = conn.cursor()
-                            sql = '''
-                            INSERT INTO nvd (
-                                cve_id, published_date, last_modified_date, description, 
-                                source_identifier, severity, base_score, base_severity, 
-                                vector_string, vendor, product
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON DUPLICATE KEY UPDATE
-                                published_date=VALUES(published_date),
-                                last_modified_date=VALUES(last_modified_date),
-                                description=VALUES(description),
-                                source_identifier=VALUES(source_identifier),
-                                severity=VALUES(severity),
-                                base_score=VALUES(base_score),
-                                base_severity=VALUES(base_severity),
-                                vector_string=VALUES(vector_string),
-                                vendor=VALUES(vendor),
-                                product=VALUES(product);
-                            '''
-                            cursor.executemany(sql, data_batch)
-                            conn.commit()
-                            stats['imported_records'] += len(data_batch)
-                            stats['batch_success_count'] += 1
-                            data_batch = []
-                        except pymysql.err.DataError as e:
-                            # 当批量插入遇到数据错误时，尝试逐条插入
-                            logger.warning(f"批量插入遇到数据错误: {e}")
-                            logger.info("尝试逐条插入...")
-                            stats['batch_failure_count'] += 1
-                            stats['error_types']['data_error'] += 1
-                            
-                            for record in data_batch:
-                                try:
-                                    cursor = conn.cursor()
-                                    cursor.execute(sql, record)
-                                    conn.commit()
-                                    stats['imported_records'] += 1
-                                    stats['individual_success_count'] += 1
-                                except pymysql.err.DataError as de:
-                                    # 跳过仍然有问题的记录
-                                    logger.warning(f"跳过有问题的记录: {record[0]} - 错误: {de}")
-                                    stats['skipped_error_records'] += 1
-                                    stats['individual_failure_count'] += 1
-                                    stats['error_types']['individual_data_error'] += 1
-                                    if len(error_records) < max_error_records:
-                                        error_records.append({
-                                            'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                            'cve_id': record[0],
-                                            'error_type': 'data_error',
-                                            'details': str(de)
-                                        })
-                                except Exception as re:
-                                    logger.error(f"插入单条记录时出错: {re}")
-                                    stats['skipped_error_records'] += 1
-                                    stats['individual_failure_count'] += 1
-                                    stats['error_types']['individual_insert_error'] += 1
-                                    if len(error_records) < max_error_records:
-                                        error_records.append({
-                                            'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                            'cve_id': record[0],
-                                            'error_type': 'insert_error',
-                                            'details': str(re)
-                                        })
-                            data_batch = []
-                        except Exception as e:
-                            logger.error(f"批量插入时出错: {e}")
-                            logger.debug(traceback.format_exc())
-                            stats['batch_failure_count'] += 1
-                            stats['error_types']['batch_insert_error'] += 1
-                            conn.rollback()
-                            
-                            # 尝试逐条插入
-                            for record in data_batch:
-                                try:
-                                    cursor = conn.cursor()
-                                    cursor.execute(sql, record)
-                                    conn.commit()
-                                    stats['imported_records'] += 1
-                                    stats['individual_success_count'] += 1
-                                except Exception as re:
-                                    logger.error(f"插入单条记录时出错: {re}")
-                                    stats['skipped_error_records'] += 1
-                                    stats['individual_failure_count'] += 1
-                                    if len(error_records) < max_error_records:
-                                        error_records.append({
-                                            'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                            'cve_id': record[0],
-                                            'error_type': 'insert_error',
-                                            'details': str(re)
-                                        })
-                            data_batch = []
-                        finally:
-                            if 'cursor' in locals():
-                                cursor.close()
-                    
-                except Exception as e:
-                    logger.error(f"处理记录时出错: {e}")
-                    logger.debug(traceback.format_exc())
-                    stats['skipped_error_records'] += 1
-                    stats['error_types']['record_processing_error'] += 1
-                    if len(error_records) < max_error_records:
-                        error_records.append({
-                            'line': processed_lines,
-                            'error_type': 'processing_error',
-                            'details': str(e)
-                        })
-            
-            # 处理剩余的数据批次
-            if data_batch:
-                try:
-                    cursor = conn.cursor()
-                    sql = '''
-                    INSERT INTO nvd (
-                        cve_id, published_date, last_modified_date, description, 
-                        source_identifier, severity, base_score, base_severity, 
-                        vector_string, vendor, product
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        published_date=VALUES(published_date),
-                        last_modified_date=VALUES(last_modified_date),
-                        description=VALUES(description),
-                        source_identifier=VALUES(source_identifier),
-                        severity=VALUES(severity),
-                        base_score=VALUES(base_score),
-                        base_severity=VALUES(base_severity),
-                        vector_string=VALUES(vector_string),
-                        vendor=VALUES(vendor),
-                        product=VALUES(product);
-                    '''
-                    cursor.executemany(sql, data_batch)
-                    conn.commit()
-                    stats['imported_records'] += len(data_batch)
-                    stats['batch_success_count'] += 1
-                except pymysql.err.DataError as e:
-                    logger.warning(f"批量插入遇到数据错误: {e}")
-                    logger.info("尝试逐条插入...")
-                    stats['batch_failure_count'] += 1
-                    stats['error_types']['data_error'] += 1
-                    
-                    for record in data_batch:
-                        try:
-                            cursor = conn.cursor()
-                            cursor.execute(sql, record)
-                            conn.commit()
-                            stats['imported_records'] += 1
-                            stats['individual_success_count'] += 1
-                        except pymysql.err.DataError as de:
-                            logger.warning(f"跳过有问题的记录: {record[0]} - 错误: {de}")
-                            stats['skipped_error_records'] += 1
-                            stats['individual_failure_count'] += 1
-                            if len(error_records) < max_error_records:
-                                error_records.append({
-                                    'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                    'cve_id': record[0],
-                                    'error_type': 'data_error',
-                                    'details': str(de)
-                                })
-                        except Exception as re:
-                            logger.error(f"插入单条记录时出错: {re}")
-                            stats['skipped_error_records'] += 1
-                            stats['individual_failure_count'] += 1
-                            if len(error_records) < max_error_records:
-                                error_records.append({
-                                    'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                    'cve_id': record[0],
-                                    'error_type': 'insert_error',
-                                    'details': str(re)
-                                })
-                except Exception as e:
-                    logger.error(f"批量插入时出错: {e}")
-                    logger.debug(traceback.format_exc())
-                    stats['batch_failure_count'] += 1
-                    conn.rollback()
-                    
-                    # 尝试逐条插入
-                    for record in data_batch:
-                        try:
-                            cursor = conn.cursor()
-                            cursor.execute(sql, record)
-                            conn.commit()
-                            stats['imported_records'] += 1
-                            stats['individual_success_count'] += 1
-                        except Exception as re:
-                            logger.error(f"插入单条记录时出错: {re}")
-                            stats['skipped_error_records'] += 1
-                            stats['individual_failure_count'] += 1
-                            if len(error_records) < max_error_records:
-                                error_records.append({
-                                    'line': processed_lines - len(data_batch) + data_batch.index(record) + 1,
-                                    'cve_id': record[0],
-                                    'error_type': 'insert_error',
-                                    'details': str(re)
-                                })
-                finally:
-                    if 'cursor' in locals():
-                        cursor.close()
-        
-        # 删除预处理文件（如果存在且不是原始文件）
-        if preprocessed_file != file_path and os.path.exists(preprocessed_file):
-            os.remove(preprocessed_file)
-            logger.info(f"已删除临时预处理文件: {preprocessed_file}")
-        
-        # 验证导入结果
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM nvd")
-        total_in_db = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM nvd WHERE published_date >= '2025-01-01' AND published_date < '2025-02-01'")
-        january_2025_in_db = cursor.fetchone()[0]
-        
-        cursor.close()
-        
-        end_time = datetime.now()
-        elapsed_time = end_time - start_time
-        
-        # 记录导入结果摘要
-        logger.info("\n导入结果摘要:")
-        logger.info(f"总记录数: {stats['total_records']}")
-        logger.info(f"成功导入: {stats['imported_records']}")
-        logger.info(f"跳过的非CVE记录: {stats['skipped_non_cve_records']}")
-        logger.info(f"跳过的错误记录: {stats['skipped_error_records']}")
-        logger.info(f"数据库中总记录数: {total_in_db}")
-        logger.info(f"数据库中2025年1月记录数: {january_2025_in_db}")
-        logger.info(f"结束时间: {end_time}")
-        logger.info(f"耗时: {elapsed_time}")
-        
-        # 记录批次处理统计
-        logger.info("\n批次处理统计:")
-        logger.info(f"成功的批次: {stats['batch_success_count']}")
-        logger.info(f"失败的批次: {stats['batch_failure_count']}")
-        logger.info(f"单条成功插入: {stats['individual_success_count']}")
-        logger.info(f"单条插入失败: {stats['individual_failure_count']}")
-        
-        # 记录错误类型统计
-        if stats['error_types']:
-            logger.info("\n错误类型统计:")
-            for error_type, count in stats['error_types'].items():
-                logger.info(f"{error_type}: {count}次")
-        
-        # 记录错误记录示例
-        if error_records:
-            logger.info(f"\n前{min(10, len(error_records))}条错误记录示例:")
-            for i, error in enumerate(error_records[:10]):
-                logger.info(f"{i+1}. 行号: {error.get('line', 'N/A')}, CVE ID: {error.get('cve_id', 'N/A')}")
-                logger.info(f"   错误类型: {error['error_type']}")
-                logger.info(f"   详细信息: {error['details']}")
-            
-            if len(error_records) > 10:
-                logger.info(f"... 还有{len(error_records) - 10}条错误记录未显示")
-        
-        return True, stats, error_records
-        
-    except Exception as e:
-        logger.error(f"导入过程中出错: {e}")
-        logger.debug(traceback.format_exc())
-        return False, stats, error_records
-    finally:
-        if 'conn' in locals() and conn.open:
-            conn.close()
-            logger.info("数据库连接已关闭")
 
 # 主函数
 def main():
     """主函数"""
     print("202501.tsv文件导入工具 (优化版)")
-    print("此工具使用高级字符清理函数，提供详细日志记录功能")
-    
-    # 设置日志记录
-    logger, log_file = setup_logging()
-    logger.info("=" * 80)
-    logger.info("日志文件: {}".format(log_file))
+    print("此工具把非拉丁文字替换为描述文本，避免特殊Unicode字符导致写入失败")
     
-    try:
-        # 执行导入
-        success, stats, error_records = import_specific_tsv_file(TARGET_FILE_PATH, logger)
-        
-        if success:
-            print("\n数据导入成功完成!")
-            print(f"日志文件已保存至: {log_file}")
-            print("\n优化版功能说明:")
-            print("1. 使用了advanced_clean_text函数，能处理更多类型的特殊Unicode字符")
-            print("2. 添加了文件预处理功能，提前修复潜在的编码问题")
-            print("3. 详细日志记录，所有操作和错误都记录到本地log文件")
-            print("4. 改进的错误处理机制，提供更灵活的错误恢复策略")
-            print("5. 添加了进度显示和统计分析功能")
-            print("6. 对于特殊语言字符(如中文、阿拉伯文等)进行了适当处理")
-        else:
-            print("\n数据导入失败!")
-            print(f"详细错误信息请查看日志文件: {log_file}")
-            
-    except Exception as e:
-        print(f"执行过程中发生严重错误: {e}")
-        print(f"详细错误信息请查看日志文件: {log_file}")
-    finally:
-        logger.info("=" * 80)
+    stats = batch_import([TARGET_FILE], NvdTsvParser(clean='unicode'), log_prefix='import_202501')
+    if stats['success_files']:
+        print("\n数据导入成功完成!")
+    else:
+        print("\n数据导入失败!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
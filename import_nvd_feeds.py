@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""从本地NVD JSON 2.0数据源文件导入nvd表（不访问NVD API）
+
+用于新环境冷启动：把nvdcve-2.0-*.json.gz镜像目录按磁盘速度流式导入，
+与API同步使用相同的抽取逻辑，同时写入CPE匹配和CVSS评分。
+"""
+
+import argparse
+from datetime import datetime
+from app import create_app
+from app.nvd.feed import FEED_PAGE_SIZE
+from app.nvd.service import NvdService
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='从本地NVD JSON 2.0数据源文件导入数据库')
+    parser.add_argument('path', help='数据源文件或镜像目录（*.json、*.json.gz）')
+    parser.add_argument('--page-size', type=int, default=FEED_PAGE_SIZE,
+                        help=f'每批写入的记录数（默认{FEED_PAGE_SIZE}）')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='并行抽取的进程数，0表示在解析线程中抽取')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    
+    app = create_app()
+    NvdService.set_app(app)
+    
+    start_time = datetime.now()
+    file_count, processed_count, imported_count = NvdService.import_from_feeds(
+        args.path, page_size=args.page_size, parse_workers=args.parse_workers)
+    print(f"导入 {file_count} 个文件，处理 {processed_count} 条记录，新增 {imported_count} 条，耗时: {datetime.now() - start_time}")
+
+if __name__ == "__main__":
+    main()
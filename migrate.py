@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""创建缺失的数据库表并补充新增的列
+
+部署或升级后执行一次（start.sh启动服务前会自动执行），可以重复执行。
+"""
+
+import sys
+from app import create_app
+from app.migrate import migrate
+
+def main():
+    """主函数"""
+    app = create_app()
+    
+    print("===== 检查数据库表结构 =====")
+    try:
+        changes = migrate(app)
+    except Exception as e:
+        print(f"✗ 更新数据库表结构时出错: {str(e)}")
+        sys.exit(1)
+    
+    for change in changes:
+        print(f"✓ {change}")
+    if not changes:
+        print("数据库表结构已是最新")
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,11 @@ check_service() {
     if netstat -tlnp 2>/dev/null | grep ":${PORT} " >/dev/null; then
         # 检查是否有python run.py进程在运行
         if ps aux | grep "python run.py" | grep -v grep >/dev/null; then
-            return 0  # 服务正常运行
+            # 检查后台任务进程是否在运行
+            if ps aux | grep "python worker.py" | grep -v grep >/dev/null; then
+                return 0  # 服务正常运行
+            fi
+            log "后台任务进程未运行"
         fi
     fi
     return 1  # 服务异常
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""启动本地NVD API替身服务
+
+数据来自项目下的月度TSV文件（YYYYMM.tsv）或NVD分页缓存，实现CVE API 2.0的
+pubStartDate/pubEndDate、lastModStartDate/lastModEndDate、startIndex、resultsPerPage等参数，
+以及变更历史接口。变更事件默认按每条记录的最后修改时间生成，也可以用--changes指定JSON文件。
+把同步程序指向替身服务：
+    NVD_API_URL=http://127.0.0.1:8008/rest/json/cves/2.0 python run.py
+    NVD_API_URL=http://127.0.0.1:8008/rest/json/cves/2.0 \\
+    NVD_HISTORY_API_URL=http://127.0.0.1:8008/rest/json/cvehistory/2.0 python sync_nvd_history.py --days 30
+"""
+
+import argparse
+import glob
+import os
+import re
+import time
+from app.nvd.stub_server import (NvdStubServer, changes_from_vulnerabilities, load_cached_vulnerabilities,
+                                 load_changes, load_tsv_vulnerabilities)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='启动本地NVD API替身服务')
+    parser.add_argument('--tsv', nargs='*', default=None,
+                        help='TSV文件或通配符（默认项目下全部YYYYMM.tsv）')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='使用NVD分页缓存作为数据（替代TSV文件）')
+    parser.add_argument('--changes', type=str, default=None,
+                        help='变更历史JSON文件（cvehistory响应格式），默认按记录的最后修改时间生成')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8008, help='监听端口')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外的随机延迟上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回429/503的概率，如0.05')
+    parser.add_argument('--error-statuses', type=int, nargs='+', default=[429, 503], help='注入的错误状态码')
+    parser.add_argument('--retry-after', type=int, default=None, help='注入错误时返回的Retry-After（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子')
+    return parser.parse_args()
+
+# 查找TSV文件
+def find_tsv_files(patterns):
+    if not patterns:
+        return sorted(os.path.join(BASE_DIR, name) for name in os.listdir(BASE_DIR)
+                      if re.fullmatch(r'\d{6}\.tsv', name))
+    file_paths = []
+    for pattern in patterns:
+        file_paths.extend(sorted(glob.glob(pattern)))
+    return file_paths
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    
+    start_time = time.time()
+    if args.cache_dir:
+        vulnerabilities = load_cached_vulnerabilities(args.cache_dir)
+        source = f"分页缓存 {args.cache_dir}"
+    else:
+        file_paths = find_tsv_files(args.tsv)
+        vulnerabilities = load_tsv_vulnerabilities(file_paths)
+        source = f"{len(file_paths)} 个TSV文件"
+    vulnerabilities = list(vulnerabilities)
+    changes = load_changes(args.changes) if args.changes else changes_from_vulnerabilities(vulnerabilities)
+    
+    server = NvdStubServer(vulnerabilities, changes, host=args.host, port=args.port, latency=args.latency,
+                           jitter=args.jitter, error_rate=args.error_rate,
+                           error_statuses=args.error_statuses, retry_after=args.retry_after, seed=args.seed)
+    print(f"已从{source}加载 {len(server.vulnerabilities)} 条记录、{len(server.changes)} 个变更事件，"
+          f"耗时 {time.time() - start_time:.1f} 秒")
+    print(f"CVE接口: {server.cves_url}")
+    print(f"变更历史接口: {server.history_url}")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"共处理 {server.request_count} 个请求，状态码分布: {dict(server.status_counts)}")
+
+if __name__ == "__main__":
+    main()
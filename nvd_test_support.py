@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试脚本共用的部分：内存SQLite测试库、API 2.0格式的漏洞记录、把NVD客户端指向本地替身服务
+
+测试库使用SQLite，不需要访问MySQL；MySQL专用的INSERT ... ON DUPLICATE KEY UPDATE
+由SqliteUpsert转换为SQLite的ON CONFLICT DO UPDATE。
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+import app.nvd.client as nvd_client
+import app.nvd.history as nvd_history
+import app.nvd.service as nvd_service
+import app.cisa.models
+import app.jobs.models
+import app.nvd.models
+
+class SqliteUpsert:
+    """把INSERT ... ON DUPLICATE KEY UPDATE转换为SQLite的ON CONFLICT DO UPDATE"""
+    
+    def __init__(self, table):
+        self.table = table
+    
+    def values(self, rows):
+        self.stmt = sqlite_insert(self.table).values(rows)
+        self.inserted = self.stmt.excluded
+        return self
+    
+    def on_duplicate_key_update(self, columns):
+        return self.stmt.on_conflict_do_update(index_elements=['cve_id'], set_=columns)
+
+# 创建使用内存SQLite的应用并建表，register_blueprints为True时注册NVD和任务接口
+def create_test_app(register_blueprints=False):
+    nvd_service.mysql_insert = SqliteUpsert
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    test_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    test_app.config['SECRET_KEY'] = 'test'
+    db.init_app(test_app)
+    if register_blueprints:
+        from app.jobs.routes import jobs_bp
+        from app.nvd.routes import nvd_bp
+        test_app.register_blueprint(nvd_bp)
+        test_app.register_blueprint(jobs_bp)
+    with test_app.app_context():
+        db.create_all()
+    return test_app
+
+# 把NVD客户端指向替身服务，不使用分页缓存；使用带密钥的配额，避免无密钥时30秒5次的限速拖慢测试
+def use_stub_server(server):
+    nvd_client.NVD_API_URL = server.cves_url
+    nvd_history.NVD_HISTORY_API_URL = server.history_url
+    os.environ.pop('NVD_PAGE_CACHE_DIR', None)
+    os.environ.setdefault('NVD_API_KEY', 'stub')
+
+# 生成API 2.0格式的漏洞记录
+def make_vulnerability(cve_id, published, last_modified, description='测试漏洞', score=7.5):
+    return {'cve': {
+        'id': cve_id,
+        'sourceIdentifier': 'nvd@nist.gov',
+        'published': published.isoformat(timespec='milliseconds'),
+        'lastModified': last_modified.isoformat(timespec='milliseconds'),
+        'descriptions': [{'lang': 'en', 'value': description}],
+        'metrics': {'cvssMetricV31': [{
+            'source': 'nvd@nist.gov',
+            'type': 'Primary',
+            'cvssData': {'version': '3.1', 'baseScore': score, 'baseSeverity': 'HIGH',
+                         'vectorString': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:N/A:N'}
+        }]},
+        'configurations': [{'nodes': [{'cpeMatch': [
+            {'vulnerable': True, 'criteria': f'cpe:2.3:a:acme:{cve_id.lower()}:1.0:*:*:*:*:*:*:*'}
+        ]}]}]
+    }}
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""离线重放NVD API分页缓存，重新抽取数据并写入nvd表（不访问网络）
+
+缓存由NvdClient在设置环境变量NVD_PAGE_CACHE_DIR时自动写入。
+"""
+
+import argparse
+from datetime import datetime
+from app import create_app
+from app.nvd.service import NvdService
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='离线重放NVD API分页缓存并写入数据库')
+    parser.add_argument('--cache-dir', type=str, default=None,
+                        help='缓存目录（默认使用NVD_PAGE_CACHE_DIR或项目下的nvd_page_cache）')
+    parser.add_argument('--since', type=str, default=None,
+                        help='只重放该日期之后获取的页面，格式YYYY-MM-DD')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    since = datetime.strptime(args.since, '%Y-%m-%d') if args.since else None
+    
+    app = create_app()
+    NvdService.set_app(app)
+    
+    start_time = datetime.now()
+    page_count, processed_count, imported_count = NvdService.replay_from_cache(cache_dir=args.cache_dir, since=since)
+    print(f"重放 {page_count} 页，处理 {processed_count} 条记录，新增 {imported_count} 条，耗时: {datetime.now() - start_time}")
+
+if __name__ == "__main__":
+    main()
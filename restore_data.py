@@ -19,6 +19,8 @@ def restore_recent_nvd_data():
     """导入最近30天的NVD数据"""
     print("开始导入最近30天的NVD数据...")
     app = create_app()
+    # create_app()不再启动调度器，需要自行设置同步服务使用的应用实例
+    NvdService.set_app(app)
     with app.app_context():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=30)
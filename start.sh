@@ -17,11 +17,17 @@ source venv/bin/activate
 # 安装依赖（如果首次运行）
 pip install -r requirements.txt || echo "requirements.txt 不存在，跳过依赖安装"
 
-# 启动Flask应用
+# 创建缺失的数据库表（Web进程和后台进程启动时不再检查表结构）
+python migrate.py || echo "数据库表结构检查失败，详见上方输出"
+
+# 启动Flask应用（只处理Web请求，不运行后台线程）
 nohup python run.py > app.log 2>&1 &
 
+# 启动后台任务进程（定时同步和页面提交的同步任务）
+nohup python worker.py > worker.log 2>&1 &
+
 # 输出启动信息
 echo "安全管理系统已启动在端口 8010"
-echo "日志文件: app.log"
+echo "日志文件: app.log，后台任务日志: worker.log"
 echo "可以通过 http://服务器IP:8010 访问系统"
-echo "CISA模块已配置定时任务，每6小时自动同步数据"
\ No newline at end of file
+echo "后台任务进程已配置NVD/CISA定时任务，每6小时自动同步数据"
\ No newline at end of file
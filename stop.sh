@@ -11,4 +11,34 @@ if [ -n "$PID" ]; then
     echo "服务已成功停止"
 else
     echo "安全管理系统服务未运行"
+fi
+
+# 停止后台任务进程：先发送SIGTERM让当前任务结束；超时后再次发送SIGTERM，
+# 后台进程把正在执行的任务放回队列后退出；仍未退出时强制终止（重启时遗留任务会被标记为失败）
+WORKER_PID=$(ps aux | grep "python worker.py" | grep -v grep | awk '{print $2}')
+
+if [ -n "$WORKER_PID" ]; then
+    echo "正在停止后台任务进程..."
+    kill $WORKER_PID
+    for i in $(seq 1 30); do
+        if ! ps -p $WORKER_PID >/dev/null 2>&1; then
+            break
+        fi
+        sleep 1
+    done
+    if ps -p $WORKER_PID >/dev/null 2>&1; then
+        kill $WORKER_PID
+        for i in $(seq 1 10); do
+            if ! ps -p $WORKER_PID >/dev/null 2>&1; then
+                break
+            fi
+            sleep 1
+        done
+    fi
+    if ps -p $WORKER_PID >/dev/null 2>&1; then
+        kill -9 $WORKER_PID
+    fi
+    echo "后台任务进程已停止"
+else
+    echo "后台任务进程未运行"
 fi
\ No newline at end of file
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""基于NVD变更历史的增量同步：只重新拉取时间范围内发生变化的CVE
+
+默认从上次同步的水位线开始；指定--start时只同步给定范围，不推进水位线。
+"""
+
+import argparse
+from datetime import datetime
+from app import create_app
+from app.nvd.service import NvdService
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='基于NVD变更历史增量同步')
+    parser.add_argument('--days', type=int, default=1,
+                        help='尚无水位线时向前回溯的天数（默认1天）')
+    parser.add_argument('--start', type=str, default=None,
+                        help='变更开始日期，格式YYYY-MM-DD')
+    parser.add_argument('--end', type=str, default=None,
+                        help='变更结束日期，格式YYYY-MM-DD（默认当前时间）')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    start_date = datetime.strptime(args.start, '%Y-%m-%d') if args.start else None
+    end_date = datetime.strptime(args.end, '%Y-%m-%d') if args.end else None
+    
+    app = create_app()
+    NvdService.set_app(app)
+    
+    start_time = datetime.now()
+    imported_count, start_date, end_date = NvdService.sync_from_history(
+        start_date=start_date, end_date=end_date, default_days=args.days)
+    if imported_count < 0:
+        print("同步失败")
+        return
+    print(f"同步 {start_date} 至 {end_date} 的变更，新增 {imported_count} 条，耗时: {datetime.now() - start_time}")
+
+if __name__ == "__main__":
+    main()
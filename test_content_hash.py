@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试内容哈希：未变化的记录不写入数据库，API同步和TSV导入得到相同的哈希，子表只在内容变化时替换
+
+使用内存SQLite，不需要访问MySQL。可以直接运行，也可以用pytest运行：
+    python test_content_hash.py
+    python -m pytest -q test_content_hash.py
+"""
+import os
+import sys
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from app import db
+from app.hashing import content_hash
+from app.nvd.extractor import (extract_cpe_rows, extract_cvss_rows, extract_records, record_from_tsv_fields,
+                               to_tsv_row, TSV_FIELDNAMES)
+from app.nvd.models import NvdCpeMatch, NvdData
+from app.nvd.service import NvdService
+from app.nvd.telemetry import SyncMetrics
+from nvd_test_support import create_test_app, make_vulnerability
+
+app = None
+
+def setup_module(module=None):
+    global app
+    app = create_test_app()
+
+# 写入一页API记录（含子表），返回(行数统计, 执行的写语句)
+def upsert_api_page(vulnerabilities):
+    return _upsert(extract_records(vulnerabilities), extract_cpe_rows(vulnerabilities),
+                   extract_cvss_rows(vulnerabilities))
+
+# 按TSV归档的格式往返后写入（不含子表）
+def upsert_tsv_rows(vulnerabilities):
+    records = []
+    for record in extract_records(vulnerabilities):
+        row = to_tsv_row(record)
+        records.append(record_from_tsv_fields([str(row[field]) for field in TSV_FIELDNAMES]))
+    return _upsert(records)
+
+def _upsert(records, cpe_rows=None, cvss_rows=None):
+    statements = []
+    
+    def record_write(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.split()[0]
+        if verb in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(verb)
+    
+    metrics = SyncMetrics()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record_write)
+        try:
+            NvdService._upsert_records(records, cpe_rows, cvss_rows, metrics)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record_write)
+    return metrics.rows, statements
+
+def test_content_hash_separates_fields():
+    assert content_hash(('a', 'bc')) != content_hash(('ab', 'c'))
+    assert content_hash((None,)) != content_hash(('',))
+    assert content_hash((datetime(2024, 5, 1, 0, 15),)) == content_hash(('2024-05-01T00:15:00',))
+
+def test_unchanged_records_are_not_written():
+    """同一记录再次经API或TSV写入时只查询、不写入"""
+    vuln = make_vulnerability('CVE-2025-9200', datetime(2025, 1, 1, 10), datetime(2025, 1, 2, 10))
+    rows, statements = upsert_api_page([vuln])
+    assert rows['inserted'] == 1 and statements.count('INSERT') == 3  # nvd、nvd_cpe、nvd_cvss
+    
+    for upsert in (upsert_api_page, upsert_tsv_rows, upsert_api_page):
+        rows, statements = upsert([vuln])
+        assert rows == {'inserted': 0, 'updated': 0, 'unchanged': 1}, upsert.__name__
+        assert statements == [], upsert.__name__
+
+def test_changed_children_are_replaced():
+    """只有子表内容变化时替换该CVE的子表行，内容变化时更新nvd行"""
+    vuln = make_vulnerability('CVE-2025-9201', datetime(2025, 1, 1, 10), datetime(2025, 1, 2, 10))
+    upsert_api_page([vuln])
+    vuln['cve']['configurations'][0]['nodes'][0]['cpeMatch'].append(
+        {'vulnerable': True, 'criteria': 'cpe:2.3:a:acme:gadget:2.0:*:*:*:*:*:*:*'})
+    rows, statements = upsert_api_page([vuln])
+    assert rows['updated'] == 1 and 'DELETE' in statements
+    with app.app_context():
+        assert NvdCpeMatch.query.filter_by(cve_id='CVE-2025-9201').count() == 2
+    
+    vuln['cve']['descriptions'][0]['value'] = '描述已更新'
+    rows, _ = upsert_api_page([vuln])
+    assert rows['updated'] == 1
+    with app.app_context():
+        assert NvdData.query.filter_by(cve_id='CVE-2025-9201').first().description == '描述已更新'
+
+def main():
+    """主函数"""
+    setup_module()
+    for test in (test_content_hash_separates_fields, test_unchanged_records_are_not_written,
+                 test_changed_children_are_replaced):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
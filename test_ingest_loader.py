@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量写入失败后的拆分定位
+
+写入使用模拟的数据库连接，不需要访问数据库。可以直接运行，也可以用pytest运行：
+    python test_ingest_loader.py
+    python -m pytest -q test_ingest_loader.py
+"""
+import logging
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pymysql
+from app.ingest.loader import RejectSink, _write_bisect, new_stats, write_batch
+
+logger = logging.getLogger('test_ingest_loader')
+
+class FakeParser:
+    """写入只用到解析器的表名、主键和upsert_sql，没有哈希列"""
+    table = 'nvd'
+    key = 'cve_id'
+    hash_column = None
+    upsert_sql = 'INSERT INTO nvd (cve_id, description) VALUES (%s, %s)'
+    key_index = 0
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        self.result = []
+    
+    def fetchall(self):
+        return self.result
+    
+    def executemany(self, sql, rows):
+        self.conn.attempts.append([row[0] for row in rows])
+        for row in rows:
+            if row[0] in self.conn.bad_keys:
+                raise pymysql.err.DataError(1406, f"Data too long for column 'description' ({row[0]})")
+            if self.conn.lock_errors:
+                self.conn.lock_errors -= 1
+                raise pymysql.err.OperationalError(1213, 'Deadlock found when trying to get lock')
+        self.conn.pending.extend(row[0] for row in rows)
+
+class FakeConnection:
+    """按主键模拟写入失败的连接：bad_keys中的记录引发DataError，前lock_errors次写入引发死锁"""
+    
+    def __init__(self, bad_keys=(), lock_errors=0):
+        self.bad_keys = set(bad_keys)
+        self.lock_errors = lock_errors
+        self.attempts = []
+        self.pending = []
+        self.committed = []
+    
+    def cursor(self):
+        return FakeCursor(self)
+    
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+    
+    def rollback(self):
+        self.pending = []
+
+def make_rows(count):
+    return [(line, (f'CVE-2024-{line:04d}', '描述')) for line in range(1, count + 1)]
+
+def test_write_bisect_rejects_bad_rows():
+    """批次中的错误记录被逐步拆分定位并拒绝，其余记录全部写入"""
+    rows = make_rows(8)
+    conn = FakeConnection(bad_keys={'CVE-2024-0003', 'CVE-2024-0007'})
+    stats = new_stats()
+    error_records = []
+    rejects = RejectSink(error_records, FakeParser.key_index)
+    
+    _write_bisect(conn, FakeParser, rows, set(), stats, rejects, logger)
+    
+    good = [row[0] for _, row in rows if row[0] not in conn.bad_keys]
+    assert sorted(conn.committed) == good
+    assert stats['imported_records'] == 6
+    assert stats['rejected_records'] == 2
+    assert stats['error_types']['individual_data_error'] == 2
+    assert [(error['line'], error['cve_id'], error['error_type']) for error in error_records] == \
+        [(3, 'CVE-2024-0003', 'data_error'), (7, 'CVE-2024-0007', 'data_error')]
+    # 整批1次，每个半批4次（半批、无错误的1/4批、有错误的1/4批、拆成两条），无错误的子批次不再拆分
+    assert len(conn.attempts) == 11
+
+def test_write_bisect_retries_deadlock():
+    """死锁按暂时性错误整批重试，不拆分批次也不拒绝记录"""
+    rows = make_rows(4)
+    conn = FakeConnection(lock_errors=1)
+    stats = new_stats()
+    rejects = RejectSink([], FakeParser.key_index)
+    
+    _write_bisect(conn, FakeParser, rows, set(), stats, rejects, logger)
+    
+    assert conn.committed == [row[0] for _, row in rows]
+    assert len(conn.attempts) == 2
+    assert stats['error_types']['transient_retry'] == 1
+    assert stats['rejected_records'] == 0
+
+def test_write_batch_rejects_single_row():
+    """只有一条记录的批次失败时直接拒绝，不再重写同一条记录"""
+    conn = FakeConnection(bad_keys={'CVE-2024-0001'})
+    stats = new_stats()
+    error_records = []
+    
+    write_batch(conn, FakeParser, make_rows(1), stats, error_records, logger)
+    
+    assert conn.attempts == [['CVE-2024-0001']]
+    assert stats['rejected_records'] == 1 and stats['split_batch_count'] == 0
+    assert [error['cve_id'] for error in error_records] == ['CVE-2024-0001']
+
+def main():
+    """主函数"""
+    for test in (test_write_bisect_rejects_bad_rows, test_write_bisect_retries_deadlock,
+                 test_write_batch_rejects_single_row):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试暂存表导入：暂存文件的行格式，以及数据库不允许LOAD DATA LOCAL或载入出现数据警告时
+在同一次导入中把已解析的暂存记录逐批写入
+
+使用模拟的数据库连接，不需要访问MySQL。可以直接运行，也可以用pytest运行：
+    python test_ingest_staging.py
+    python -m pytest -q test_ingest_staging.py
+"""
+import logging
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pymysql
+import app.ingest.loader as loader
+from app.ingest.loader import from_staging_line, import_file, to_staging_line
+from app.ingest.parsers import NvdTsvParser
+
+logger = logging.getLogger('test_ingest_staging')
+
+class CountingParser(NvdTsvParser):
+    """记录读取源文件的次数，不检查表结构"""
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+    
+    def read(self, f):
+        self.reads += 1
+        return super().read(f)
+    
+    def ensure_table(self, conn, logger):
+        pass
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def execute(self, sql, params=None):
+        if sql.startswith('LOAD DATA'):
+            if self.conn.load_error:
+                raise pymysql.err.OperationalError(self.conn.load_error, 'The used command is not allowed')
+        elif sql.startswith('SELECT cve_id'):
+            self.result = [(key, 'old-hash') for key in params if key in self.conn.table]
+        elif sql.startswith('SELECT COUNT(*)'):
+            self.result = [(len(self.conn.table),)]
+        return 0
+    
+    def executemany(self, sql, rows):
+        self.conn.pending.extend(rows)
+    
+    def fetchall(self):
+        return self.result
+    
+    def fetchone(self):
+        return self.result[0]
+
+class FakeConnection:
+    """模拟nvd表：table为已有记录的主键，load_error为LOAD DATA引发的错误码，warnings为载入后的警告"""
+    
+    def __init__(self, table=(), load_error=None, warnings=()):
+        self.table = set(table)
+        self.load_error = load_error
+        self.warnings = list(warnings)
+        self.pending = []
+        self.committed = []
+        self.open = True
+    
+    def cursor(self):
+        return FakeCursor(self)
+    
+    def show_warnings(self):
+        return self.warnings
+    
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.table.update(row[0] for row in self.pending)
+        self.pending = []
+    
+    def rollback(self):
+        self.pending = []
+    
+    def close(self):
+        self.open = False
+
+def import_staged(conn):
+    """用模拟连接以staged=True导入3条记录（其中CVE-2024-0001已存在），返回(是否成功, 统计, 解析器)"""
+    parser = CountingParser()
+    original_connect, original_log_dir = pymysql.connect, loader.LOG_DIR
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, '202405.tsv')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write('cve_id\tpublished_date\tlast_modified_date\tdescription\n')
+            for i in range(1, 4):
+                f.write(f'CVE-2024-000{i}\t2024-05-0{i}T00:00:00\t2024-05-0{i}T12:00:00\tOverflow in module {i}\n')
+        try:
+            pymysql.connect = lambda **kwargs: conn
+            loader.LOG_DIR = temp_dir
+            success, stats, _ = import_file(file_path, parser, logger, staged=True)
+        finally:
+            pymysql.connect, loader.LOG_DIR = original_connect, original_log_dir
+    return success, stats, parser
+
+def test_staging_line_round_trip():
+    """制表符、换行和反斜杠按LOAD DATA的默认规则转义，None写为\\N，读回时还原"""
+    row = ('CVE-2024-0001', 'a\tb\nc\\d\re\0f', None, True, False, 9.8,
+           datetime(2024, 5, 1, 0, 15, 6), date(2024, 5, 1))
+    line = to_staging_line(row)
+    assert line == ('CVE-2024-0001\ta\\tb\\nc\\\\d\\re\\0f\t\\N\t1\t0\t9.8\t'
+                    '2024-05-01 00:15:06\t2024-05-01\n')
+    assert from_staging_line(line) == ('CVE-2024-0001', 'a\tb\nc\\d\re\0f', None, '1', '0', '9.8',
+                                       '2024-05-01 00:15:06', '2024-05-01')
+    assert to_staging_line(('', 0)) == '\t0\n'
+    assert from_staging_line('\\\\N\t\n') == ('\\N', '')
+
+def test_falls_back_when_local_infile_disabled():
+    """数据库不允许LOAD DATA LOCAL时不重新解析源文件，逐批写入暂存记录并统计新增和更新"""
+    conn = FakeConnection(table={'CVE-2024-0001'}, load_error=1148)
+    success, stats, parser = import_staged(conn)
+    assert success and parser.reads == 1
+    assert stats['total_records'] == 3
+    assert (stats['imported_records'], stats['inserted_records'], stats['updated_records']) == (3, 2, 1)
+    # 写入的记录不含暂存文件中的行号列，字段值与暂存前一致
+    assert [row[0] for row in conn.committed] == ['CVE-2024-0001', 'CVE-2024-0002', 'CVE-2024-0003']
+    assert all(len(row) == len(parser.columns) for row in conn.committed)
+    assert conn.committed[0][3] == 'Overflow in module 1'
+
+def test_falls_back_on_data_warnings():
+    """载入暂存表出现数据警告时不合并，改为逐批写入"""
+    conn = FakeConnection(table={'CVE-2024-0001'}, warnings=[('Warning', 1265, "Data truncated for column")])
+    success, stats, parser = import_staged(conn)
+    assert success and parser.reads == 1
+    assert stats['error_types']['load_warning'] == 1
+    assert (stats['imported_records'], stats['inserted_records'], stats['updated_records']) == (3, 2, 1)
+    assert len(conn.committed) == 3
+
+def main():
+    """主函数"""
+    for test in (test_staging_line_round_trip, test_falls_back_when_local_infile_disabled,
+                 test_falls_back_on_data_warnings):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
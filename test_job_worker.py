@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试后台任务执行器：领取并执行排队的任务、被中断的任务放回队列、清理已退出进程留下的任务
+
+使用内存SQLite，不需要访问MySQL。可以直接运行，也可以用pytest运行：
+    python test_job_worker.py
+    python -m pytest -q test_job_worker.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import db
+from app.jobs.models import SyncJob
+from app.jobs.runner import JobRunner
+from app.jobs.service import JOB_HANDLERS, JobService
+from nvd_test_support import create_test_app
+
+app = None
+
+# 测试用的任务执行函数，按params['action']返回结果、抛出异常或模拟进程被中断
+def sample_handler(params, progress):
+    progress(1, 2, '执行中')
+    if params.get('action') == 'fail':
+        raise ValueError('执行出错')
+    if params.get('action') == 'exit':
+        raise SystemExit(1)
+    return {'echo': params.get('value')}
+
+def setup_module(module=None):
+    global app
+    JOB_HANDLERS['test_job'] = f'{__name__}:sample_handler'
+    app = create_test_app()
+
+def teardown_module(module=None):
+    JOB_HANDLERS.pop('test_job', None)
+
+def _clear_jobs():
+    SyncJob.query.delete()
+    db.session.commit()
+
+def test_runner_runs_queued_jobs():
+    """执行器按提交顺序逐个执行任务，记录结果和错误"""
+    with app.app_context():
+        _clear_jobs()
+        first = JobService.enqueue('test_job', {'value': 1}).id
+        second = JobService.enqueue('test_job', {'action': 'fail'}).id
+    
+    runner = JobRunner(app)
+    assert runner.run_once() is True
+    assert runner.run_once() is True
+    assert runner.run_once() is False
+    
+    with app.app_context():
+        job = JobService.get(first).to_dict()
+        assert job['status'] == 'success' and job['result'] == {'echo': 1} and job['percent'] == 100
+        assert job['worker'] == runner.worker
+        job = JobService.get(second).to_dict()
+        assert job['status'] == 'failed' and job['error'] == '执行出错'
+        assert job['progress_current'] == 1 and job['progress_total'] == 2
+
+def test_run_forever_until_stopped():
+    """后台线程中的执行器持续领取新任务，stop()后退出"""
+    runner = JobRunner(app, poll_interval=0.05).start()
+    try:
+        with app.app_context():
+            _clear_jobs()
+            job_id = JobService.enqueue('test_job', {'value': 'later'}).id
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with app.app_context():
+                if JobService.get(job_id).status == 'success':
+                    break
+            time.sleep(0.05)
+        else:
+            raise AssertionError('任务没有被执行')
+    finally:
+        runner.stop()
+    assert runner.stopping
+
+def test_interrupted_job_is_requeued():
+    """执行进程被中断时任务放回队列，之后可以重新领取"""
+    with app.app_context():
+        _clear_jobs()
+        job_id = JobService.enqueue('test_job', {'action': 'exit'}).id
+        job = JobService.claim_next('host:1')
+        try:
+            JobService.run(job)
+        except SystemExit:
+            pass
+        else:
+            raise AssertionError('SystemExit没有继续抛出')
+        
+        job = JobService.get(job_id)
+        assert job.status == 'queued' and job.worker is None and job.started_at is None
+        assert JobService.claim_next('host:2').id == job_id
+
+def test_fail_orphaned_and_stale():
+    """本机上执行进程已退出的任务和长时间没有更新的任务标记为失败，存活进程的任务不受影响"""
+    host = socket.gethostname()
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    now = datetime.utcnow()
+    with app.app_context():
+        _clear_jobs()
+        jobs = [
+            SyncJob(job_type='test_job', status='running', worker=f'{host}:{exited.pid}', updated_at=now),
+            SyncJob(job_type='test_job', status='running', worker=f'{host}:{os.getpid()}', updated_at=now),
+            SyncJob(job_type='test_job', status='running', worker='other-host:1', updated_at=now),
+            SyncJob(job_type='test_job', status='running', worker='other-host:2',
+                    updated_at=now - timedelta(hours=1)),
+        ]
+        db.session.add_all(jobs)
+        db.session.commit()
+        job_ids = [job.id for job in jobs]
+        
+        assert JobService.fail_orphaned(host) == 1
+        assert JobService.fail_stale() == 1
+        statuses = [JobService.get(job_id).status for job_id in job_ids]
+        assert statuses == ['failed', 'running', 'running', 'failed']
+
+def main():
+    """主函数"""
+    setup_module()
+    try:
+        for test in (test_runner_runs_queued_jobs, test_run_forever_until_stopped, test_interrupted_job_is_requeued,
+                     test_fail_orphaned_and_stale):
+            test()
+            print(f"✓ {test.__name__}")
+    finally:
+        teardown_module()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试定时任务主节点锁：非MySQL数据库始终为主节点、检查锁时不阻塞is_leader()、
+失去锁时停止同步并在下次从检查点继续
+
+使用内存SQLite和本地NVD替身服务，不需要访问MySQL和NVD。可以直接运行，也可以用pytest运行：
+    python test_leader.py
+    python -m pytest -q test_leader.py
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.nvd.service as nvd_service
+from app.leader import LeaderLock, LeadershipLost, check_leader, leader_only
+from app.nvd.models import NvdData, SyncCheckpoint
+from app.nvd.service import NvdService
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+class HangingEngine:
+    """connect()一直等到released被设置，模拟无响应的数据库"""
+    
+    def __init__(self):
+        self.connecting = threading.Event()
+        self.released = threading.Event()
+    
+    def connect(self):
+        self.connecting.set()
+        self.released.wait(5)
+        raise ConnectionError('数据库无响应')
+
+class FakeLock:
+    """is_leader()依次返回给定的结果，用于模拟执行期间失去锁"""
+    name = 'test-scheduler'
+    
+    def __init__(self, *results):
+        self.results = list(results)
+    
+    def is_leader(self):
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+def test_non_mysql_is_always_leader():
+    lock = LeaderLock(create_test_app(), 'test-scheduler').start()
+    assert not lock.enabled and lock.is_leader()
+    lock.release()
+
+def test_is_leader_not_blocked_by_slow_refresh():
+    """获取锁时连接数据库无响应，is_leader()仍然立即返回"""
+    lock = LeaderLock(create_test_app(), 'test-scheduler')
+    lock.enabled = True
+    lock.engine = HangingEngine()
+    refresh = threading.Thread(target=lock._refresh)
+    refresh.start()
+    try:
+        assert lock.engine.connecting.wait(5)
+        started = time.monotonic()
+        assert lock.is_leader() is False
+        assert time.monotonic() - started < 0.5
+    finally:
+        lock.engine.released.set()
+        refresh.join()
+
+def test_check_leader_in_leader_only():
+    """leader_only任务中失去锁时check_leader()抛出LeadershipLost，不是主节点时任务跳过"""
+    pages = []
+    
+    def sync():
+        for page in range(3):
+            check_leader()
+            pages.append(page)
+        return len(pages)
+    
+    assert leader_only(FakeLock(True), sync)() == 3
+    pages.clear()
+    try:
+        leader_only(FakeLock(True, True, True, False), sync)()
+    except LeadershipLost:
+        pass
+    else:
+        raise AssertionError('失去锁后没有抛出LeadershipLost')
+    assert pages == [0, 1]
+    assert leader_only(FakeLock(False), sync)() is None
+    # 不在leader_only任务中时不检查
+    check_leader()
+
+def test_sync_resumes_after_leadership_lost():
+    """定时增量同步中途失去锁后停止，下次同步从检查点的下一页继续，不重新请求已写入的页"""
+    now = datetime.utcnow()
+    server = NvdStubServer([make_vulnerability(f'CVE-2025-930{i}', now - timedelta(days=10),
+                                               now - timedelta(hours=i + 1)) for i in range(3)]).start()
+    test_app = create_test_app()
+    batch_size = nvd_service.BATCH_SIZE
+    try:
+        use_stub_server(server)
+        NvdService.set_app(test_app)
+        nvd_service.BATCH_SIZE = 1
+        with test_app.app_context():
+            NvdService._save_watermark(now - timedelta(days=1), now - timedelta(days=1))
+        
+        # 写入第一页后失去锁
+        sync = leader_only(FakeLock(True, True, False), NvdService.sync_incremental)
+        imported_count, start_date, interrupted_end = sync()
+        assert imported_count == -1
+        with test_app.app_context():
+            assert NvdData.query.count() == 1
+            assert [checkpoint.next_start_index for checkpoint in SyncCheckpoint.query.all()] == [1]
+            assert NvdService.get_watermark().last_mod_end == start_date
+        
+        # 续传的分段只请求剩下的2页；结束时间取整秒，进入下一秒后才有新的分段，新分段没有记录，请求1次
+        request_count = server.request_count
+        imported_count, _, end_date = NvdService.sync_incremental()
+        assert imported_count == 2
+        assert server.request_count - request_count == 2 + (end_date > interrupted_end)
+        with test_app.app_context():
+            assert NvdData.query.count() == 3
+            assert SyncCheckpoint.query.count() == 0
+            assert NvdService.get_watermark().last_mod_end == end_date
+    finally:
+        nvd_service.BATCH_SIZE = batch_size
+        server.stop()
+
+def main():
+    """主函数"""
+    for test in (test_non_mysql_is_always_leader, test_is_leader_not_blocked_by_slow_refresh,
+                 test_check_leader_in_leader_only, test_sync_resumes_after_leadership_lost):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试并发窗口化回填：按自然月切分窗口，多个窗口并发请求后写出月度TSV文件或直接写入数据库
+
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_nvd_backfill.py
+    python -m pytest -q test_nvd_backfill.py
+"""
+import csv
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.backfill import NvdBackfill, split_windows
+from app.nvd.client import NvdClient
+from app.nvd.models import NvdData
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+# 2024年11月至2025年1月每月发布2条记录
+VULNERABILITIES = [make_vulnerability(f'CVE-2024-95{month:02d}{i}', datetime(year, month, 10 + i),
+                                      datetime(year, month, 20))
+                   for year, month in ((2024, 11), (2024, 12), (2025, 1)) for i in range(2)]
+
+def test_split_windows():
+    """按自然月切分，首尾窗口按给定的起止时间截断"""
+    windows = split_windows(datetime(2024, 11, 15), datetime(2025, 2, 10))
+    assert windows == [
+        (datetime(2024, 11, 15), datetime(2024, 12, 1), '202411'),
+        (datetime(2024, 12, 1), datetime(2025, 1, 1), '202412'),
+        (datetime(2025, 1, 1), datetime(2025, 2, 1), '202501'),
+        (datetime(2025, 2, 1), datetime(2025, 2, 10), '202502'),
+    ]
+    assert split_windows(datetime(2025, 1, 1), datetime(2025, 2, 1)) == [
+        (datetime(2025, 1, 1), datetime(2025, 2, 1), '202501')]
+    assert split_windows(datetime(2025, 1, 1), datetime(2025, 1, 1)) == []
+
+def test_backfill_tsv():
+    """每个月份窗口写出YYYYMM.tsv，已存在的文件在下次回填时跳过"""
+    server = NvdStubServer(VULNERABILITIES).start()
+    try:
+        use_stub_server(server)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            backfill = NvdBackfill(output_dir=temp_dir, max_workers=3, client=NvdClient(cache=False))
+            results = backfill.run(datetime(2024, 11, 1), datetime(2025, 2, 1))
+            assert results == {'202411': 2, '202412': 2, '202501': 2}
+            assert sorted(os.listdir(temp_dir)) == ['202411.tsv', '202412.tsv', '202501.tsv']
+            with open(os.path.join(temp_dir, '202412.tsv'), encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f, delimiter='\t'))
+            assert [row['CVE ID'] for row in rows] == ['CVE-2024-95120', 'CVE-2024-95121']
+            
+            request_count = server.request_count
+            assert backfill.run(datetime(2024, 11, 1), datetime(2025, 2, 1)) == \
+                {'202411': 0, '202412': 0, '202501': 0}
+            assert server.request_count == request_count
+    finally:
+        server.stop()
+
+def test_backfill_db():
+    """output='db'时各窗口的记录直接写入nvd表"""
+    server = NvdStubServer(VULNERABILITIES).start()
+    test_app = create_test_app()
+    try:
+        use_stub_server(server)
+        # 内存SQLite的所有线程共用一个连接，不能并发写入，这里逐个窗口执行
+        backfill = NvdBackfill(output='db', app=test_app, max_workers=1, client=NvdClient(cache=False))
+        assert backfill.run(datetime(2024, 11, 1), datetime(2025, 2, 1)) == {'202411': 2, '202412': 2, '202501': 2}
+        with test_app.app_context():
+            assert NvdData.query.count() == 6
+    finally:
+        server.stop()
+
+def main():
+    """主函数"""
+    for test in (test_split_windows, test_backfill_tsv, test_backfill_db):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试回填检查点：每页写入后记录下一页的startIndex，中断后重新运行时从检查点继续，
+不重新请求已写入的页
+
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_nvd_checkpoint.py
+    python -m pytest -q test_nvd_checkpoint.py
+"""
+import csv
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.nvd.service as nvd_service
+from app.nvd.backfill import NvdBackfill
+from app.nvd.checkpoint import DbCheckpoint, FileCheckpoint, checkpoint_key
+from app.nvd.client import NvdClient
+from app.nvd.models import NvdData, SyncCheckpoint
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+# 2024年12月发布的5条记录，每页2条时分3页
+VULNERABILITIES = [make_vulnerability(f'CVE-2024-960{i}', datetime(2024, 12, 10 + i), datetime(2024, 12, 20))
+                   for i in range(5)]
+
+class InterruptingClient(NvdClient):
+    """返回pages页之后模拟网络中断"""
+    
+    def __init__(self, pages):
+        super().__init__(cache=False)
+        self.pages = pages
+    
+    def iter_pages(self, params, start_index=0, items_key='vulnerabilities'):
+        for page_number, page in enumerate(super().iter_pages(params, start_index, items_key)):
+            if page_number == self.pages:
+                raise ConnectionError('网络中断')
+            yield page
+
+# 用替身服务运行两次12月的回填：第一次在2页后中断，第二次从检查点继续，返回(两次的结果, 第二次的请求数)
+def run_interrupted_backfill(server, **kwargs):
+    batch_size = nvd_service.BATCH_SIZE
+    try:
+        use_stub_server(server)
+        nvd_service.BATCH_SIZE = 2
+        window = (datetime(2024, 12, 1), datetime(2025, 1, 1))
+        first = NvdBackfill(max_workers=1, client=InterruptingClient(2), **kwargs).run(*window)
+        request_count = server.request_count
+        second = NvdBackfill(max_workers=1, client=NvdClient(cache=False), **kwargs).run(*window)
+        return first, second, server.request_count - request_count
+    finally:
+        nvd_service.BATCH_SIZE = batch_size
+
+def test_file_checkpoint():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        checkpoint = FileCheckpoint(os.path.join(temp_dir, '202412.tsv.part.checkpoint'),
+                                    datetime(2024, 12, 1), datetime(2025, 1, 1))
+        assert checkpoint.load() is None
+        checkpoint.save(4, 5, bytes=120, count=4)
+        assert checkpoint.load() == {'window_start': '2024-12-01T00:00:00', 'window_end': '2025-01-01T00:00:00',
+                                     'next_start_index': 4, 'total_results': 5, 'bytes': 120, 'count': 4}
+        checkpoint.clear()
+        assert checkpoint.load() is None and os.listdir(temp_dir) == []
+
+def test_db_checkpoint():
+    test_app = create_test_app()
+    window_start, window_end = datetime(2024, 12, 1), datetime(2025, 1, 1)
+    key = checkpoint_key('backfill', 'pub', window_start, window_end)
+    assert key == 'backfill:pub:20241201T000000:20250101T000000'
+    with test_app.app_context():
+        checkpoint = DbCheckpoint(key, window_start, window_end)
+        assert checkpoint.load() is None
+        checkpoint.save(2, 5)
+        checkpoint.save(4, 5)
+        assert checkpoint.load() == {'next_start_index': 4, 'total_results': 5}
+        assert SyncCheckpoint.query.count() == 1
+        checkpoint.clear()
+        assert checkpoint.load() is None
+
+def test_tsv_backfill_resumes():
+    """写TSV的回填中断后，第二次只请求第3页，文件中每条记录只出现一次"""
+    server = NvdStubServer(VULNERABILITIES).start()
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first, second, request_count = run_interrupted_backfill(server, output_dir=temp_dir)
+            assert first == {'202412': -1}
+            assert second == {'202412': 5}
+            assert request_count == 1
+            assert os.listdir(temp_dir) == ['202412.tsv']
+            with open(os.path.join(temp_dir, '202412.tsv'), encoding='utf-8', newline='') as f:
+                rows = list(csv.DictReader(f, delimiter='\t'))
+            assert [row['CVE ID'] for row in rows] == [f'CVE-2024-960{i}' for i in range(5)]
+    finally:
+        server.stop()
+
+def test_db_backfill_resumes():
+    """写数据库的回填中断后，第二次只请求第3页，完成后删除检查点"""
+    server = NvdStubServer(VULNERABILITIES).start()
+    test_app = create_test_app()
+    try:
+        first, second, request_count = run_interrupted_backfill(server, output='db', app=test_app)
+        assert first == {'202412': -1}
+        # 第二次只写入续传的最后一页
+        assert second == {'202412': 1}
+        assert request_count == 1
+        with test_app.app_context():
+            assert NvdData.query.count() == 5
+            assert SyncCheckpoint.query.count() == 0
+    finally:
+        server.stop()
+
+def main():
+    """主函数"""
+    for test in (test_file_checkpoint, test_db_checkpoint, test_tsv_backfill_resumes, test_db_backfill_resumes):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
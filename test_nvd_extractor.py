@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试CVE记录抽取：API记录转换为nvd表的记录、时间解析、TSV归档的往返和内容哈希
+
+可以直接运行，也可以用pytest运行：
+    python test_nvd_extractor.py
+    python -m pytest -q test_nvd_extractor.py
+"""
+import csv
+import io
+import os
+import sys
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.extractor import (extract_record, extract_records, parse_nvd_datetime, record_from_tsv_fields,
+                               record_hash, to_tsv_row, TSV_FIELDNAMES)
+
+# 生成API 2.0格式的漏洞记录
+def make_vulnerability(cve_id, description='Buffer overflow\tin parser'):
+    return {'cve': {
+        'id': cve_id,
+        'published': '2024-05-01T00:15:06.890',
+        'lastModified': '2024-06-02T13:45:00.000',
+        'descriptions': [{'lang': 'en', 'value': description}],
+        'metrics': {'cvssMetricV31': [{
+            'source': 'nvd@nist.gov',
+            'type': 'Primary',
+            'cvssData': {'version': '3.1', 'baseScore': 9.8, 'baseSeverity': 'CRITICAL',
+                         'vectorString': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H'}
+        }]},
+        'configurations': [{'nodes': [{'cpeMatch': [
+            {'vulnerable': True, 'criteria': 'cpe:2.3:a:acme:widget:1.0:*:*:*:*:*:*:*'}
+        ]}]}]
+    }}
+
+def test_extract_record():
+    """按优先级选择CVSS评分，厂商和产品取第一个受影响的CPE，缺少ID或日期时返回None"""
+    record = extract_record(make_vulnerability('CVE-2024-0001'))
+    assert record == {
+        'cve_id': 'CVE-2024-0001',
+        'published_date': datetime(2024, 5, 1, 0, 15, 6, 890000),
+        'last_modified_date': datetime(2024, 6, 2, 13, 45),
+        'description': 'Buffer overflow\tin parser',
+        'base_score': 9.8,
+        'base_severity': 'CRITICAL',
+        'vector_string': 'CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H',
+        'vendor': 'acme',
+        'product': 'widget'
+    }
+    assert extract_record(make_vulnerability('CVE-2024-0001')['cve']) == record
+    assert extract_record({'cve': {'id': 'CVE-2024-0002'}}) is None
+
+def test_parse_nvd_datetime():
+    assert parse_nvd_datetime('2024-05-01T00:15:06.890') == datetime(2024, 5, 1, 0, 15, 6, 890000)
+    assert parse_nvd_datetime('2024-05-01T00:15:06.890Z') == datetime(2024, 5, 1, 0, 15, 6, 890000)
+    assert parse_nvd_datetime('2024-05-01') == datetime(2024, 5, 1)
+
+def test_tsv_round_trip():
+    """API记录写成TSV行再读回，得到相同的记录和内容哈希"""
+    record = extract_records([make_vulnerability('CVE-2024-0001')])[0]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=TSV_FIELDNAMES, delimiter='\t')
+    writer.writeheader()
+    writer.writerow(to_tsv_row(record))
+    buffer.seek(0)
+    reader = csv.reader(buffer, delimiter='\t')
+    assert next(reader) == TSV_FIELDNAMES
+    parsed = record_from_tsv_fields(next(reader))
+    for column in ('cve_id', 'published_date', 'last_modified_date', 'description', 'base_score', 'base_severity',
+                   'vector_string', 'vendor', 'product'):
+        assert parsed[column] == record[column], column
+    assert record_hash(parsed) == record_hash(record)
+
+def main():
+    """主函数"""
+    for test in (test_extract_record, test_parse_nvd_datetime, test_tsv_round_trip):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
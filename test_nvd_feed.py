@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试从本地NVD JSON 2.0数据源文件导入：gzip压缩的文件按块流式解析并分页，
+经过与API同步相同的抽取流程写入nvd表
+
+使用内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_nvd_feed.py
+    python -m pytest -q test_nvd_feed.py
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.feed import iter_feed_pages, iter_feed_vulnerabilities
+from app.nvd.models import NvdCpeMatch, NvdData
+from app.nvd.service import NvdService
+from nvd_test_support import create_test_app, make_vulnerability
+
+# 写出gzip压缩的数据源文件
+def write_feed(file_path, vulnerabilities):
+    with gzip.open(file_path, 'wt', encoding='utf-8') as f:
+        json.dump({'format': 'NVD_CVE', 'totalResults': len(vulnerabilities),
+                   'vulnerabilities': vulnerabilities}, f, indent=2)
+
+def test_iter_feed_pages():
+    """gzip压缩的数据源文件按page_size分页，startIndex连续"""
+    vulnerabilities = [make_vulnerability(f'CVE-2024-{i:04d}', datetime(2024, 5, 1), datetime(2024, 6, 2))
+                       for i in range(5)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, 'nvdcve-2.0-2024.json.gz')
+        write_feed(file_path, vulnerabilities)
+        
+        pages = list(iter_feed_pages(file_path, page_size=2))
+        assert [(start, total, len(data['vulnerabilities'])) for start, total, data in pages] == \
+            [(0, 0, 2), (2, 0, 2), (4, 0, 1)]
+        assert [v for _, _, data in pages for v in data['vulnerabilities']] == vulnerabilities
+        
+        # 读取块远小于单条记录时，元素跨越多个块也能完整解析
+        assert list(iter_feed_vulnerabilities(file_path, chunk_size=7)) == vulnerabilities
+
+def test_import_from_feeds():
+    """镜像目录中的每个数据源文件按页写入nvd表和子表，重复导入时不新增记录"""
+    test_app = create_test_app()
+    NvdService.set_app(test_app)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for year in (2023, 2024):
+            write_feed(os.path.join(temp_dir, f'nvdcve-2.0-{year}.json.gz'),
+                       [make_vulnerability(f'CVE-{year}-98{i:02d}', datetime(year, 5, 1), datetime(year, 6, 2))
+                        for i in range(3)])
+        
+        assert NvdService.import_from_feeds(temp_dir, page_size=2) == (2, 6, 6)
+        assert NvdService.import_from_feeds(temp_dir, page_size=2) == (2, 6, 0)
+    with test_app.app_context():
+        assert NvdData.query.count() == 6
+        assert NvdCpeMatch.query.count() == 6
+
+def main():
+    """主函数"""
+    for test in (test_iter_feed_pages, test_import_from_feeds):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
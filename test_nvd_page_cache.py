@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试NVD分页缓存：客户端把每页原始响应压缩保存，离线重放时不访问网络，
+只重放CVE接口的页面，同一组查询参数以最近一次获取的页面为准
+
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_nvd_page_cache.py
+    python -m pytest -q test_nvd_page_cache.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.client import NvdClient
+from app.nvd.history import NvdHistoryClient
+from app.nvd.models import NvdData
+from app.nvd.page_cache import NvdPageCache, is_cve_page
+from app.nvd.service import NvdService
+from app.nvd.stub_server import NvdStubServer, changes_from_vulnerabilities
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+def test_store_and_iter_pages():
+    """同一组查询参数保存多次时默认只返回最近一次，按获取时间排序，接口地址不同时键不同"""
+    params = {'resultsPerPage': 2000, 'startIndex': 0}
+    assert NvdPageCache.cache_key(params, 'https://a/cves') != NvdPageCache.cache_key(params, 'https://a/cvehistory')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = NvdPageCache(temp_dir)
+        cache.store(params, b'{"totalResults": 1}', datetime(2025, 1, 1), url='https://a/cves')
+        cache.store(params, b'{"totalResults": 2}', datetime(2025, 1, 2), url='https://a/cves')
+        cache.store({'cveId': 'CVE-2025-1'}, b'{"totalResults": 3}', datetime(2025, 1, 3), url='https://a/cves')
+        
+        assert [page['response']['totalResults'] for page in cache.iter_pages()] == [2, 3]
+        assert [page['response']['totalResults'] for page in cache.iter_pages(latest_only=False)] == [1, 2, 3]
+        assert [page['response']['totalResults'] for page in cache.iter_pages(since=datetime(2025, 1, 3))] == [3]
+        page = next(cache.iter_pages())
+        assert page['url'] == 'https://a/cves' and page['params'] == params
+        assert page['fetched_at'] == '2025-01-02T00:00:00'
+
+def test_replay_from_cache_offline():
+    """同步时缓存的页面在替身服务停止后重放写入数据库，变更历史接口的页面被跳过"""
+    vulnerabilities = [make_vulnerability(f'CVE-2025-970{i}', datetime(2025, 3, 1 + i), datetime(2025, 3, 10))
+                       for i in range(3)]
+    server = NvdStubServer(vulnerabilities, changes_from_vulnerabilities(vulnerabilities)).start()
+    test_app = create_test_app()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = NvdPageCache(temp_dir)
+        try:
+            use_stub_server(server)
+            params = NvdService._build_query_params(datetime(2025, 3, 1), datetime(2025, 4, 1))
+            assert sum(len(data['vulnerabilities']) for _, _, data in NvdClient(cache=cache).iter_pages(params)) == 3
+            history_client = NvdHistoryClient(client=NvdClient(api_url=server.history_url, cache=cache))
+            changes = history_client.collect_changes(datetime(2025, 3, 9), datetime(2025, 3, 11))
+            assert len(changes.cve_ids) == 3
+        finally:
+            server.stop()
+        
+        pages = list(cache.iter_pages())
+        assert len(pages) == 2
+        assert [is_cve_page(page) for page in pages] == [True, False]
+        
+        NvdService.set_app(test_app)
+        assert NvdService.replay_from_cache(temp_dir) == (1, 3, 3)
+        with test_app.app_context():
+            assert NvdData.query.count() == 3
+
+def main():
+    """主函数"""
+    for test in (test_store_and_iter_pages, test_replay_from_cache_offline):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+用本地NVD API替身服务测试基于变更历史的增量同步
+
+替身服务提供漏洞记录和变更事件，数据库使用内存SQLite，不需要访问NVD和MySQL。
+可以直接运行，也可以用pytest运行：
+    python test_nvd_stub_sync.py
+    python -m pytest -q test_nvd_stub_sync.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.nvd.service as nvd_service
+from app import db
+from app.nvd.models import NvdData, NvdCpeMatch, NvdCvssMetric, SyncWatermark
+from app.nvd.service import NvdService, HISTORY_WATERMARK_NAME
+from app.nvd.stub_server import NvdStubServer, changes_from_vulnerabilities
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+app = None
+server = None
+
+def setup_module(module=None):
+    """启动替身服务并创建内存SQLite数据库"""
+    global app, server
+    now = datetime.utcnow()
+    recent = [make_vulnerability(f'CVE-2025-900{i}', now - timedelta(days=30), now - timedelta(hours=i + 1))
+              for i in range(3)]
+    old = make_vulnerability('CVE-2024-9000', now - timedelta(days=60), now - timedelta(days=20))
+    # 只有前两条近期记录和旧记录有变更事件
+    changes = changes_from_vulnerabilities(recent[:2] + [old])
+    server = NvdStubServer(recent + [old], changes).start()
+    use_stub_server(server)
+    app = create_test_app()
+    NvdService.set_app(app)
+
+def teardown_module(module=None):
+    server.stop()
+
+def _targeted(test):
+    """把分页大小改为1条，使逐条拉取变化的CVE比分页同步的请求少"""
+    def run():
+        batch_size = nvd_service.BATCH_SIZE
+        nvd_service.BATCH_SIZE = 1
+        try:
+            test()
+        finally:
+            nvd_service.BATCH_SIZE = batch_size
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run
+
+@_targeted
+def test_sync_from_history():
+    """只拉取变更事件涉及的CVE，再次同步时不重复新增"""
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=2)
+    imported_count, _, _ = NvdService.sync_from_history(start_date, end_date)
+    assert imported_count == 2
+    with app.app_context():
+        assert db.session.query(NvdData.cve_id).filter(NvdData.cve_id.like('CVE-2025-%')).count() == 2
+        assert NvdData.query.filter_by(cve_id='CVE-2025-9002').first() is None
+        assert NvdCpeMatch.query.filter_by(cve_id='CVE-2025-9000').count() == 1
+        assert NvdCvssMetric.query.filter_by(cve_id='CVE-2025-9000').count() == 1
+    
+    # 没有新的变更时不新增
+    imported_count, _, _ = NvdService.sync_from_history(start_date, end_date)
+    assert imported_count == 0
+
+@_targeted
+def test_sync_from_history_updates_changed_cve():
+    """变更事件对应的CVE内容变化时更新已有记录"""
+    vuln = server._by_id['CVE-2025-9000']
+    modified = datetime.utcnow() - timedelta(minutes=5)
+    vuln['cve']['lastModified'] = modified.isoformat(timespec='milliseconds')
+    vuln['cve']['descriptions'][0]['value'] = '描述已更新'
+    server.changes.extend(changes_from_vulnerabilities([vuln]))
+    
+    request_count = server.request_count
+    imported_count, _, _ = NvdService.sync_from_history(datetime.utcnow() - timedelta(days=2), datetime.utcnow())
+    assert imported_count == 0
+    # 变更历史和统计页数各一次请求，再逐条拉取变化的2个CVE
+    assert server.request_count - request_count == 4
+    with app.app_context():
+        assert NvdData.query.filter_by(cve_id='CVE-2025-9000').first().description == '描述已更新'
+
+def test_sync_from_history_pages_when_cheaper():
+    """变化的CVE不少于分页同步需要的页数时按lastModified窗口分页，并推进变更历史水位线"""
+    request_count = server.request_count
+    imported_count, start, end = NvdService.sync_from_history(default_days=30)
+    # CVE-2025-9002没有变更事件，但在lastModified窗口内，分页同步时一起写入
+    assert imported_count == 2
+    # 变更历史、统计页数和一页分页数据各一次请求，而不是按3个变化的CVE逐条请求
+    assert server.request_count - request_count == 3
+    with app.app_context():
+        assert NvdData.query.filter_by(cve_id='CVE-2025-9002').first() is not None
+        assert NvdData.query.filter_by(cve_id='CVE-2024-9000').first() is not None
+        watermark = SyncWatermark.query.filter_by(name=HISTORY_WATERMARK_NAME).first()
+        assert watermark.last_mod_start == start and watermark.last_mod_end == end
+
+def main():
+    """主函数"""
+    setup_module()
+    try:
+        for test in (test_sync_from_history, test_sync_from_history_updates_changed_cve,
+                     test_sync_from_history_pages_when_cheaper):
+            test()
+            print(f"✓ {test.__name__}")
+    finally:
+        teardown_module()
+    print(f"替身服务共处理 {server.request_count} 个请求，状态码分布: {dict(server.status_counts)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试基于lastModified水位线的增量同步：只请求水位线之后修改的记录，成功后推进水位线，
+水位线的结束时间取整秒（MySQL的DATETIME列不保存小数秒）
+
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_nvd_watermark.py
+    python -m pytest -q test_nvd_watermark.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.models import NvdData
+from app.nvd.service import NvdService
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+def test_sync_incremental_advances_watermark():
+    """第一次同步回溯default_days天，之后从水位线继续，只拉取新修改的记录"""
+    now = datetime.utcnow()
+    server = NvdStubServer([
+        make_vulnerability('CVE-2025-9400', now - timedelta(days=30), now - timedelta(hours=2)),
+        make_vulnerability('CVE-2025-9401', now - timedelta(days=30), now - timedelta(days=3)),
+    ]).start()
+    test_app = create_test_app()
+    try:
+        use_stub_server(server)
+        NvdService.set_app(test_app)
+        
+        imported_count, _, end_date = NvdService.sync_incremental(default_days=1)
+        assert imported_count == 1
+        assert end_date.microsecond == 0
+        with test_app.app_context():
+            assert [row.cve_id for row in NvdData.query.all()] == ['CVE-2025-9400']
+            assert NvdService.get_watermark().last_mod_end == end_date
+        
+        # 没有新修改的记录，下次同步从上次的结束时间开始
+        imported_count, next_start, next_end = NvdService.sync_incremental(default_days=1)
+        assert imported_count == 0
+        assert next_start == end_date and next_end.microsecond == 0
+        with test_app.app_context():
+            assert NvdService.get_watermark().last_mod_end == next_end
+    finally:
+        server.stop()
+
+def main():
+    """主函数"""
+    test_sync_incremental_advances_watermark()
+    print("✓ test_sync_incremental_advances_watermark")
+
+if __name__ == "__main__":
+    main()
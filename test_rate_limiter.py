@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试NVD限速器和客户端的退避：预算内立即放行、用完后等待最早的请求移出窗口、
+收到429/503后按Retry-After暂停共享限速器的所有请求再重试
+
+使用本地NVD替身服务，不需要访问NVD。可以直接运行，也可以用pytest运行：
+    python test_rate_limiter.py
+    python -m pytest -q test_rate_limiter.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.nvd.client import NvdClient
+from app.nvd.rate_limiter import RateLimiter
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import make_vulnerability
+
+def test_rate_limiter():
+    """预算内立即放行，用完后等待最早的请求移出窗口"""
+    limiter = RateLimiter(3, period=0.3)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.1
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.3
+
+def test_rate_limiter_pause():
+    """pause期间即使还有预算也要等待"""
+    limiter = RateLimiter(10, period=30)
+    limiter.pause(0.2)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.2
+
+def test_client_retries_after_throttling():
+    """替身服务按固定种子注入429/503，客户端按Retry-After暂停后重试直到成功"""
+    server = NvdStubServer([make_vulnerability('CVE-2025-9500', datetime(2025, 1, 1), datetime(2025, 1, 2))],
+                           error_rate=0.5, retry_after=0.1, seed=3).start()
+    try:
+        client = NvdClient(api_key='stub', api_url=server.cves_url, rate_limiter=RateLimiter(100, period=30),
+                           cache=False, max_retries=10)
+        started = time.monotonic()
+        data = client.fetch_page({'cveId': 'CVE-2025-9500'})
+        assert data['totalResults'] == 1
+        retries = server.request_count - 1
+        assert retries >= 1
+        assert time.monotonic() - started >= 0.1 * retries
+    finally:
+        server.stop()
+
+def main():
+    """主函数"""
+    for test in (test_rate_limiter, test_rate_limiter_pause, test_client_retries_after_throttling):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试restore_data.py在create_app()之后直接调用NVD同步时能写入数据
+
+create_app()不再启动调度器（也不再设置NvdService使用的应用实例），导入脚本需要自行设置。
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_restore_data.py
+    python -m pytest -q test_restore_data.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.nvd.service as nvd_service
+import restore_data
+from app.nvd.models import NvdData
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+def test_restore_recent_nvd_data():
+    """restore_recent_nvd_data从替身服务拉取最近30天的记录并写入数据库"""
+    now = datetime.utcnow()
+    server = NvdStubServer([make_vulnerability('CVE-2025-9100', now - timedelta(days=3), now - timedelta(days=1)),
+                            make_vulnerability('CVE-2025-9101', now - timedelta(days=60), now - timedelta(days=1))])
+    server.start()
+    test_app = create_test_app()
+    original_create_app = restore_data.create_app
+    original_download_dir = nvd_service.DOWNLOAD_DIR
+    try:
+        use_stub_server(server)
+        # 与在新进程中运行脚本一样，还没有设置应用实例
+        nvd_service._app = None
+        restore_data.create_app = lambda: test_app
+        with tempfile.TemporaryDirectory() as temp_dir:
+            nvd_service.DOWNLOAD_DIR = temp_dir
+            restore_data.restore_recent_nvd_data()
+            assert len([name for name in os.listdir(temp_dir) if name.endswith('.tsv')]) == 1
+        
+        with test_app.app_context():
+            assert [row.cve_id for row in NvdData.query.all()] == ['CVE-2025-9100']
+    finally:
+        restore_data.create_app = original_create_app
+        nvd_service.DOWNLOAD_DIR = original_download_dir
+        server.stop()
+
+def main():
+    """主函数"""
+    test_restore_recent_nvd_data()
+    print("✓ test_restore_recent_nvd_data")
+
+if __name__ == "__main__":
+    main()
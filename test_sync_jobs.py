@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试手动同步的后台任务队列：/nvd/sync只提交任务并立即返回，相同参数的任务不重复提交，
+/jobs/<id>返回任务状态，任务执行器执行nvd_sync任务后记录同步日志
+
+使用本地NVD替身服务和内存SQLite，不需要访问NVD和MySQL。可以直接运行，也可以用pytest运行：
+    python test_sync_jobs.py
+    python -m pytest -q test_sync_jobs.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app.nvd.service as nvd_service
+from app.jobs.runner import JobRunner
+from app.jobs.service import JobService
+from app.nvd.models import NvdData, SyncLog
+from app.nvd.stub_server import NvdStubServer
+from nvd_test_support import create_test_app, make_vulnerability, use_stub_server
+
+JSON_HEADERS = {'Accept': 'application/json'}
+
+def test_sync_route_enqueues_job():
+    """提交后返回202和任务地址，重复提交返回同一个任务，日期格式错误时返回400"""
+    test_app = create_test_app(register_blueprints=True)
+    client = test_app.test_client()
+    
+    response = client.get('/nvd/sync?start_date=2025-03-01&end_date=2025-03-05', headers=JSON_HEADERS)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'queued' and job['status_url'] == f"/jobs/{job['job_id']}"
+    
+    response = client.get('/nvd/sync?start_date=2025-03-01&end_date=2025-03-05', headers=JSON_HEADERS)
+    assert response.get_json()['job_id'] == job['job_id']
+    response = client.get('/nvd/sync', headers=JSON_HEADERS)
+    assert response.get_json()['job_id'] != job['job_id']
+    
+    response = client.get('/nvd/sync?start_date=2025/03/01&end_date=2025-03-05', headers=JSON_HEADERS)
+    assert response.status_code == 400
+    
+    status = client.get(job['status_url']).get_json()
+    assert status['job_type'] == 'nvd_sync' and status['status'] == 'queued'
+    assert status['params'] == {'start_date': '2025-03-01', 'end_date': '2025-03-05'}
+    assert client.get('/jobs/9999').status_code == 404
+    assert len(client.get('/jobs/?job_type=nvd_sync').get_json()) == 2
+
+def test_runner_executes_nvd_sync_job():
+    """任务执行器执行提交的nvd_sync任务：写入数据、记录同步日志和任务结果"""
+    server = NvdStubServer([make_vulnerability(f'CVE-2025-990{i}', datetime(2025, 3, 2 + i), datetime(2025, 3, 10))
+                            for i in range(2)]).start()
+    test_app = create_test_app(register_blueprints=True)
+    original_download_dir = nvd_service.DOWNLOAD_DIR
+    try:
+        use_stub_server(server)
+        # 与独立的执行进程一样，还没有设置应用实例
+        nvd_service._app = None
+        with tempfile.TemporaryDirectory() as temp_dir:
+            nvd_service.DOWNLOAD_DIR = temp_dir
+            job_id = test_app.test_client().get('/nvd/sync?start_date=2025-03-01&end_date=2025-03-05',
+                                                headers=JSON_HEADERS).get_json()['job_id']
+            assert JobRunner(test_app).run_once() is True
+        
+        with test_app.app_context():
+            job = JobService.get(job_id).to_dict()
+            assert job['status'] == 'success', job['error']
+            assert job['result']['imported'] == 2 and job['result']['inserted'] == 2
+            assert NvdData.query.count() == 2
+            logs = SyncLog.query.all()
+            assert [(log.action_type, log.count) for log in logs] == [('manual', 2)]
+    finally:
+        nvd_service.DOWNLOAD_DIR = original_download_dir
+        server.stop()
+
+def main():
+    """主函数"""
+    for test in (test_sync_route_enqueues_job, test_runner_executes_nvd_sync_job):
+        test()
+        print(f"✓ {test.__name__}")
+
+if __name__ == "__main__":
+    main()
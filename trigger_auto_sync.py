@@ -1,12 +1,14 @@
 from datetime import datetime, timedelta
 from app import create_app
-from app.nvd.service import sync_daily_data
+from app.nvd.service import NvdService, sync_daily_data
 from app.nvd.log_service import sync_log_service
 
 if __name__ == '__main__':
     try:
         print("正在创建Flask应用上下文...")
         app = create_app()
+        # create_app()不再启动调度器，需要自行设置同步服务使用的应用实例
+        NvdService.set_app(app)
         
         with app.app_context():
             print("手动触发自动同步任务...")
@@ -22,7 +24,6 @@ if __name__ == '__main__':
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=1)
             
-            from app.nvd.service import NvdService
             imported_count = NvdService.sync_and_save_tsv(start_date=start_date, end_date=end_date)
             
             # 手动添加一条自动同步日志
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""后台任务进程：负责NVD/CISA定时同步和执行页面提交的同步任务
+
+Web进程（run.py）和导入脚本调用create_app()时不再启动任何后台线程，
+定时调度、启动同步和数据导入都在这里执行，CPU密集的解析不占用Web请求线程。
+可以同时运行多个后台进程：定时同步通过MySQL命名锁只在主节点进程中执行，
+同步任务通过条件更新领取，每个任务只执行一次。
+"""
+
+import argparse
+import signal
+from app import create_app
+from app.cisa.service import start_scheduler as start_cisa_scheduler
+from app.nvd.service import start_scheduler as start_nvd_scheduler
+from app.jobs.runner import JobRunner, JOB_POLL_INTERVAL
+from app.leader import release_all
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='安全管理系统后台任务进程')
+    parser.add_argument('--no-scheduler', action='store_true',
+                        help='不运行定时同步，只执行页面提交的同步任务')
+    parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+                        help=f'任务队列为空时的轮询间隔（秒，默认{JOB_POLL_INTERVAL}）')
+    return parser.parse_args()
+
+def main():
+    """主函数"""
+    args = parse_arguments()
+    app = create_app()
+    
+    if not args.no_scheduler:
+        # 启动CISA数据同步调度器
+        try:
+            start_cisa_scheduler(app)
+        except Exception as e:
+            print(f"启动CISA数据同步调度器时出错: {str(e)}")
+        
+        # 启动NVD数据同步调度器
+        try:
+            start_nvd_scheduler(app)
+        except Exception as e:
+            print(f"启动NVD数据同步调度器时出错: {str(e)}")
+    
+    runner = JobRunner(app, poll_interval=args.poll_interval)
+    
+    # 收到停止信号时执行完当前任务再退出；再次收到信号时中断当前任务，放回队列后立即退出
+    def handle_signal(signum, frame):
+        if runner.stopping:
+            print(f"再次收到信号 {signum}，中断当前任务并退出")
+            raise SystemExit(1)
+        print(f"收到信号 {signum}，当前任务结束后退出")
+        runner.stop()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    try:
+        runner.run_forever()
+    finally:
+        release_all()
+        print("后台任务进程已退出")
+
+if __name__ == "__main__":
+    main()